@@ -0,0 +1,375 @@
+"""
+Bereinigung und Aufspaltung der Firmenadressen für den Nominatim-Geocoder.
+
+`clean_and_expand_adresse` ist die zeilenweise Referenz (eine Zeile rein,
+Liste von Zeilen raus). `expand_addresses` liefert für einen ganzen
+DataFrame exakt dasselbe Ergebnis spaltenweise: die Regeln laufen als
+vorkompilierte Regexe mit `str`-Operationen über die eindeutigen Adressen,
+die Liste der Einzeladressen wird je eindeutiger Adresse einmal gebaut und
+die Ausgabezeilen entstehen per Index-Wiederholung statt per `row.copy()`.
+
+`expand_table_in_chunks` verarbeitet große Dateien (CSV oder Parquet)
+chunkweise über einen Generator und hängt die Ausgabe stückweise an.
+Bereiche wie "1 - 200" mit mehr als `max_expansion` Einträgen werden mit
+Warnung nicht aufgespalten.
+
+Adressen ohne Postleitzahl bekommen `prefix` ("PLZ Ort", Standard
+"12489 Berlin", je Standort aus site_profiles.py) vorangestellt.
+"""
+import re
+import string
+from functools import cache
+
+import numpy as np
+import pandas as pd
+
+from table_storage import TableWriter, iter_table_chunks
+
+DEFAULT_PREFIX = "12489 Berlin"
+
+PLZ_RE = re.compile(r"^\d{5}\s")
+COMPANY_PREFIX_RE = re.compile(r"^(\d{5}\sBerlin)\s([^,]+),\s(.+)")
+DIGIT_RE = re.compile(r"\d")
+ECKE_RE = re.compile(r"\s*/\s*Ecke.*")
+RANGE_RE = re.compile(r"(\d+)\s*-\s*(\d+)")
+UND_RE = re.compile(r"(\d+)\s*und\s*(\d+)")
+SLASH_RE = re.compile(r"(\d+)\s*/\s*(\d+)")
+LETTER_RANGE_RE = re.compile(r"(\d+)\s*([A-Z])\s*-\s*([A-Z])")
+
+
+# --------------------------------------------------
+# Zeilenweise Referenz
+# --------------------------------------------------
+def clean_and_expand_adresse(row, prefix=DEFAULT_PREFIX):
+    adresse = str(row["Adresse"]).strip()
+    company_prefix_re = company_prefix_pattern(prefix)
+
+    # ------------------------------------------
+    # Fix typo
+    # ------------------------------------------
+    adresse = adresse.replace("Chausee", "Chaussee")
+
+    # ------------------------------------------
+    # Add missing PLZ if not present
+    # ------------------------------------------
+    if not re.match(r"^\d{5}\s", adresse):
+        adresse = f"{prefix} {adresse}"
+
+    # ------------------------------------------
+    # Remove company prefix after "Berlin"
+    # Example:
+    # 12489 Berlin ZPV, Johann-Hittorf-Straße 8
+    # Only if what follows comma contains a number
+    # ------------------------------------------
+    match = company_prefix_re.match(adresse)
+    if match and "Haus" not in match.string and "OG" not in match.string:
+        plz_part = match.group(1)
+        after_comma = match.group(3)
+
+        if re.search(r"\d", after_comma):
+            adresse = f"{plz_part} {after_comma}"
+
+    # ------------------------------------------
+    # Remove everything after first comma
+    # (this fixes Haus, OG, company prefixes, etc.)
+    # ------------------------------------------
+    adresse = adresse.split(",")[0].strip()
+
+    # ------------------------------------------
+    # Remove everything after "("
+    # ------------------------------------------
+    adresse = adresse.split("(")[0].strip()
+
+    # ------------------------------------------
+    # Remove "/ Ecke ..."
+    # ------------------------------------------
+    adresse = re.sub(r"\s*/\s*Ecke.*", "", adresse).strip()
+
+    # ------------------------------------------
+    # Add missing PLZ if not present
+    # ------------------------------------------
+    if not re.match(r"^\d{5}\s", adresse):
+        adresse = f"{prefix} {adresse}"
+
+    # ==================================================
+    # SPLITTING CASES
+    # ==================================================
+
+    # ------------------------------------------
+    # Case 1: Multiple addresses separated by ";"
+    # ------------------------------------------
+    if ";" in adresse:
+        parts = [part.strip() for part in adresse.split(";")]
+        new_rows = []
+
+        for part in parts:
+            if not re.match(r"^\d{5}\s", part):
+                part = f"{prefix} {part}"
+
+            new_row = row.copy()
+            new_row["Adresse"] = part
+            new_rows.append(new_row)
+
+        return new_rows
+
+    # ------------------------------------------
+    # Case 2: Number range "2 - 4"
+    # ------------------------------------------
+    range_match = re.search(r"(\d+)\s*-\s*(\d+)", adresse)
+    if range_match:
+        start = int(range_match.group(1))
+        end = int(range_match.group(2))
+        prefix = adresse[:range_match.start()].strip()
+
+        return [
+            create_row(row, f"{prefix} {n}")
+            for n in range(start, end + 1)
+        ]
+
+    # ------------------------------------------
+    # Case 3: "16 und 18"
+    # ------------------------------------------
+    und_match = re.search(r"(\d+)\s*und\s*(\d+)", adresse)
+    if und_match:
+        num1, num2 = und_match.groups()
+        prefix = adresse[:und_match.start()].strip()
+
+        return [
+            create_row(row, f"{prefix} {num1}"),
+            create_row(row, f"{prefix} {num2}")
+        ]
+
+    # ------------------------------------------
+    # Case 4: "14/16"
+    # ------------------------------------------
+    slash_match = re.search(r"(\d+)\s*/\s*(\d+)", adresse)
+    if slash_match:
+        num1, num2 = slash_match.groups()
+        prefix = adresse[:slash_match.start()].strip()
+
+        return [
+            create_row(row, f"{prefix} {num1}"),
+            create_row(row, f"{prefix} {num2}")
+        ]
+
+    # ------------------------------------------
+    # Case 5: "73 A-E"
+    # ------------------------------------------
+    letter_range_match = re.search(r"(\d+)\s*([A-Z])\s*-\s*([A-Z])", adresse)
+    if letter_range_match:
+        number, start_letter, end_letter = letter_range_match.groups()
+        prefix = adresse[:letter_range_match.start()].strip()
+
+        letters = list(string.ascii_uppercase)
+        start_index = letters.index(start_letter)
+        end_index = letters.index(end_letter)
+
+        return [
+            create_row(row, f"{prefix} {number} {letter}")
+            for letter in letters[start_index:end_index + 1]
+        ]
+
+    # ------------------------------------------
+    # Default case
+    # ------------------------------------------
+    row["Adresse"] = adresse
+    return [row]
+
+
+def create_row(original_row, new_address):
+    new_row = original_row.copy()
+    new_row["Adresse"] = new_address
+    return new_row
+
+
+def expand_rows(df, prefix=DEFAULT_PREFIX):
+    """Die bisherige Schleife: iterrows + `clean_and_expand_adresse` (Referenz für Benchmarks)."""
+    processed_rows = []
+
+    for _, row in df.iterrows():
+        expanded = clean_and_expand_adresse(row, prefix)
+        processed_rows.extend(expanded)
+
+    return pd.DataFrame(processed_rows).reset_index(drop=True)
+
+
+# --------------------------------------------------
+# Spaltenweise Variante
+# --------------------------------------------------
+@cache
+def company_prefix_pattern(prefix=DEFAULT_PREFIX):
+    """Wie COMPANY_PREFIX_RE, aber mit dem Ort aus `prefix` ("PLZ Ort") statt "Berlin"."""
+    if prefix == DEFAULT_PREFIX:
+        return COMPANY_PREFIX_RE
+    city = prefix.split(maxsplit=1)[-1]
+    return re.compile(rf"^(\d{{5}}\s{re.escape(city)})\s([^,]+),\s(.+)")
+
+
+def _add_missing_plz(adressen, prefix=DEFAULT_PREFIX):
+    missing = ~adressen.str.match(PLZ_RE)
+    return adressen.where(~missing, prefix + " " + adressen)
+
+
+def clean_addresses(adressen, prefix=DEFAULT_PREFIX):
+    """Bereinigungsschritte von `clean_and_expand_adresse` für eine Series aus Strings."""
+    adressen = adressen.str.strip().str.replace("Chausee", "Chaussee", regex=False)
+    adressen = _add_missing_plz(adressen, prefix)
+
+    # Firmenname zwischen Ort und Komma entfernen, wenn danach eine Nummer folgt
+    parts = adressen.str.extract(company_prefix_pattern(prefix))
+    drop_company = (
+        parts[0].notna()
+        & ~adressen.str.contains("Haus", regex=False)
+        & ~adressen.str.contains("OG", regex=False)
+        & parts[2].str.contains(DIGIT_RE, na=False)
+    )
+    adressen = adressen.where(~drop_company, parts[0] + " " + parts[2])
+
+    adressen = adressen.str.split(",", n=1).str[0].str.strip()
+    adressen = adressen.str.split("(", n=1).str[0].str.strip()
+    adressen = adressen.str.replace(ECKE_RE, "", regex=True).str.strip()
+    return _add_missing_plz(adressen, prefix)
+
+
+def _split_address(adresse, max_expansion=None, prefix=DEFAULT_PREFIX):
+    """
+    Aufspaltung einer bereinigten Adresse (Fälle 1-5 von `clean_and_expand_adresse`).
+
+    Gibt (Einzeladressen, Anzahl laut Bereich) zurück. Bereiche mit mehr als
+    `max_expansion` Einträgen werden nicht aufgespalten.
+    """
+    if ";" in adresse:
+        parts = [part if PLZ_RE.match(part) else f"{prefix} {part}"
+                 for part in (part.strip() for part in adresse.split(";"))]
+        return parts, len(parts)
+
+    match = RANGE_RE.search(adresse)
+    if match:
+        start, end = int(match.group(1)), int(match.group(2))
+        if max_expansion is not None and end - start + 1 > max_expansion:
+            return [adresse], end - start + 1
+        prefix = adresse[:match.start()].strip()
+        numbers = range(start, end + 1)
+        return [f"{prefix} {n}" for n in numbers], len(numbers)
+
+    for pattern in (UND_RE, SLASH_RE):
+        match = pattern.search(adresse)
+        if match:
+            prefix = adresse[:match.start()].strip()
+            return [f"{prefix} {match.group(1)}", f"{prefix} {match.group(2)}"], 2
+
+    match = LETTER_RANGE_RE.search(adresse)
+    if match:
+        number, start_letter, end_letter = match.groups()
+        prefix = adresse[:match.start()].strip()
+        letters = string.ascii_uppercase[string.ascii_uppercase.index(start_letter):string.ascii_uppercase.index(end_letter) + 1]
+        return [f"{prefix} {number} {letter}" for letter in letters], len(letters)
+
+    return [adresse], 1
+
+
+class ExpansionPlan:
+    """
+    Aufspaltung eines DataFrames, bevor Zeilen erzeugt werden: je Zeile die
+    Anzahl Ausgabezeilen und je eindeutiger Adresse die Einzeladressen.
+    """
+
+    def __init__(self, df, max_expansion=None, prefix=DEFAULT_PREFIX):
+        self.df = df
+        codes, uniques = pd.factorize(df["Adresse"].map(str, na_action=None), sort=False)
+        cleaned = clean_addresses(pd.Series(uniques, dtype=object), prefix)
+        self.expansions = []
+        # (Adresse, Anzahl laut Bereich) für Bereiche über dem Limit
+        self.capped = []
+        for adresse in cleaned:
+            expansion, wanted = _split_address(adresse, max_expansion, prefix)
+            if wanted > len(expansion):
+                self.capped.append((adresse, wanted))
+            self.expansions.append(expansion)
+        per_unique = np.fromiter((len(e) for e in self.expansions), dtype=np.int64, count=len(self.expansions))
+        self.codes = codes
+        self.counts = per_unique[codes]
+        self._offsets = np.concatenate([[0], np.cumsum(per_unique)])[codes]
+        self._flat = np.array([a for e in self.expansions for a in e], dtype=object)
+
+    @property
+    def output_rows(self):
+        return int(self.counts.sum())
+
+    def rows(self, start=0, stop=None):
+        """Ausgabezeilen für die Eingabezeilen `start:stop` (Reihenfolge wie die Schleife)."""
+        rows = slice(start, stop)
+        counts = self.counts[rows]
+        result = self.df.iloc[np.repeat(np.arange(len(self.df))[rows], counts)].reset_index(drop=True)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        result["Adresse"] = self._flat[np.repeat(self._offsets[rows], counts) + within]
+        return result
+
+    def iter_rows(self, max_rows):
+        """Ausgabezeilen in Stücken von höchstens `max_rows` Zeilen (mindestens eine Eingabezeile je Stück)."""
+        total = np.cumsum(self.counts)
+        start = 0
+        while start < len(self.df):
+            done = total[start - 1] if start else 0
+            stop = max(int(np.searchsorted(total, done + max_rows, side="right")), start + 1)
+            yield self.rows(start, stop)
+            start = stop
+
+
+def expand_addresses(df, max_expansion=None, prefix=DEFAULT_PREFIX):
+    """
+    Wie `expand_rows(df, prefix)`, aber spaltenweise: gleiche Zeilen, gleiche
+    Reihenfolge, gleiche CSV-Ausgabe. Mit `max_expansion` bleiben Bereiche
+    mit mehr Einträgen ungeteilt (siehe `warn_capped`).
+    """
+    plan = ExpansionPlan(df, max_expansion, prefix)
+    warn_capped(plan.capped, max_expansion)
+    return plan.rows()
+
+
+def warn_capped(capped, max_expansion, seen=None):
+    for adresse, wanted in capped:
+        if seen is not None:
+            if adresse in seen:
+                continue
+            seen.add(adresse)
+        print(f"⚠️  Adressbereich mit {wanted} Einträgen über dem Limit {max_expansion}, bleibt ungeteilt: {adresse}")
+
+
+def iter_expanded_chunks(chunks, max_expansion=None, max_rows=None, prefix=DEFAULT_PREFIX):
+    """
+    Generator: spaltet jeden eingelesenen Chunk auf und liefert die
+    Ausgabezeilen in Stücken von höchstens `max_rows` Zeilen (Standard:
+    Größe des Eingabe-Chunks), damit auch ein stark expandierender Chunk
+    den Speicher nicht sprengt.
+    """
+    seen = set()
+    for chunk in chunks:
+        if chunk.empty:
+            # keine Zeilen: die Spalten trotzdem weitergeben (Kopfzeile der Ausgabe)
+            yield chunk
+            continue
+        plan = ExpansionPlan(chunk, max_expansion, prefix)
+        warn_capped(plan.capped, max_expansion, seen)
+        yield from plan.iter_rows(max_rows or max(len(chunk), 1))
+
+
+def expand_table_in_chunks(input_path, output_path, chunk_size, max_expansion=None, storage=None,
+                           prefix=DEFAULT_PREFIX):
+    """
+    Streaming-Variante für große Dateien: liest `chunk_size` Zeilen je Chunk,
+    hängt die Ausgabe stückweise an `output_path` an und gibt die Anzahl
+    geschriebener Zeilen zurück. Der Speicherbedarf hängt nur von
+    `chunk_size` und `max_expansion` ab, nicht von der Dateigröße.
+    `storage` wählt CSV oder Parquet (siehe table_storage.py).
+
+    Die Ausgabe entspricht der von `expand_addresses` auf der ganzen Datei,
+    solange `read_csv` in jedem Chunk dieselben Spaltentypen erkennt (eine
+    Ganzzahlspalte mit Lücken nur in manchen Chunks würde dort als 1.0
+    geschrieben). Parquet hat ein festes Schema und kennt das Problem nicht.
+    """
+    with TableWriter(output_path, storage) as writer:
+        chunks = iter_table_chunks(input_path, chunk_size, storage)
+        for piece in iter_expanded_chunks(chunks, max_expansion, prefix=prefix):
+            writer.append(piece)
+    return writer.rows
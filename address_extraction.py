@@ -0,0 +1,188 @@
+"""
+Adress-Extraktion aus Google-Maps-Links und Mojibake-Reparatur.
+
+`extract_address` und `fix_mojibake` sind die zeilenweisen Referenzfunktionen.
+`extract_addresses` und `fix_mojibake_column` liefern für ganze Spalten exakt
+dieselben Werte, arbeiten aber nur auf den eindeutigen Werten, nutzen
+vektorisierte `str`-Operationen und eine Dekodiertabelle für die üblichen
+cp1252/UTF-8-Mojibake-Sequenzen. Über `AddressMemo` werden Ergebnisse
+zwischen Läufen gemerkt.
+"""
+import html
+import json
+import os
+import re
+from urllib.parse import unquote
+
+import pandas as pd
+
+
+# --- Helfer: Mojibake reparieren ---
+def fix_mojibake(s):
+    """
+    Versucht typische Mojibake-Fälle zu reparieren:
+      - Wenn s None, zurück None
+      - Wenn s Zeichen wie 'Ã' enthält, versuchen wir `.encode('cp1252').decode('utf-8')`
+      - Sonst s unverändert zurückgeben
+    Das fängt die üblichen Fälle wie 'StraÃŸe' -> 'Straße' ab.
+    """
+    if s is None:
+        return None
+    # already clean?
+    if not isinstance(s, str):
+        s = str(s)
+    # quick heuristic: oft taucht 'Ã' bei Mojibake auf, aber auch 'Ã¤', 'Ã¶', 'Ã¼', 'ÃŸ'
+    if "Ã" in s or "Â" in s:
+        try:
+            # interpretiere die vorhandenen Zeichen als cp1252/latin1-bytes, dann dekodiere als utf-8
+            repaired = s.encode("cp1252").decode("utf-8")
+            return repaired
+        except Exception:
+            # fallback: gib original zurück, wir wollen nicht crashen
+            return s
+    return s
+
+
+# --- Adresse extrahieren und korrekt unquote mit utf-8 ---
+def extract_address(url):
+    if pd.isna(url):
+        return None
+    # Google Maps Links haben oft '?q=' oder '/place/' etc. Wir behandeln '?q=' wie vorher.
+    # Unquote explizit mit encoding utf-8
+    try:
+        if "?q=" in url:
+            raw = url.split("?q=")[-1]
+            decoded = unquote(raw, encoding="utf-8", errors="replace")
+        else:
+            # fallback: unquote der ganzen URL falls keine ?q= vorhanden
+            decoded = unquote(url, encoding="utf-8", errors="replace")
+        # HTML-Entities (falls vorhanden) entfernen
+        decoded = html.unescape(decoded)
+        # Mojibake-Reparatur
+        decoded = fix_mojibake(decoded)
+        # Strip whitespace
+        return decoded.strip()
+    except Exception:
+        return None
+
+
+# --------------------------------------------------
+# Spaltenweise Varianten
+# --------------------------------------------------
+def _build_mojibake_table():
+    """'Ã¤' -> 'ä' usw.: alle zweibytigen UTF-8-Zeichen mit Lead-Byte 0xC2/0xC3, als cp1252 gelesen."""
+    table = {}
+    for lead in (0xC2, 0xC3):
+        for cont in range(0x80, 0xC0):
+            raw = bytes([lead, cont])
+            try:
+                table[raw.decode("cp1252")] = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                # in cp1252 undefinierte Bytes – solche Strings repariert fix_mojibake nicht
+                continue
+    return table
+
+
+MOJIBAKE_TABLE = _build_mojibake_table()
+MOJIBAKE_RE = re.compile("|".join(re.escape(k) for k in sorted(MOJIBAKE_TABLE, key=len, reverse=True)))
+
+
+def _fix_mojibake_strings(values):
+    """
+    Mojibake-Reparatur für eine Series aus Strings, identisch zu `fix_mojibake`.
+
+    Die Tabelle ersetzt genau dann dasselbe wie encode/decode, wenn nach dem
+    Entfernen aller Tabellen-Sequenzen nur ASCII übrig bleibt. Alle anderen
+    Strings (selten) laufen über die Referenzfunktion.
+    """
+    candidates = values.str.contains("Ã", regex=False) | values.str.contains("Â", regex=False)
+    if not candidates.any():
+        return values
+    result = values.copy()
+    subset = values[candidates]
+    exact = subset.str.replace(MOJIBAKE_RE, "", regex=True).str.isascii()
+    result[exact[exact].index] = subset[exact].str.replace(
+        MOJIBAKE_RE, lambda m: MOJIBAKE_TABLE[m.group(0)], regex=True
+    )
+    rest = exact[~exact].index
+    result[rest] = [fix_mojibake(s) for s in subset[rest]]
+    return result
+
+
+def fix_mojibake_column(column):
+    """Wie `column.apply(lambda x: fix_mojibake(x) if pd.notna(x) else x)`, aber je eindeutigem Wert."""
+    codes, uniques = pd.factorize(column)
+    uniques = pd.Series(uniques, dtype=object)
+    is_str = uniques.map(type).eq(str)
+    fixed = pd.Series(index=uniques.index, dtype=object)
+    fixed[is_str] = _fix_mojibake_strings(uniques[is_str])
+    fixed[~is_str] = [fix_mojibake(v) for v in uniques[~is_str]]
+    return _take(column, fixed, codes)
+
+
+def _take(column, values, codes):
+    """Verteilt die Werte je eindeutigem Eintrag zurück auf die Zeilen (fehlende bleiben fehlend)."""
+    result = pd.Series(values.to_numpy(dtype=object)[codes], index=column.index, dtype=object)
+    result[codes == -1] = column[codes == -1]
+    # gleicher Spaltentyp wie bei `apply`
+    return result.infer_objects()
+
+
+def _extract_strings(urls):
+    """Vektorisierte `extract_address` für eine Series aus Strings."""
+    has_q = urls.str.contains("?q=", regex=False)
+    raw = urls.where(~has_q, urls.str.rsplit("?q=", n=1).str[-1])
+    # unquote/unescape ändern nur Strings mit '%' bzw. '&'
+    quoted = raw.str.contains("%", regex=False)
+    raw[quoted] = [unquote(s, encoding="utf-8", errors="replace") for s in raw[quoted]]
+    escaped = raw.str.contains("&", regex=False)
+    raw[escaped] = [html.unescape(s) for s in raw[escaped]]
+    return _fix_mojibake_strings(raw).str.strip()
+
+
+def extract_addresses(links, memo=None):
+    """
+    Wie `links.apply(extract_address)`, aber nur je eindeutigem Link.
+
+    Mit `memo` (einem `AddressMemo`) werden bereits bekannte Links nicht
+    erneut verarbeitet und neue Ergebnisse dort abgelegt.
+    """
+    known = memo.values if memo is not None else {}
+    codes, uniques = pd.factorize(links)
+    uniques = pd.Series(uniques, dtype=object)
+    extracted = uniques.map(known).astype(object)
+    new = ~uniques.isin(known.keys())
+    if new.any():
+        is_str = uniques.map(type).eq(str)
+        fresh = new & is_str
+        if fresh.any():
+            extracted[fresh] = _extract_strings(uniques[fresh])
+        extracted[new & ~is_str] = [extract_address(v) for v in uniques[new & ~is_str]]
+        if memo is not None:
+            known.update(zip(uniques[new], extracted[new]))
+            memo.dirty = True
+    result = _take(links, extracted, codes)
+    # fehlende Links ergeben wie bei `extract_address` None
+    result[codes == -1] = None
+    return result.infer_objects()
+
+
+class AddressMemo:
+    """Link -> Adresse, als JSON-Datei zwischen Läufen gemerkt."""
+
+    def __init__(self, path):
+        self.path = path
+        self.values = {}
+        self.dirty = False
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.values = json.load(f)
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
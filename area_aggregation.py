@@ -0,0 +1,200 @@
+"""
+Nutzfläche und Nutzeinheiten je Cluster (für get_area_per_type_of_use.py).
+
+Die Geschossfläche eines Gebäudes (`place_id`) wird gleichmäßig auf seine
+Einträge verteilt und gerundet, danach wird je Cluster summiert.
+`aggregate_area` rechnet das vollständig neu (Referenz). `AreaStore` hält
+das Ergebnis materialisiert (je Firma ihre Zeilen, je Gebäude die Mieter,
+je Cluster die Summen) und arbeitet bei `apply` nur die geänderten Firmen
+und die Gebäude nach, in denen sich die Zahl der Mieter ändert.
+"""
+import json
+import os
+from collections import Counter
+
+import pandas as pd
+
+AREA_COLUMN = "Nutzfläche (m²)"
+UNITS_COLUMN = "Nutzeinheiten"
+# Spalten, die die Aggregation braucht
+STORE_COLUMNS = ["Nr.", "place_id", "Geschossfl", "Cluster"]
+STORE_VERSION = 1
+
+
+def aggregate_area(df):
+    """Vollständige Neuberechnung: Geschossfläche / Einträge je place_id, Summe je Cluster."""
+    entries_per_place = df.groupby("place_id")["place_id"].transform("count")
+    usable = (df["Geschossfl"] / entries_per_place).round()
+    return (
+        df.assign(Geschossfl=usable)
+          .groupby("Cluster", as_index=False, observed=True)
+          .agg(
+              **{
+                  AREA_COLUMN: ("Geschossfl", "sum"),
+                  UNITS_COLUMN: ("Nr.", "count")
+              }
+          )
+    )
+
+
+def company_rows(df):
+    """{Nr.: [(place_id, Geschossfl, Cluster), ...]} je Firma, fehlende Werte als None."""
+    frame = df[STORE_COLUMNS].astype(object)
+    frame = frame.where(df[STORE_COLUMNS].notna(), None)
+    rows = {}
+    for nr, place, area, cluster in zip(*(frame[c].tolist() for c in STORE_COLUMNS)):
+        rows.setdefault(nr, []).append((place, area, cluster))
+    return rows
+
+
+class AreaStore:
+    """
+    Materialisierte Aggregate von `aggregate_area`:
+      - `companies`: Nr. -> Zeilen (place_id, Geschossfl, Cluster)
+      - `places`: place_id -> {(Cluster, Geschossfl): Anzahl Zeilen}
+      - `clusters`: Cluster -> [Nutzfläche, Nutzeinheiten, Zeilen]
+
+    Die Anteile sind gerundete ganze Zahlen; Summen daraus sind in float
+    exakt, Abziehen und Neu-Aufrechnen ergibt also genau die Summe einer
+    vollständigen Neuberechnung.
+    """
+
+    def __init__(self):
+        self.companies = {}
+        self.places = {}
+        self.clusters = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        store = cls()
+        store.apply(added=company_rows(df))
+        return store
+
+    # --------------------------------------------------
+    # Änderungen
+    # --------------------------------------------------
+    def diff(self, df):
+        """Änderungen von `df` gegenüber dem Stand als (added, removed) für `apply`."""
+        current = company_rows(df)
+        removed = [nr for nr in self.companies if nr not in current]
+        added = {nr: rows for nr, rows in current.items() if self.companies.get(nr) != rows}
+        return added, removed
+
+    def apply(self, added=None, removed=()):
+        """
+        Nimmt Firmen heraus (`removed`: Nr.) und fügt Firmen hinzu bzw. ersetzt
+        sie (`added`: {Nr.: Zeilen} wie von `company_rows`). Aufwand: die
+        betroffenen Firmen plus die Mieter ihrer Gebäude.
+        """
+        added = added or {}
+        changed = set(removed) | set(added)
+        places = {
+            place
+            for rows in [self.companies.get(nr, ()) for nr in changed] + list(added.values())
+            for place, _, _ in rows
+            if place is not None
+        }
+        # Anteile der betroffenen Gebäude abziehen, Zeilen tauschen, neu aufteilen
+        for place in places:
+            self._split(place, -1)
+        for nr in changed:
+            for row in self.companies.pop(nr, ()):
+                self._count(nr, row, -1)
+        for nr, rows in added.items():
+            self.companies[nr] = list(rows)
+            for row in rows:
+                self._count(nr, row, 1)
+        for place in places:
+            self._split(place, 1)
+
+    def reclassify(self, clusters):
+        """Ordnet Firmen einem anderen Cluster zu ({Nr.: Cluster})."""
+        self.apply(added={
+            nr: [(place, area, cluster) for place, area, _ in self.companies[nr]]
+            for nr, cluster in clusters.items()
+            if nr in self.companies
+        })
+
+    def _count(self, nr, row, sign):
+        place, area, cluster = row
+        if place is not None:
+            members = self.places.setdefault(place, Counter())
+            members[(cluster, area)] += sign
+            if not members[(cluster, area)]:
+                del members[(cluster, area)]
+            if not members:
+                del self.places[place]
+        if cluster is not None:
+            totals = self.clusters.setdefault(cluster, [0.0, 0, 0])
+            # Nutzeinheiten zählen wie `count` nur Zeilen mit Nr.
+            totals[1] += sign * (nr is not None)
+            totals[2] += sign
+            if not totals[2]:
+                del self.clusters[cluster]
+
+    def _split(self, place, sign):
+        """Rechnet die Anteile eines Gebäudes den Clustern zu (+1) bzw. wieder ab (-1)."""
+        members = self.places.get(place)
+        if not members:
+            return
+        tenants = sum(members.values())
+        for (cluster, area), count in members.items():
+            if cluster is not None and area is not None:
+                # round() rundet wie pandas auf die gerade Zahl
+                self.clusters[cluster][0] += sign * count * round(area / tenants)
+
+    # --------------------------------------------------
+    # Ergebnis und Prüfung
+    # --------------------------------------------------
+    def result(self):
+        """Tabelle wie `aggregate_area` (Cluster sortiert)."""
+        names = sorted(self.clusters)
+        return pd.DataFrame({
+            "Cluster": names,
+            AREA_COLUMN: pd.Series([self.clusters[c][0] for c in names], dtype="float64"),
+            UNITS_COLUMN: pd.Series([self.clusters[c][1] for c in names], dtype="int64"),
+        })
+
+    def check(self, df):
+        """Cluster, deren Werte von einer vollständigen Neuberechnung abweichen (leer = konsistent)."""
+        expected = aggregate_area(df).astype({"Cluster": object}).set_index("Cluster")
+        actual = self.result().set_index("Cluster")
+        expected, actual = expected.align(actual, join="outer")
+        differs = (expected != actual).any(axis=1)
+        return differs[differs].index.tolist()
+
+    # --------------------------------------------------
+    # Speichern
+    # --------------------------------------------------
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        if not os.path.exists(path):
+            return store
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != STORE_VERSION:
+            return store
+        store.companies = {nr: [tuple(row) for row in rows] for nr, rows in data["companies"]}
+        store.places = {
+            place: Counter({(cluster, area): count for cluster, area, count in members})
+            for place, members in data["places"]
+        }
+        store.clusters = {cluster: totals for cluster, *totals in data["clusters"]}
+        return store
+
+    def save(self, path):
+        # Schlüssel können Zahlen sein, daher Listen statt JSON-Objekten
+        data = {
+            "version": STORE_VERSION,
+            "companies": [[nr, rows] for nr, rows in self.companies.items()],
+            "places": [
+                [place, [[cluster, area, count] for (cluster, area), count in members.items()]]
+                for place, members in self.places.items()
+            ],
+            "clusters": [[cluster, *totals] for cluster, totals in self.clusters.items()],
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
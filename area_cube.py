@@ -0,0 +1,157 @@
+"""
+Flächen-Würfel: Nutzfläche und Nutzeinheiten nach beliebigen Kombinationen
+von Cluster, Gebäude (`place_id`) und Gebäudeattributen (`mapular_le`,
+`Gebaeudegr`).
+
+`AreaCube.build` kodiert jede Dimension einmal als Ganzzahl-Codes (sortierte
+Wörterbücher, fehlende Werte als eigener, letzter Code), bildet daraus die
+feinsten Zellen und summiert die Maße mit `np.bincount` in einem Durchlauf.
+Die Nutzfläche je Zeile ist wie in `aggregate_area` die gerundete
+Geschossfläche / Einträge des Gebäudes, daher sind alle Maße additiv und
+jede Verdichtung ist eine Summe über Zellen (`AreaCube.query`).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from area_aggregation import AREA_COLUMN, UNITS_COLUMN
+
+DIMENSIONS = ["Cluster", "place_id", "mapular_le", "Gebaeudegr"]
+ROWS_COLUMN = "Zeilen"
+CUBE_VERSION = 1
+
+
+def _encode(values):
+    """Sortierte Codes; fehlende Werte bekommen den letzten Code."""
+    codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=False)
+    uniques = pd.Index(uniques).astype(object)
+    return codes.astype(np.int32), [None if pd.isna(v) else v for v in uniques.tolist()]
+
+
+def _group(code_arrays, cardinalities):
+    """Gruppennummer je Eintrag (sortiert nach den Codes) und die Codes je Gruppe."""
+    n_keys = np.prod([float(c) for c in cardinalities])
+    if n_keys <= max(len(code_arrays[0]), 1 << 16):
+        # wenige mögliche Gruppen: Schlüssel direkt zählen statt sortieren
+        key = np.ravel_multi_index(code_arrays, cardinalities)
+        present = np.flatnonzero(np.bincount(key, minlength=int(n_keys)))
+        group = np.cumsum(np.bincount(present, minlength=int(n_keys)))[key] - 1
+        return group, list(np.unravel_index(present, cardinalities))
+    if n_keys < 2 ** 62:
+        key = np.ravel_multi_index(code_arrays, cardinalities)
+        uniques, group = np.unique(key, return_inverse=True)
+        return group, list(np.unravel_index(uniques, cardinalities))
+    # zu viele Kombinationen für einen Schlüssel: zeilenweise eindeutig machen
+    stacked = np.column_stack(code_arrays)
+    uniques, group = np.unique(stacked, axis=0, return_inverse=True)
+    return group.ravel(), list(uniques.T)
+
+
+class AreaCube:
+    """
+    Zellen des Würfels: je Dimension ein Code-Array (`codes`), die Werte der
+    Codes (`values`) und je Maß ein Array (`measures`).
+    """
+
+    def __init__(self, values, codes, measures):
+        self.values = values
+        self.codes = codes
+        self.measures = measures
+        self.dimensions = list(values)
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.measures[ROWS_COLUMN])
+
+    @classmethod
+    def build(cls, df, dimensions=DIMENSIONS):
+        """Würfel aus der verknüpften Firmentabelle (fehlende Dimensionsspalten werden übersprungen)."""
+        dimensions = [d for d in dimensions if d in df.columns]
+        entries_per_place = df.groupby("place_id")["place_id"].transform("count")
+        usable = (df["Geschossfl"] / entries_per_place).round().fillna(0).to_numpy()
+
+        values, row_codes = {}, []
+        for dim in dimensions:
+            codes, values[dim] = _encode(df[dim])
+            row_codes.append(codes)
+        if dimensions:
+            cell, cell_codes = _group(row_codes, [len(values[d]) for d in dimensions])
+        else:
+            cell, cell_codes = np.zeros(len(df), dtype=np.int64), []
+        n_cells = int(cell.max()) + 1 if len(cell) else 0
+
+        measures = {
+            AREA_COLUMN: np.bincount(cell, weights=usable, minlength=n_cells),
+            UNITS_COLUMN: np.bincount(cell, weights=df["Nr."].notna().to_numpy(), minlength=n_cells).astype(np.int64),
+            ROWS_COLUMN: np.bincount(cell, minlength=n_cells).astype(np.int64),
+        }
+        codes = {dim: np.asarray(c, dtype=np.int32) for dim, c in zip(dimensions, cell_codes)}
+        return cls(values, codes, measures)
+
+    def _code_of(self, dim, wanted):
+        if dim not in self._indexes:
+            self._indexes[dim] = pd.Index(self.values[dim], dtype=object)
+        return self._indexes[dim].get_indexer(pd.Index(list(wanted), dtype=object))
+
+    def query(self, by=(), where=None, dropna=True):
+        """
+        Summen der Maße gruppiert nach den Dimensionen `by` (leer = Gesamtsumme),
+        eingeschränkt auf `where` ({Dimension: Werte}). Mit `dropna` fallen wie
+        bei `groupby` Gruppen mit fehlendem Wert in `by` weg. Zeilen sind nach
+        den Werten von `by` sortiert.
+        """
+        by = list(by)
+        mask = np.ones(len(self), dtype=bool)
+        for dim, wanted in (where or {}).items():
+            if isinstance(wanted, (str, int, float)) or wanted is None:
+                wanted = [wanted]
+            mask &= np.isin(self.codes[dim], self._code_of(dim, wanted))
+        if dropna:
+            for dim in by:
+                if self.values[dim] and self.values[dim][-1] is None:
+                    mask &= self.codes[dim] != len(self.values[dim]) - 1
+
+        selected = [self.codes[dim][mask] for dim in by]
+        if by:
+            group, group_codes = _group(selected, [len(self.values[dim]) for dim in by])
+        else:
+            group, group_codes = np.zeros(int(mask.sum()), dtype=np.int64), []
+        n_groups = len(group_codes[0]) if by else 1
+
+        result = {}
+        for dim, codes in zip(by, group_codes):
+            result[dim] = np.asarray(self.values[dim], dtype=object)[codes]
+        for name, measure in self.measures.items():
+            sums = np.bincount(group, weights=measure[mask], minlength=n_groups)
+            result[name] = sums if name == AREA_COLUMN else sums.astype(np.int64)
+        frame = pd.DataFrame(result)
+        return frame.infer_objects() if by else frame
+
+    def export_per_cluster(self):
+        """Tabelle von `companies_area_and_units_per_cluster.csv` (wie `aggregate_area`)."""
+        return self.query(["Cluster"])[["Cluster", AREA_COLUMN, UNITS_COLUMN]]
+
+    # --------------------------------------------------
+    # Speichern: Codes und Maße als komprimiertes npz, Wörterbücher als JSON darin
+    # --------------------------------------------------
+    def save(self, path):
+        meta = {"version": CUBE_VERSION, "dimensions": self.dimensions, "values": self.values,
+                "measures": list(self.measures)}
+        arrays = {f"codes_{i}": self.codes[dim] for i, dim in enumerate(self.dimensions)}
+        arrays.update({f"measure_{i}": m for i, m in enumerate(self.measures.values())})
+        # np.savez hängt sonst ".npz" an den temporären Namen an
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CUBE_VERSION:
+                raise ValueError(f"Würfel {path} hat ein veraltetes Format, bitte neu bauen")
+            codes = {dim: data[f"codes_{i}"] for i, dim in enumerate(meta["dimensions"])}
+            measures = {name: data[f"measure_{i}"] for i, name in enumerate(meta["measures"])}
+        return cls({dim: meta["values"][dim] for dim in meta["dimensions"]}, codes, measures)
@@ -1,218 +1,85 @@
-import pandas as pd
 import os
 
-THIS_PATH = os.path.dirname(os.path.abspath(__file__))
+import metrics
+from cluster_matching import RULES_PATH, ClusterMatcher, ClusterMemo, classify_column, load_cluster_rules
+from site_profiles import OUTPUT_PREFIX, RESULTS_PATH
+from table_storage import read_table, write_table
 
+# Ergebnisse des Standorts (PIPELINE_SITE, siehe site_profiles.py)
 companies_preprocessed_path = os.path.join(
-    THIS_PATH,
-    "results",
-    "adlershof_companies_geodata_preprocessed.csv"
+    RESULTS_PATH,
+    f"{OUTPUT_PREFIX}_companies_geodata_preprocessed.csv"
 )
 
 companies_assigned_cluster_path = os.path.join(
-    THIS_PATH,
-    "results",
-    "adlershof_companies_processed.csv"
+    RESULTS_PATH,
+    f"{OUTPUT_PREFIX}_companies_processed.csv"
 )
 
-# --------------------------------------------------
-# 1. CSV einlesen
-# --------------------------------------------------
-df = pd.read_csv(companies_preprocessed_path, sep=",")
-
-# Sicherheit: alles lowercase für Matching
-df["Branchenzweig_norm"] = df["Branchenzweig"].str.lower().fillna("")
+# Schlüsselwörter, Fallback und händische Overrides
+cluster_rules_path = os.environ.get("CLUSTER_RULES", RULES_PATH)
 
+# Branchenzweig -> Cluster zwischen Läufen
+cluster_memo_path = os.path.join(RESULTS_PATH, "cluster_memo.json")
 
 # --------------------------------------------------
-# 2. Cluster-Definition (Priorität von oben nach unten!)
+# 2. + 3. + 4. Cluster-Definition (cluster_rules.json) und Zuordnung (cluster_matching.py)
 # --------------------------------------------------
-cluster_keywords = {
-
-    "Alten- / Pflegeheim": [
-        "pflegeheim", "pflegedienst",
-        "betreutes wohnen", "alten"
-    ],
-
-    "Rechenzentrum": [
-        "rechenzentrum", "server", "telekommunikation",
-        "it-netzwerke", "it-hardware", "hosting"
-    ],
-
-    "Labor": [
-        "labor", "diagnostik",
-        "pharmazie", "biotechnologie",
-        "medizintechnik", "therapietechnik",
-        "photonik", "optik", "laser",
-        "mikrosysteme", "materialien",
-        "reinraum", "umweltanalytik / schadstoffanalytik",
-        "mems / sensoren"
-    ],
-
-    "Krankenhaus": [
-        "krankenhaus", "klinik", "radiologie",
-        "onkologie", "chirurgie", "internisten",
-        "kardiologie", "medizinisches zentrum",
-        "arztpraxen",
-        "neurologie, psychotherapie / psychiatrie",
-        "arbeitsmedizin"
-    ],
-
-    "Lagerhalle": [
-        "lager", "logistik", "transport",
-        "kurierdienste", "großhandel",
-        "reinigung", "facility", "service",
-        "gebäudereinigung"
-    ],
-
-    "Bibliothek": [
-        "bibliothek", "archiv"
-    ],
-
-    "Schule": [
-        "schule", "ausbildung",
-        "weiterbildung", "fahrschule",
-        "universitäre einrichtungen"
-    ],
-
-    "Kindergarten": [
-        "kinderbetreuung"
-    ],
-
-    "Supermarkt": [
-        "supermarkt", "lebensmittel",
-        "bäckerei", "fleischerei"
-    ],
-
-    "Einkaufszentrum": [
-        "einkaufszentrum"
-    ],
-
-    "Hotel": [
-        "hotels / unterkünfte"
-    ],
-
-    "Restaurant": [
-        "restaurant", "gastronomie",
-        "catering", "event-gastronomie"
-    ],
-
-    "Kantine": [
-        "kantine"
-    ],
-
-    "Fitnesscenter": [
-        "fitness", "sportstudio", "sport",
-        "yoga", "taekwondo"
-    ],
-
-    "Sporthalle": [
-        "sporthalle", "sportanlage"
-    ],
-
-    "Schwimmbad": [
-        "schwimmbad"
-    ],
-
-    "Theater": [
-        "kultur",
-    ],
-
-    "Museum": [
-        "museum", "ausstellung"
-    ],
-
-    "Einzelhandel": [
-        "handel / dienstleistungen",
-        "einzelhandel", "handel",
-        "buchhandel", "zeitschriftenhandel",
-        "fotohandel", "apotheke",
-        "sanitätshaus", "augenoptiker",
-        "hörakustik", "friseur",
-        "kosmetik", "wellness",
-        "sporthandel", "autohaus",
-        "zentrum", "store", "bike",
-        "handel"
-    ],
-
-    "Produktion": [
-        "produktion", "maschinenbau", "anlagenbau",
-        "werkzeugbau", "metallbearbeitung",
-        "gerätebau", "automatisierungstechnik",
-        "glasherstellung", "glasbearbeitung",
-        "recycling", "abfallwirtschaft",
-        "umwelttechnologie", "industrie 4.0",
-        "manufacturing", "produktion", "industrial",
-        "bauausführungen", "fertigung", "systems",
-        "bauwesen",
-        "it / medien", "elektronik / elektrotechnik",
-        "lichttechnik", "klimatechnik / kältetechnik",
-        "automobil- / verkehrstechnik",
-        "klimatechnik / kältetechnik",
-        "luftfahrt / raumfahrt"
-    ],
-
-    "Büro": [
-        "büro", "unternehmensberatung",
-        "wissenschaftliche einrichtungen",
-        "technologieberatung", "gutachten",
-        "banken", "finanzdienstleistungen",
-        "versicherungen", "rechtsberatung",
-        "anwälte", "steuerberatung",
-        "it-dienstleistungen", "software",
-        "werbung", "marketing",
-        "projektentwicklung", "immobilien",
-        "bezirksämter", "verwaltung",
-        "print", "mail",
-        "ingenieurdienstleistung",
-        "medizinische / soziale einrichtungen",
-        "agentur für arbeit", "jobcenter",
-        "verein", "stiftung", "software",
-        "consulting", "analytics", "engineering",
-        "architekt", "ingenieure", "planungsbüro",
-        "allgemeine dienstleistungen",
-        "energiesysteme, energieversorgung",
-        "bühnentechnik", "außeruniversitäre institute",
-        "mobilität / e-mobilität", "erneuerbare energien"
-    ],
-
-
+def assign_clusters(df, rules_path=cluster_rules_path, memo_path=cluster_memo_path):
+    """`df` mit Cluster-Spalte (Categorical); Regeln und Memo wie oben."""
+    with metrics.stage("cluster") as stage:
+        stage.rows_in = len(df)
+        df = _assign_clusters(df, rules_path, memo_path)
+        stage.rows_out = len(df)
+    return df
+
+
+def _assign_clusters(df, rules_path, memo_path):
+    # (Priorität von oben nach unten, erster Treffer gewinnt, sonst "Sonstiges")
+    rules = load_cluster_rules(rules_path)
+    matcher = ClusterMatcher(rules["clusters"], rules["fallback"])
+    memo = ClusterMemo(memo_path)
+    dropped = memo.update_rules(rules["clusters"], rules["fallback"])
+    print(
+        f"🧩 Matcher mit {len(matcher.priority)} Schlüsselwörtern, "
+        f"{len(memo.values)} Branchenzweige gemerkt ({dropped} wegen Regeländerung verworfen)"
+    )
+
+    # jeder verschiedene Branchenzweig wird einmal (kleingeschrieben) klassifiziert,
+    # sofern er nicht schon im Memo steht; Cluster bleibt als Categorical so klein
+    # wie die Anzahl verschiedener Werte
+    df = df.assign(Cluster=classify_column(df["Branchenzweig"], matcher, memo))
+    memo.save()
+    print(f"   {memo.hits} aus dem Memo, {memo.misses} neu klassifiziert")
+
+    # Händisch Einträge modifizieren (Name -> Cluster, ein Hash-Join statt Scan je Name)
+    manual_overrides = rules["overrides"]
+    override = df["Name"].map(manual_overrides)
+    new_clusters = set(override.dropna()) - set(df["Cluster"].cat.categories)
+    if new_clusters:
+        df["Cluster"] = df["Cluster"].cat.add_categories(sorted(new_clusters))
+    df["Cluster"] = df["Cluster"].mask(override.notna(), override)
+    return df
+
+
+def main():
     # --------------------------------------------------
-    # INFRASTRUKTUR
+    # 1. CSV einlesen
     # --------------------------------------------------
-    "Parkhaus": [
-        "parkhaus", "tiefgarage"
-    ]
-}
-
-
-# --------------------------------------------------
-# 3. Zuordnungsfunktion
-# --------------------------------------------------
-def assign_cluster(text):
-    for cluster, keywords in cluster_keywords.items():
-        for kw in keywords:
-            if kw in text:
-                return cluster
-    return "Sonstiges"
+    # Branchenzweig wiederholt sich nach der Adress-Aufspaltung auf vielen Zeilen
+    # (PIPELINE_STORAGE=parquet: Zwischenstände als Parquet, siehe table_storage.py)
+    df = read_table(companies_preprocessed_path, dtype={"Branchenzweig": "category"})
 
+    df = assign_clusters(df)
 
-# --------------------------------------------------
-# 4. Cluster-Spalte erzeugen
-# --------------------------------------------------
-df["Cluster"] = df["Branchenzweig_norm"].apply(assign_cluster)
-
-# Händisch Einträge modifizieren
-df.loc[df["Name"] == "Hochschulsport Adlershof", "Cluster"] = "Sporthalle"
-df.loc[df["Name"] == "Alternate Photonics GmbH", "Cluster"] = "Produktion"
-
-# Hilfsspalte optional löschen
-df.drop(columns=["Branchenzweig_norm"], inplace=True)
+    # --------------------------------------------------
+    # 5. Optional: speichern
+    # --------------------------------------------------
+    # Endergebnis: im Parquet-Modus zusätzlich als CSV
+    write_table(df, companies_assigned_cluster_path, export_csv=True)
 
+    print("✅ Cluster-Spalte erfolgreich erstellt.")
 
-# --------------------------------------------------
-# 5. Optional: speichern
-# --------------------------------------------------
-df.to_csv(companies_assigned_cluster_path, index=False)
 
-print("✅ Cluster-Spalte erfolgreich erstellt.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Nebenläufiger Batch-Geocoder für (selbst gehostete) Nominatim-Instanzen.
+
+Jeder Endpunkt bekommt ein Ratenprofil (gleichzeitige Anfragen, Start- und
+Höchstrate der adaptiven Ratenbegrenzung aus rate_control.py, Wiederholungen).
+Alle Endpunkte ziehen ihre Adressen aus einer gemeinsamen Warteschlange –
+schnelle oder wenig ausgelastete Instanzen übernehmen dadurch automatisch
+mehr Arbeit. Zeitüberschreitungen und Dienstfehler werden pro Anfrage mit
+exponentiellem Backoff wiederholt, Retry-After hat Vorrang.
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from geopy.adapters import RequestsAdapter
+from geopy.exc import (
+    GeocoderAuthenticationFailure,
+    GeocoderInsufficientPrivileges,
+    GeocoderQueryError,
+    GeocoderRateLimited,
+    GeocoderServiceError,
+    GeocoderTimedOut,
+)
+from geopy.geocoders import Nominatim
+from urllib3.util.retry import Retry
+
+import metrics
+from rate_control import AdaptiveRateLimiter, parse_retry_after
+
+RATE_PROFILES = {
+    # Öffentliche Instanz: Start wie bisher bei einer Anfrage alle 5 s, die
+    # Nutzungsrichtlinie (höchstens 1 Anfrage/s) ist die harte Obergrenze
+    "public": {"concurrency": 1, "rate": 0.2, "max_rate": 1, "throttle_statuses": (429, 503, "timeout"),
+               "max_retries": 3, "error_wait_seconds": 10},
+    # Eigene Instanz: viele Anfragen parallel, kurze Wartezeit nach Fehlern; nur
+    # 429 drosselt (ein 503 der eigenen Instanz ist ein Fehler, keine Überlast-Ansage)
+    "self-hosted": {"concurrency": 16, "rate": 1000, "max_rate": 1000, "throttle_statuses": (429,),
+                    "max_retries": 3, "error_wait_seconds": 1},
+}
+
+DEFAULT_ENDPOINT = "https://nominatim.openstreetmap.org"
+# Fehler, bei denen eine Wiederholung nichts ändert
+NOT_RETRYABLE = (GeocoderQueryError, GeocoderAuthenticationFailure, GeocoderInsufficientPrivileges)
+# Verbindungsfehler wiederholt urllib3 wie bei geopy üblich, 429/503 mit Retry-After
+# aber nicht selbst: sonst sieht die Ratenbegrenzung statt der Drosselung nur eine langsame Antwort
+ADAPTER_RETRIES = Retry(2, read=False, respect_retry_after_header=False)
+
+
+def error_status(error):
+    """HTTP-Status hinter einem geopy-Fehler (geopy meldet 503 als GeocoderTimedOut), sonst "timeout"/"error"."""
+    status = getattr(error.__cause__, "status_code", None)
+    if status is not None:
+        return status
+    return "timeout" if isinstance(error, GeocoderTimedOut) else "error"
+
+
+def error_retry_after(error):
+    """Retry-After in Sekunden (geopy liest ihn nur bei 429 selbst aus)."""
+    if isinstance(error, GeocoderRateLimited) and error.retry_after is not None:
+        return error.retry_after
+    headers = getattr(error.__cause__, "headers", None)
+    return parse_retry_after(headers.get("retry-after")) if headers else None
+
+
+class Endpoint:
+    """Eine Nominatim-Instanz mit eigenem Ratenprofil und adaptiver Ratenbegrenzung."""
+
+    def __init__(self, url, profile="public", user_agent="adlershof-geocoder", timeout=10, store=None, **overrides):
+        settings = dict(RATE_PROFILES[profile], **overrides)
+        self.url = url
+        self.concurrency = settings["concurrency"]
+        self.max_retries = settings["max_retries"]
+        self.error_wait_seconds = settings["error_wait_seconds"]
+        self.limiter = AdaptiveRateLimiter.for_url(
+            url, settings["rate"], settings["max_rate"], store=store,
+            throttle_statuses=settings["throttle_statuses"], target=url,
+        )
+        parts = urlsplit(url)
+        self.geolocator = Nominatim(
+            user_agent=user_agent,
+            domain=parts.netloc + parts.path.rstrip("/"),
+            scheme=parts.scheme or "https",
+            timeout=timeout,
+            adapter_factory=partial(RequestsAdapter, max_retries=ADAPTER_RETRIES),
+        )
+        self.requests = 0
+        self.retries = 0
+
+    def _request(self, address):
+        """Eine Anfrage, Ergebnis an die Ratenbegrenzung gemeldet."""
+        sent_at = time.monotonic()
+        try:
+            with metrics.timer("http_request_seconds", target=self.url):
+                location = self.geolocator.geocode(address)
+        except GeocoderServiceError as e:
+            self.limiter.throttled(sent_at, error_status(e), error_retry_after(e))
+            raise
+        self.limiter.success(sent_at, time.monotonic() - sent_at)
+        return location
+
+    def _retry_wait(self, error, attempt):
+        """Wartezeit vor Versuch `attempt`; None wenn nicht wiederholt wird."""
+        if isinstance(error, NOT_RETRYABLE) or attempt > self.max_retries:
+            return None
+        self.retries += 1
+        metrics.count("retries_total", target=self.url)
+        if error_retry_after(error) is not None:
+            # die Ratenbegrenzung sperrt den Endpunkt bis dahin
+            return 0
+        # exponentieller Backoff mit etwas Streuung
+        return self.error_wait_seconds * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+
+    def geocode(self, address):
+        """Synchron mit Ratenbegrenzung und Wiederholungen (für den sequentiellen Modus)."""
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self.requests += 1
+            try:
+                return self._request(address)
+            except GeocoderServiceError as e:
+                attempt += 1
+                wait = self._retry_wait(e, attempt)
+                if wait is None:
+                    raise
+                with metrics.timer("rate_limit_wait_seconds", target=self.url, reason="backoff"):
+                    time.sleep(wait)
+
+
+class BatchGeocoder:
+    def __init__(self, endpoints=None, profile="public", user_agent="adlershof-geocoder", store=None, **overrides):
+        urls = endpoints or [DEFAULT_ENDPOINT]
+        self.endpoints = [Endpoint(url, profile, user_agent, store=store, **overrides) for url in urls]
+        self.failed = 0
+
+    async def geocode_all(self, addresses, on_result=None):
+        """
+        Geokodiert alle Adressen und gibt {Adresse: Location oder None} zurück.
+
+        `on_result(address, location)` wird im Event-Loop nach jeder
+        erfolgreich beantworteten Anfrage aufgerufen (z.B. für Cache und
+        Checkpoints). Adressen, bei denen alle Versuche fehlschlagen, fehlen
+        im Ergebnis und werden nicht an `on_result` übergeben.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        for address in dict.fromkeys(addresses):
+            queue.put_nowait(address)
+        results = {}
+        workers = sum(endpoint.concurrency for endpoint in self.endpoints)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            async def worker(endpoint):
+                while True:
+                    try:
+                        address = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        location = await self._geocode_with_retries(loop, executor, endpoint, address)
+                    except GeocoderServiceError as e:
+                        self.failed += 1
+                        print(f"Geocoding endgültig fehlgeschlagen für '{address}' ({endpoint.url}): {e}")
+                        continue
+                    results[address] = location
+                    if on_result is not None:
+                        on_result(address, location)
+
+            await asyncio.gather(*(
+                worker(endpoint)
+                for endpoint in self.endpoints
+                for _ in range(endpoint.concurrency)
+            ))
+        return results
+
+    def geocode_many(self, addresses, on_result=None):
+        """Synchroner Einstieg für `geocode_all`."""
+        return asyncio.run(self.geocode_all(addresses, on_result))
+
+    async def _geocode_with_retries(self, loop, executor, endpoint, address):
+        attempt = 0
+        while True:
+            await endpoint.limiter.acquire_async()
+            endpoint.requests += 1
+            try:
+                return await loop.run_in_executor(executor, endpoint._request, address)
+            except GeocoderServiceError as e:
+                attempt += 1
+                wait = endpoint._retry_wait(e, attempt)
+                if wait is None:
+                    raise
+                with metrics.timer("rate_limit_wait_seconds", target=endpoint.url, reason="backoff"):
+                    await asyncio.sleep(wait)
+
+    @property
+    def limiters(self):
+        return [endpoint.limiter for endpoint in self.endpoints]
+
+    def stats(self):
+        parts = [f"{e.url}: {e.requests} Anfragen, {e.retries} Wiederholungen, {e.limiter.rate:.1f} Anfragen/s"
+                 for e in self.endpoints]
+        return "; ".join(parts) + f"; {self.failed} endgültig fehlgeschlagen"
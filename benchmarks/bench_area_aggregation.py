@@ -0,0 +1,104 @@
+"""
+Inkrementelle Flächen-Aggregation: `AreaStore.apply` gegen `aggregate_area`.
+
+Baut den Store auf einer synthetischen verknüpften Firmentabelle (wie
+`companies_Gebäudegrunddatensatz_vereinigt.csv`, mit Lücken in place_id,
+Geschossfl, Cluster und Nr.) und wendet dann zufällige Änderungen an
+(Firmen ziehen ein, aus, um oder wechseln den Cluster) und misst sie gegen
+eine vollständige Neuberechnung. Dass beide gleich sind, prüft
+tests/test_area_aggregation.py:
+    python benchmarks/bench_area_aggregation.py --rows 500000 --delta 50 --steps 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from area_aggregation import STORE_COLUMNS, AreaStore, aggregate_area  # noqa: E402
+from generators import CLUSTERS, make_store_frame  # noqa: E402
+
+
+def to_frame(companies):
+    records = [(nr, *row) for nr, rows in companies.items() for row in rows]
+    df = pd.DataFrame(records, columns=STORE_COLUMNS)
+    return df.astype({"Geschossfl": "float64"})
+
+
+def random_delta(store, places, size, rng, next_nr):
+    """Zufällige Änderung an `size` Firmen: (added, removed, Beschreibung)."""
+    nrs = rng.sample([nr for nr in store.companies if nr is not None], size)
+    kind = rng.choice(["einzug", "auszug", "umzug", "cluster"])
+    if kind == "auszug":
+        return {}, nrs, kind
+    if kind == "cluster":
+        return {nr: [(p, a, rng.choice(CLUSTERS)) for p, a, _ in store.companies[nr]] for nr in nrs}, [], kind
+    if kind == "umzug":
+        return {
+            nr: [(rng.choice(places), a, c) for _, a, c in store.companies[nr]] for nr in nrs
+        }, [], kind
+    added = {}
+    for i in range(size):
+        place = rng.choice(places + [None])
+        added[float(next_nr + i)] = [(place, rng.choice([None, 1200.0, 3500.5, 801.0]), rng.choice(CLUSTERS + [None]))
+                                     for _ in range(rng.randint(1, 3))]
+    return added, [], kind
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--delta", type=int, default=50, help="Firmen je Änderung")
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_store_frame(args.rows)
+    start = time.perf_counter()
+    aggregate_area(df)
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    store = AreaStore.from_frame(df)
+    build_time = time.perf_counter() - start
+    print(f"{len(df)} Zeilen, {len(store.companies)} Firmen, {len(store.places)} Gebäude")
+    print(f"aggregate_area (vollständig):  {full_time * 1000:8.1f} ms")
+    print(f"AreaStore aufbauen:            {build_time * 1000:8.1f} ms")
+
+    rng = random.Random(1)
+    places = sorted(store.places)
+    next_nr = int(df["Nr."].max()) + 1
+    apply_times = []
+    for _ in range(args.steps):
+        added, removed, _ = random_delta(store, places, args.delta, rng, next_nr)
+        next_nr += args.delta
+        start = time.perf_counter()
+        store.apply(added, removed)
+        apply_times.append(time.perf_counter() - start)
+    print(f"AreaStore.apply ({args.delta} Firmen):   {np.median(apply_times) * 1000:8.2f} ms (Median über "
+          f"{args.steps} Änderungen)")
+
+    # Weg des Skripts: neuer Stand als Tabelle -> diff -> apply, gespeichert und neu geladen
+    current = to_frame(store.companies)
+    changed = current.sample(frac=1, random_state=2).drop_duplicates("Nr.").head(args.delta)["Nr."].tolist()
+    current.loc[current["Nr."].isin(changed), "Cluster"] = "Labor"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "area_store.json")
+        store.save(path)
+        start = time.perf_counter()
+        store = AreaStore.load(path)
+        load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    added, removed = store.diff(current)
+    diff_time = time.perf_counter() - start
+    store.apply(added, removed)
+    print(f"AreaStore laden / diff:        {load_time * 1000:8.1f} ms / {diff_time * 1000:.1f} ms "
+          f"({len(added)} geänderte Firmen erkannt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Flächen-Würfel: Aufbau, Speichern/Laden und Abfragen.
+
+Baut den Würfel auf einer synthetischen verknüpften Firmentabelle (mit
+`mapular_le`, `Gebaeudegr` und Lücken) und misst Aufbau, Speichern/Laden und
+zufällige Verdichtungen und Schnitte. Dass die Abfragen gleich einem
+`groupby` über alle Zeilen sind, prüft tests/test_area_cube.py:
+    python benchmarks/bench_area_cube.py --rows 500000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from area_aggregation import aggregate_area  # noqa: E402
+from area_cube import AreaCube  # noqa: E402
+from generators import make_area_frame  # noqa: E402
+
+
+def random_query(cube, rng):
+    by = rng.sample(cube.dimensions, rng.randint(0, 3))
+    where = {}
+    for dim in rng.sample(cube.dimensions, rng.randint(0, 2)):
+        where[dim] = rng.sample(cube.values[dim], min(len(cube.values[dim]), rng.choice([1, 3, 50])))
+    return by, where
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    df = make_area_frame(args.rows)
+    start = time.perf_counter()
+    cube = AreaCube.build(df)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    aggregate_area(df)
+    full_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "area_cube.npz")
+        cube.save(path)
+        size = os.path.getsize(path) / 2 ** 20
+        start = time.perf_counter()
+        cube = AreaCube.load(path)
+        load_time = time.perf_counter() - start
+
+    rng = random.Random(1)
+    queries = [random_query(cube, rng) for _ in range(args.queries)]
+    times = []
+    for by, where in queries:
+        start = time.perf_counter()
+        cube.query(by, where)
+        times.append(time.perf_counter() - start)
+
+    print(f"{len(df)} Zeilen -> {len(cube)} Zellen über {cube.dimensions}")
+    print(f"Würfel bauen:             {build_time * 1000:8.1f} ms  (aggregate_area je Cluster: {full_time * 1000:.1f} ms)")
+    print(f"gespeichert / geladen:    {size:8.2f} MiB / {load_time * 1000:.1f} ms")
+    print(f"Abfragen:                 {np.median(times) * 1000:8.2f} ms Median, {np.max(times) * 1000:.2f} ms max "
+          f"({len(queries)} zufällige Verdichtungen/Schnitte)")
+
+
+if __name__ == "__main__":
+    main()
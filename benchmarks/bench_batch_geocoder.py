@@ -0,0 +1,62 @@
+"""
+Batch-Geocoder gegen lokale Nominatim-Ersatzserver.
+
+Startet mehrere Ersatz-Instanzen mit Latenz und zufälligen 503-Fehlern,
+geokodiert synthetische Adressen einmal sequentiell (eine Anfrage zur Zeit)
+und einmal mit dem Profil "self-hosted" verteilt über alle Instanzen. Die
+Koordinaten prüft tests/test_batch_geocoder.py:
+    python benchmarks/bench_batch_geocoder.py --addresses 400 --servers 2
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import ExitStack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_geocoder import BatchGeocoder  # noqa: E402
+from nominatim_server import NominatimServer  # noqa: E402
+
+
+def run(geocoder, addresses):
+    start = time.perf_counter()
+    results = geocoder.geocode_many(addresses)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, default=400)
+    parser.add_argument("--servers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16, help="gleichzeitige Anfragen je Instanz")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    addresses = [f"Teststraße {i}, 12489 Berlin" for i in range(args.addresses)]
+    addresses += ["Nowhere 1, 12489 Berlin"]
+
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(NominatimServer(args.latency, args.error_rate, seed=i))
+            for i in range(args.servers)
+        ]
+        urls = [server.url for server in servers]
+        overrides = {"error_wait_seconds": 0.05}
+
+        sequential = BatchGeocoder(urls[:1], "self-hosted", concurrency=1, **overrides)
+        _, seq_time = run(sequential, addresses)
+
+        batch = BatchGeocoder(urls, "self-hosted", concurrency=args.concurrency, **overrides)
+        _, batch_time = run(batch, addresses)
+
+    n = len(addresses)
+    print(f"{n} Adressen, Latenz {args.latency * 1000:.0f} ms, Fehlerquote {args.error_rate:.0%}")
+    print(f"sequentiell (1 Instanz):          {seq_time:7.2f} s  ({n / seq_time:7.1f} Adressen/s)")
+    print(f"batch ({args.servers} Instanzen x {args.concurrency:>2}):        {batch_time:7.2f} s  ({n / batch_time:7.1f} Adressen/s)")
+    print(f"  {batch.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark der Cluster-Zuordnung: `Series.apply(assign_cluster)` gegen `ClusterMatcher`.
+
+Misst den Durchsatz auf einer synthetischen Branchenzweig-Spalte, zeilenweise
+und mit `classify_column` (nur verschiedene Werte, als Categorical). Die
+Gleichheit beider Varianten prüft tests/test_cluster_matching.py:
+    python benchmarks/bench_cluster_matching.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cluster_matching import ClusterMatcher, assign_cluster, classify_column  # noqa: E402
+from generators import make_column  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=5_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = ClusterMatcher()
+    build_time = time.perf_counter() - start
+    print(f"Matcher gebaut: {len(matcher.priority)} Schlüsselwörter, {build_time * 1000:.1f} ms")
+
+    column = make_column(args.rows, args.unique)
+    start = time.perf_counter()
+    expected = column.apply(assign_cluster)
+    apply_time = time.perf_counter() - start
+    start = time.perf_counter()
+    matcher.classify(column)
+    matcher_time = time.perf_counter() - start
+    categorical = column.astype("category")
+    start = time.perf_counter()
+    per_unique = classify_column(categorical, matcher)
+    unique_time = time.perf_counter() - start
+
+    n = len(column)
+    print(f"{n} Zeilen, {column.nunique()} verschiedene Branchenzweige")
+    print(f"apply(assign_cluster):  {apply_time:6.2f} s  ({n / apply_time / 1e6:5.2f} Mio. Zeilen/s)")
+    print(f"ClusterMatcher:         {matcher_time:6.2f} s  ({n / matcher_time / 1e6:5.2f} Mio. Zeilen/s, "
+          f"{apply_time / matcher_time:4.1f}x)")
+    print(f"classify_column:        {unique_time:6.2f} s  ({n / unique_time / 1e6:5.2f} Mio. Zeilen/s, "
+          f"{apply_time / unique_time:4.1f}x, {per_unique.memory_usage() / 2 ** 20:.1f} MiB "
+          f"statt {expected.memory_usage(deep=True) / 2 ** 20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Regel-Cache der Cluster-Zuordnung: Branchenzweig-Memo.
+
+Misst kalten Lauf und Lauf nur aus dem Memo. Dass der Memo nach einer
+Regeländerung dasselbe liefert wie ein frisch gebauter Matcher, prüft
+tests/test_cluster_rules.py:
+    python benchmarks/bench_cluster_rules.py --rows 1000000
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cluster_matching import (  # noqa: E402
+    ClusterMatcher, ClusterMemo, classify_column, cluster_keywords,
+)
+from generators import make_column  # noqa: E402
+
+
+def measure(label, fn, rows):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed:6.2f} s  ({rows / elapsed / 1e6:6.2f} Mio. Zeilen/s)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=20_000)
+    args = parser.parse_args()
+
+    column = make_column(args.rows, args.unique).astype("category")
+    with tempfile.TemporaryDirectory() as tmp:
+        memo_path = os.path.join(tmp, "memo.json")
+
+        def run():
+            re.purge()  # wie in einem neuen Prozess: Regex nicht aus dem Cache von `re`
+            matcher = ClusterMatcher(cluster_keywords)
+            memo = ClusterMemo(memo_path)
+            memo.update_rules(cluster_keywords)
+            result = classify_column(column, matcher, memo)
+            memo.save()
+            return result
+
+        measure("ohne Memo", run, args.rows)
+        measure("mit Memo", run, args.rows)
+
+
+if __name__ == "__main__":
+    main()
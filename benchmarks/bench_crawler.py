@@ -0,0 +1,55 @@
+"""
+Vergleicht sequentiellen und asyncio-Crawler gegen den lokalen Ersatz-Server.
+
+Gibt Laufzeit und Seiten pro Sekunde aus; dass beide Modi identische
+CSV-Zeilen liefern, prüft tests/test_crawler.py:
+    python benchmarks/bench_crawler.py --latency 0.05 --concurrency 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl_enterprizes_Adlershof as crawler  # noqa: E402
+from fixture_server import FixtureServer, FixtureSite  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Serverlatenz pro Anfrage (s)")
+    parser.add_argument("--concurrency", type=int, default=crawler.DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, args.per_page)
+    n_requests = args.pages + len(site.companies)
+
+    with FixtureServer(site, latency=args.latency) as server:
+        seq_rows, async_rows = [], []
+        _, seq_time = timed(lambda: crawler.crawl_sequential(
+            set(), 1, seq_rows.append, base_url=server.base_url, delay=0
+        ))
+        _, async_time = timed(lambda: asyncio.run(crawler.crawl_async(
+            set(), 1, async_rows.append, base_url=server.base_url, concurrency=args.concurrency
+        )))
+
+    print(f"{n_requests} Anfragen, Latenz {args.latency * 1000:.0f} ms")
+    print(f"sequentiell:            {seq_time:7.2f} s  ({n_requests / seq_time:7.1f} Seiten/s)")
+    print(f"asyncio (limit {args.concurrency:>3}):   {async_time:7.2f} s  ({n_requests / async_time:7.1f} Seiten/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark des lokalen Geocoders auf einer synthetischen Adress-Referenz.
+
+Erzeugt eine stadtgroße Referenz (Straßen x Hausnummern), baut den Index
+und misst exakte und unscharfe Lookups (Tippfehler im Straßennamen):
+    python benchmarks/bench_local_geocoder.py --streets 10000 --numbers 40 --queries 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_geocoder import LocalGeocoder  # noqa: E402
+
+SYLLABLES = ["ber", "lin", "dor", "wal", "ten", "hof", "kar", "lis", "mar", "son", "ru", "do", "wer", "ein", "stein"]
+TYPES = ["straße", "weg", "allee", "chaussee", "damm", "platz", "ring"]
+
+
+def make_reference(n_streets, n_numbers, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n_streets:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{word}{rng.choice(TYPES)}" if rng.random() < 0.5 else f"{word} {rng.choice(TYPES).capitalize()}")
+    rows = []
+    for name in sorted(names):
+        for number in range(1, n_numbers + 1):
+            rows.append((name, str(number), f"1{rng.randint(2000, 4999)}", 52.3 + rng.random() * 0.4, 13.1 + rng.random() * 0.6))
+    return pd.DataFrame(rows, columns=["street", "housenumber", "postcode", "lat", "lon"])
+
+
+def make_queries(reference, n, typo_share, seed=1):
+    rng = random.Random(seed)
+    sample = reference.sample(n, random_state=seed)
+    queries = []
+    for street, number, postcode in zip(sample["street"], sample["housenumber"], sample["postcode"]):
+        if rng.random() < typo_share:
+            pos = rng.randrange(1, len(street) - 1)
+            street = street[:pos] + street[pos + 1:]  # ein Buchstabe fehlt ("Chausee")
+        queries.append(f"{street} {number}, {postcode} Berlin")
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streets", type=int, default=10000)
+    parser.add_argument("--numbers", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--typo-share", type=float, default=0.05)
+    args = parser.parse_args()
+
+    reference = make_reference(args.streets, args.numbers)
+    start = time.perf_counter()
+    geocoder = LocalGeocoder(reference)
+    build = time.perf_counter() - start
+
+    queries = make_queries(reference, args.queries, args.typo_share)
+    start = time.perf_counter()
+    found = sum(geocoder.lookup(q) is not None for q in queries)
+    elapsed = time.perf_counter() - start
+
+    print(f"Index: {len(geocoder)} Adressen in {build:.2f} s aufgebaut")
+    print(f"{len(queries)} Abfragen in {elapsed:.3f} s ({elapsed / len(queries) * 1e6:.1f} µs/Abfrage), {found} gefunden")
+    print(f"Lokaler Geocoder: {geocoder.stats()}")
+
+
+if __name__ == "__main__":
+    main()
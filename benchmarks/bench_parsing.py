@@ -0,0 +1,85 @@
+"""
+Micro-Benchmark der HTML-Parser-Backends aus html_parsing.
+
+Gibt die Parse-Zeit pro Seite für jedes Backend aus; dass alle Backends
+feldgenau dasselbe liefern, prüft tests/test_parsing.py. Neben den generierten
+Fixture-Seiten können echte Seiten aus dem HTML-Archiv des Crawlers verwendet
+werden, mit `--check` auch für den Vergleich mit der Referenz ("bs4"):
+    python benchmarks/bench_parsing.py --archive results/html_archive --check
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing  # noqa: E402
+from fixture_server import DETAIL_PREFIX, FixtureSite  # noqa: E402
+from generators import EDGE_CASE_DETAILS  # noqa: E402
+from html_archive import HtmlArchive  # noqa: E402
+
+BASE_URL = "https://www.adlershof.de"
+
+def load_pages(args):
+    listings, details = [], []
+    site = FixtureSite(args.pages, args.per_page)
+    listings += [site.listing_html(n) for n in range(1, site.pages + 1)]
+    details += [site.detail_html(c["slug"]) for c in site.companies]
+    details += EDGE_CASE_DETAILS
+
+    if args.archive:
+        archive = HtmlArchive(args.archive)
+        for url, entry in archive.latest().items():
+            html = archive.read(entry)
+            if "currentPage" in url:
+                listings.append(html)
+            elif DETAIL_PREFIX.rstrip("/") in url or "/firma/" in url:
+                details.append(html)
+    return listings, details
+
+
+def bench(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            func(html)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1e3
+
+
+def check(listings, details):
+    """Zählt je Backend die Seiten, deren Felder von der Referenz ("bs4") abweichen."""
+    reference_links = [html_parsing.links_bs4(html, BASE_URL) for html in listings]
+    reference_details = [html_parsing.details_bs4(html) for html in details]
+    for name, (parse_links, parse_details) in html_parsing.BACKENDS.items():
+        if name == "bs4":
+            continue
+        differing = sum(parse_links(html, BASE_URL) != ref for html, ref in zip(listings, reference_links))
+        differing += sum(parse_details(html) != ref for html, ref in zip(details, reference_details))
+        print(f"✅ {name}: wie bs4" if not differing else f"❌ {name}: {differing} Seiten weichen von bs4 ab")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--archive", help="Pfad des HTML-Archivs ohne Endung")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Ergebnisse aller Backends mit bs4 vergleichen")
+    args = parser.parse_args()
+
+    listings, details = load_pages(args)
+    print(f"{len(listings)} Listenseiten, {len(details)} Detailseiten")
+    if args.check:
+        check(listings, details)
+    print(f"{'Backend':<10} {'Liste ms/Seite':>15} {'Detail ms/Seite':>16}")
+    for name, (parse_links, parse_details) in html_parsing.BACKENDS.items():
+        listing_ms = bench(lambda html: parse_links(html, BASE_URL), listings, args.repeat)
+        detail_ms = bench(parse_details, details, args.repeat)
+        print(f"{name:<10} {listing_ms:>15.3f} {detail_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
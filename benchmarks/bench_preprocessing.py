@@ -0,0 +1,86 @@
+"""
+Benchmark der Adress-Aufbereitung: iterrows-Schleife gegen die spaltenweise Variante.
+
+Erzeugt eine synthetische Geodaten-Tabelle (wie `adlershof_companies_geodata.csv`)
+mit allen Adressformen, die `preprocess_companies.py` behandelt, und misst
+beide Varianten bis zur CSV-Ausgabe. Dass die CSV Byte für Byte gleich ist,
+prüft tests/test_preprocessing.py:
+    python benchmarks/bench_preprocessing.py --rows 100000
+
+Mit `--chunk-size` wird zusätzlich der Streaming-Modus über eine CSV-Datei mit
+einigen pathologischen Bereichen ("1 - 5000") mit der Verarbeitung der ganzen
+Datei verglichen (Zeit und Spitzenspeicher per tracemalloc).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from address_expansion import expand_addresses, expand_rows, expand_table_in_chunks  # noqa: E402
+from generators import make_companies  # noqa: E402
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def compare_streaming(df, chunk_size, max_expansion):
+    df = df.copy()
+    df.loc[df.index[::max(len(df) // 5, 1)], "Adresse"] = "Rudower Chaussee 1 - 5000"
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "geodata.csv")
+        whole_path = os.path.join(tmp, "whole.csv")
+        chunked_path = os.path.join(tmp, "chunked.csv")
+        df.to_csv(input_path, index=False)
+
+        def whole():
+            expand_addresses(pd.read_csv(input_path), max_expansion).to_csv(whole_path, index=False)
+
+        _, whole_time, whole_peak = measure(whole)
+        written, chunk_time, chunk_peak = measure(
+            lambda: expand_table_in_chunks(input_path, chunked_path, chunk_size, max_expansion, "csv")
+        )
+    print(f"ganze Datei:            {whole_time:7.2f} s, Spitze {whole_peak:7.1f} MiB")
+    print(f"chunkweise ({chunk_size:>6}):    {chunk_time:7.2f} s, Spitze {chunk_peak:7.1f} MiB  ({written} Zeilen)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--unique", type=int, default=5_000)
+    parser.add_argument("--chunk-size", type=int, default=0, help="zusätzlich den Streaming-Modus messen")
+    parser.add_argument("--max-expansion", type=int, default=100)
+    args = parser.parse_args()
+
+    df = make_companies(args.rows, args.unique)
+
+    start = time.perf_counter()
+    reference = expand_rows(df).to_csv(index=False)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expand_addresses(df).to_csv(index=False)
+    vector_time = time.perf_counter() - start
+
+    print(f"{len(df)} Zeilen -> {reference.count(chr(10)) - 1} Zeilen")
+    print(f"iterrows + row.copy():  {loop_time:7.2f} s")
+    print(f"spaltenweise:           {vector_time:7.2f} s  ({loop_time / vector_time:5.1f}x)")
+
+    if args.chunk_size:
+        compare_streaming(df, args.chunk_size, args.max_expansion)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Adaptive Ratenbegrenzung (rate_control.py) gegen drosselnde Ersatz-Server.
+
+Crawler: der Fixture-Server bedient höchstens `--server-rate` Anfragen/s und
+antwortet darüber mit 429 und Retry-After. Gemessen werden der asyncio-Crawler
+mit adaptiver Rate (erster Lauf ab 1 / REQUEST_DELAY, zweiter Lauf ab der
+gespeicherten Rate), ein Lauf mit einer Obergrenze unter der Serverrate und
+mit `--fixed` die feste Wartezeit von bisher.
+
+Geocoder: der Nominatim-Ersatz drosselt auf `--geo-rate` Anfragen/s, einmal
+mit 429 und Retry-After, einmal mit 503 ohne. Dass gedrosselte Läufe dieselben
+Ergebnisse liefern, prüft tests/test_rate_control.py:
+    python benchmarks/bench_rate_control.py --server-rate 10 --geo-rate 4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl_enterprizes_Adlershof as crawler  # noqa: E402
+from batch_geocoder import Endpoint  # noqa: E402
+from fixture_server import FixtureServer, FixtureSite  # noqa: E402
+from nominatim_server import NominatimServer  # noqa: E402
+from rate_control import RateStore  # noqa: E402
+from throttle import ServerThrottle  # noqa: E402
+
+
+def crawl(server, concurrency, limiter=None, sequential=False, delay=0):
+    server.throttle.reset()
+    crawler.rate_limiter = limiter
+    rows = []
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if sequential:
+                crawler.crawl_sequential(set(), 1, rows.append, base_url=server.base_url, delay=delay)
+            else:
+                asyncio.run(crawler.crawl_async(set(), 1, rows.append, base_url=server.base_url,
+                                                concurrency=concurrency))
+    finally:
+        crawler.rate_limiter = None
+    return rows, time.perf_counter() - start
+
+
+def report(label, n_requests, seconds, rejected, limiter=None):
+    line = f"{label:<34} {seconds:7.2f} s  ({n_requests / seconds:6.1f} Anfragen/s), {rejected:>3} gedrosselt"
+    if limiter is not None:
+        line += f", Rate am Ende {limiter.rate:5.2f}/s"
+    print(line)
+
+
+def bench_crawler(args, store):
+    site = FixtureSite(args.pages, args.per_page)
+    n_requests = args.pages + len(site.companies)
+    throttle = ServerThrottle(args.server_rate, status=429, retry_after=1)
+    with FixtureServer(site, latency=args.latency, throttle=throttle) as server:
+        print(f"Crawler: {n_requests} Anfragen, Server drosselt über {args.server_rate:g}/s, "
+              f"Latenz {args.latency * 1000:.0f} ms, asyncio mit {args.concurrency} gleichzeitig")
+        if args.fixed:
+            _, seconds = crawl(server, args.concurrency, sequential=True, delay=crawler.REQUEST_DELAY)
+            report(f"fest {crawler.REQUEST_DELAY:g} s (sequentiell)", n_requests, seconds, throttle.rejected)
+
+        for label in ("adaptiv, erster Lauf", "adaptiv, gelernte Rate"):
+            limiter = crawler.create_rate_limiter(server.base_url, args.max_rate, store)
+            _, seconds = crawl(server, args.concurrency, limiter)
+            store.save(limiter)
+            report(f"{label} (max {args.max_rate:g}/s)", n_requests, seconds, throttle.rejected, limiter)
+
+        ceiling = args.server_rate / 2
+        limiter = crawler.create_rate_limiter(server.base_url, ceiling, None)
+        _, seconds = crawl(server, args.concurrency, limiter)
+        report(f"adaptiv, Obergrenze {ceiling:g}/s", n_requests, seconds, throttle.rejected, limiter)
+
+
+def bench_geocoder(args):
+    addresses = [f"Teststraße {i}, 12489 Berlin" for i in range(args.addresses)] + ["Nowhere 1, 12489 Berlin"]
+    print(f"\nGeocoder: {len(addresses)} Adressen nacheinander, Server drosselt über {args.geo_rate:g}/s")
+    for status, retry_after in ((429, 1), (503, None)):
+        throttle = ServerThrottle(args.geo_rate, status=status, retry_after=retry_after)
+        with NominatimServer(args.latency, throttle=throttle) as server:
+            # Profil "public", aber mit Obergrenze über der Serverrate, damit gedrosselt wird
+            endpoint = Endpoint(server.url, "public", rate=1, max_rate=args.geo_rate * 4, error_wait_seconds=0.2)
+            start = time.perf_counter()
+            for address in addresses:
+                endpoint.geocode(address)
+            seconds = time.perf_counter() - start
+        label = f"{status}" + (f" + Retry-After {retry_after} s" if retry_after else " ohne Retry-After")
+        report(f"adaptiv, {label}", len(addresses), seconds, throttle.rejected, endpoint.limiter)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Serverlatenz pro Anfrage (s)")
+    parser.add_argument("--concurrency", type=int, default=crawler.DEFAULT_CONCURRENCY)
+    parser.add_argument("--server-rate", type=float, default=10, help="Crawler: Anfragen/s bis zur Drosselung")
+    parser.add_argument("--max-rate", type=float, default=20, help="Crawler: Obergrenze der adaptiven Rate")
+    parser.add_argument("--fixed", action="store_true", help="auch mit fester Wartezeit (langsam)")
+    parser.add_argument("--geo-rate", type=float, default=4, help="Geocoder: Anfragen/s bis zur Drosselung")
+    parser.add_argument("--addresses", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_crawler(args, RateStore(os.path.join(tmp, "rate_limits.json")))
+    bench_geocoder(args)
+
+
+if __name__ == "__main__":
+    main()
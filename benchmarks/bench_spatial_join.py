@@ -0,0 +1,63 @@
+"""
+Spatial Join Firmen -> Gebäude auf einer synthetischen Stadt.
+
+Erzeugt stadtgroße, leicht gedrehte rechteckige Grundrisse auf einem
+Parzellenraster (als GeoJSON in WGS84), lädt und indiziert sie mit
+`load_buildings` und ordnet Punkte zu (innerhalb bekannter Grundrisse und
+zufällig über die Stadt). Die Zuordnung selbst prüft tests/test_spatial_join.py:
+    python benchmarks/bench_spatial_join.py --buildings 400000 --points 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from building_index import load_buildings  # noqa: E402
+from generators import PLOT, make_city, to_lonlat, write_city_geojson  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=400_000)
+    parser.add_argument("--points", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    city = make_city(args.buildings)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gebaeude.geojson")
+        write_city_geojson(path, city)
+        start = time.perf_counter()
+        _, index = load_buildings(path)
+        load_time = time.perf_counter() - start
+
+    # Punkte innerhalb bekannter Grundrisse (in lokalen Rechteck-Koordinaten erzeugt)
+    n_inside = args.points // 2
+    target = rng.integers(0, args.buildings, n_inside)
+    cx, cy, half_w, half_h, angle = (a[target] for a in city)
+    u, v = rng.uniform(-0.95, 0.95, n_inside) * half_w, rng.uniform(-0.95, 0.95, n_inside) * half_h
+    inside_lon, inside_lat = to_lonlat(cx + u * np.cos(angle) - v * np.sin(angle), cy + u * np.sin(angle) + v * np.cos(angle))
+    # zufällige Punkte über die ganze Stadt (innen, nah, außer Reichweite)
+    extent = np.ceil(np.sqrt(args.buildings)) * PLOT
+    random_lon, random_lat = to_lonlat(rng.uniform(-50, extent + 50, args.points - n_inside),
+                                       rng.uniform(-50, extent + 50, args.points - n_inside))
+    lon, lat = np.concatenate([inside_lon, random_lon]), np.concatenate([inside_lat, random_lat])
+    lon[::97] = np.nan  # Firmen ohne Koordinaten
+
+    start = time.perf_counter()
+    building, distance = index.query_lonlat(lon, lat)
+    query_time = time.perf_counter() - start
+
+    matched = building >= 0
+    print(f"{len(index)} Gebäude geladen und indiziert: {load_time:6.2f} s")
+    print(f"{args.points} Punkte zugeordnet:            {query_time:6.2f} s  "
+          f"({matched.sum()} mit Gebäude, {(distance == 0).sum()} innerhalb)")
+
+
+if __name__ == "__main__":
+    main()
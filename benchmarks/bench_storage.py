@@ -0,0 +1,88 @@
+"""
+Zwischenstände als CSV oder Parquet: Schreiben, Laden und Speicherbedarf.
+
+Erzeugt eine synthetische Firmentabelle wie `adlershof_companies_processed.csv`
+(aufgespaltene Adressen, Branchenzweig und Cluster als Categoricals), schreibt
+sie mit `write_table` in beiden Formaten und lädt sie in je einem frischen
+Prozess ganz bzw. nur mit den Spalten von `get_area_per_type_of_use.py`
+(Zeit und Spitzen-RSS über dem Grundbedarf des Prozesses). Dass beide
+Formate dieselbe Tabelle ergeben, prüft tests/test_table_storage.py:
+    python benchmarks/bench_storage.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import make_table  # noqa: E402
+from table_storage import read_table, storage_path, write_table  # noqa: E402
+
+AREA_COLUMNS = ["Nr.", "Name", "place_id", "mapular_le", "Gebaeudegr", "Geschossfl", "Cluster"]
+DTYPES = {"Branchenzweig": "category", "Cluster": "category"}
+
+
+def peak_rss_kib():
+    """
+    Spitzen-RSS dieses Prozesses. `ru_maxrss` überlebt unter Linux das exec und
+    enthielte die Spitze des (großen) Elternprozesses, daher VmHWM.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load(path, storage, projected):
+    """Im Kindprozess: lädt die Tabelle und gibt Zeit und RSS-Zuwachs als JSON aus."""
+    base = peak_rss_kib()
+    start = time.perf_counter()
+    df = read_table(path, columns=AREA_COLUMNS if projected else None, dtype=DTYPES, storage=storage)
+    seconds = time.perf_counter() - start
+    peak = peak_rss_kib()
+    print(json.dumps({"seconds": seconds, "rss_mib": (peak - base) / 1024, "columns": len(df.columns)}))
+
+
+def measure_load(path, storage, projected):
+    args = [sys.executable, os.path.abspath(__file__), "--load", path, storage] + (["--projected"] if projected else [])
+    return json.loads(subprocess.run(args, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--load", nargs=2, metavar=("PATH", "STORAGE"), help=argparse.SUPPRESS)
+    parser.add_argument("--projected", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.load:
+        load(*args.load, args.projected)
+        return
+
+    df = make_table(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "adlershof_companies_processed.csv")
+        print(f"{len(df)} Zeilen, {len(df.columns)} Spalten")
+        for storage in ("csv", "parquet"):
+            start = time.perf_counter()
+            write_table(df, path, storage)
+            size = os.path.getsize(storage_path(path, storage)) / 2 ** 20
+            print(f"{storage:<8} schreiben {time.perf_counter() - start:6.2f} s, {size:7.1f} MiB")
+
+        for projected in (False, True):
+            label = f"{len(AREA_COLUMNS)} Spalten" if projected else "alle Spalten"
+            for storage in ("csv", "parquet"):
+                result = measure_load(path, storage, projected)
+                print(f"{storage:<8} laden ({label:<12}) {result['seconds']:6.2f} s, RSS +{result['rss_mib']:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Benchmark-Suite über alle Stufen, Ergebnisse als JSON für den Vergleich
+zwischen Commits.
+
+Misst je Fall und Zeilenzahl (Standard 1k/100k/1M) die Zeit (Minimum und
+Median über `--repeat` Läufe) und den Spitzen-RSS über dem Stand nach dem
+Erzeugen der Eingaben. Jede Messung läuft in einem frischen Prozess, damit
+sich Speicherspitzen und Caches der Fälle nicht gegenseitig beeinflussen.
+Die Eingaben kommen aus generators.py. Die zeilenweisen Referenzen
+(`expand_rows` bis 100k Zeilen, Parsen ganzer Detailseiten bis 10k Seiten)
+sind begrenzt, `--no-limits` hebt das auf. Dauert ein Lauf länger als
+`--budget` Sekunden, wird nicht wiederholt:
+
+    python benchmarks/bench_suite.py                          # -> benchmarks/results/<commit>.json
+    python benchmarks/bench_suite.py --sizes 1000 100000 --cases assign_cluster classify_column
+    python benchmarks/bench_suite.py --compare benchmarks/results/alt.json benchmarks/results/neu.json
+
+`--compare` zeigt je Messung das Verhältnis neu/alt und endet mit Exit-Code 1,
+wenn eine Zeit oder ein Speicherbedarf um mehr als `--threshold` gestiegen ist.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_PATH = os.path.dirname(os.path.abspath(__file__))
+THIS_PATH = os.path.dirname(BENCH_PATH)
+sys.path.insert(0, THIS_PATH)
+
+import generators  # noqa: E402
+from bench_storage import peak_rss_kib  # noqa: E402
+
+RESULTS_PATH = os.path.join(BENCH_PATH, "results")
+SIZES = [1_000, 100_000, 1_000_000]
+# Zeitunterschiede darunter gelten beim Vergleich als Rauschen
+MIN_SECONDS = 0.01
+
+
+# --------------------------------------------------
+# Fälle: setup(rows, seed) baut die Eingaben und gibt die zu messende Funktion zurück
+# --------------------------------------------------
+def _parse_details(rows, seed):
+    from html_parsing import parse_company_details
+
+    _, pages = generators.crawler_pages(max(min(rows, 2000) // 20, 1), 20, seed)
+    pages = [pages[i % len(pages)] for i in range(rows)]
+    return lambda: [parse_company_details(html) for html in pages]
+
+
+def _extract_address(rows, seed):
+    from address_extraction import extract_address
+
+    links = generators.maps_links(rows, seed=seed)
+    return lambda: links.apply(extract_address)
+
+
+def _extract_addresses(rows, seed):
+    from address_extraction import extract_addresses
+
+    links = generators.maps_links(rows, seed=seed)
+    return lambda: extract_addresses(links)
+
+
+def _expand_rows(rows, seed):
+    from address_expansion import expand_rows
+
+    df = generators.geodata_table(rows, seed=seed)
+    return lambda: expand_rows(df)
+
+
+def _expand_addresses(rows, seed):
+    from address_expansion import expand_addresses
+
+    df = generators.geodata_table(rows, seed=seed)
+    return lambda: expand_addresses(df)
+
+
+def _assign_cluster(rows, seed):
+    from cluster_matching import assign_cluster
+
+    branches = generators.branches(rows, seed=seed)
+    # wie im alten Skript: kleinschreiben, dann Zeile für Zeile
+    return lambda: branches.fillna("").str.lower().apply(assign_cluster)
+
+
+def _classify_column(rows, seed):
+    from cluster_matching import ClusterMatcher, classify_column
+
+    branches = generators.branches(rows, seed=seed).astype("category")
+    matcher = ClusterMatcher()
+    return lambda: classify_column(branches, matcher)
+
+
+def _aggregate_area(rows, seed):
+    from area_aggregation import aggregate_area
+
+    df = generators.area_table(rows, seed)
+    return lambda: aggregate_area(df)
+
+
+def _area_store(rows, seed):
+    from area_aggregation import AreaStore
+
+    df = generators.area_table(rows, seed)
+    return lambda: AreaStore.from_frame(df).result()
+
+
+def _area_cube(rows, seed):
+    from area_cube import AreaCube
+
+    df = generators.area_table(rows, seed)
+    return lambda: AreaCube.build(df)
+
+
+# Name: (Stufe, setup, größte Zeilenzahl ohne --no-limits)
+CASES = {
+    "parse_company_details": ("crawl", _parse_details, 10_000),
+    "extract_address": ("geocode", _extract_address, None),
+    "extract_addresses": ("geocode", _extract_addresses, None),
+    "clean_and_expand_adresse": ("preprocess", _expand_rows, 100_000),
+    "expand_addresses": ("preprocess", _expand_addresses, None),
+    "assign_cluster": ("cluster", _assign_cluster, None),
+    "classify_column": ("cluster", _classify_column, None),
+    "aggregate_area": ("area", _aggregate_area, None),
+    "AreaStore.from_frame": ("area", _area_store, None),
+    "AreaCube.build": ("cube", _area_cube, None),
+}
+
+
+# --------------------------------------------------
+# Messung (im Kindprozess)
+# --------------------------------------------------
+def reset_peak_rss():
+    """Setzt VmHWM auf den aktuellen RSS zurück (Linux); False, wenn das nicht geht."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_kib():
+    with open("/proc/self/status", "r", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(case, rows, repeat, budget, seed=0):
+    """Baut die Eingaben und misst bis zu `repeat` Läufe, nach `budget` Sekunden keine weiteren."""
+    _, setup, _ = CASES[case]
+    run = setup(rows, seed)
+    gc.collect()
+    resettable = reset_peak_rss()
+    base = current_rss_kib() if resettable else peak_rss_kib()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+        del result
+        gc.collect()
+        if sum(times) > budget:
+            break
+    return {
+        "runs": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "per_row_us": min(times) / rows * 1e6,
+        "peak_mib": max(peak_rss_kib() - base, 0) / 1024,
+        # ohne clear_refs zählt die Spitze beim Erzeugen der Eingaben mit
+        "peak_exact": resettable,
+    }
+
+
+def measure_in_child(case, rows, repeat, budget):
+    args = [sys.executable, os.path.abspath(__file__), "--child", case, str(rows),
+            "--repeat", str(repeat), "--budget", str(budget)]
+    process = subprocess.run(args, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "Abbruch"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+# --------------------------------------------------
+# Ergebnisse speichern und vergleichen
+# --------------------------------------------------
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=THIS_PATH, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def default_output():
+    name = (git("rev-parse", "--short", "HEAD") or "ohne-git") + ("-dirty" if metadata()["dirty"] else "")
+    return os.path.join(RESULTS_PATH, f"{name}.json")
+
+
+def save_results(data, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def compare(old_path, new_path, threshold):
+    """Verhältnis neu/alt je gemeinsamer Messung; gibt die Anzahl der Verschlechterungen zurück."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    old_runs = {(r["case"], r["rows"]): r for r in old["results"] if "error" not in r}
+    print(f"alt: {old['meta']['commit']} ({old['meta']['date']})")
+    print(f"neu: {new['meta']['commit']} ({new['meta']['date']})\n")
+    print(f"{'Fall':<26} {'Zeilen':>9} {'Zeit alt':>10} {'Zeit neu':>10} {'neu/alt':>8} {'RSS neu/alt':>12}")
+
+    regressions = 0
+    for run in new["results"]:
+        before = old_runs.get((run["case"], run["rows"]))
+        if before is None or "error" in run:
+            continue
+        time_ratio = run["min_s"] / before["min_s"]
+        rss_ratio = (run["peak_mib"] + 1) / (before["peak_mib"] + 1)
+        slower = time_ratio > threshold and run["min_s"] - before["min_s"] > MIN_SECONDS
+        bigger = rss_ratio > threshold
+        regressions += slower or bigger
+        flag = " ❌" if slower or bigger else (" ✅" if time_ratio < 1 / threshold else "")
+        print(f"{run['case']:<26} {run['rows']:>9} {before['min_s']:>9.3f}s {run['min_s']:>9.3f}s "
+              f"{time_ratio:>7.2f}x {rss_ratio:>11.2f}x{flag}")
+    print(f"\n{regressions} Verschlechterungen über {threshold:.2f}x")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark-Suite über alle Stufen.")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), metavar="FALL", help=f"aus {list(CASES)}")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="Zeilenzahlen")
+    parser.add_argument("--repeat", type=int, default=3, help="Läufe je Messung (Minimum und Median)")
+    parser.add_argument("--budget", type=float, default=20.0, help="keine Wiederholung mehr nach so vielen Sekunden")
+    parser.add_argument("--no-limits", action="store_true", help="auch langsame Referenzen mit allen Zeilenzahlen")
+    parser.add_argument("--output", default=None, help="JSON-Datei (Standard: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("ALT", "NEU"), help="zwei Ergebnisdateien vergleichen")
+    parser.add_argument("--threshold", type=float, default=1.10, help="erlaubtes Verhältnis neu/alt beim Vergleich")
+    parser.add_argument("--child", nargs=2, metavar=("FALL", "ZEILEN"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        case, rows = args.child
+        print(json.dumps(measure(case, int(rows), args.repeat, args.budget)))
+        return
+    if args.compare:
+        if compare(*args.compare, args.threshold):
+            raise SystemExit(1)
+        return
+    unknown = [c for c in args.cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"Unbekannte Fälle {unknown}, möglich sind {list(CASES)}")
+
+    output = args.output or default_output()
+    results = []
+    for case in args.cases:
+        stage, _, limit = CASES[case]
+        for rows in args.sizes:
+            if limit and rows > limit and not args.no_limits:
+                print(f"⏭️  {case} mit {rows} Zeilen übersprungen (über {limit}, siehe --no-limits)")
+                continue
+            result = {"case": case, "stage": stage, "rows": rows, **measure_in_child(case, rows, args.repeat, args.budget)}
+            results.append(result)
+            if "error" in result:
+                print(f"❌ {case} mit {rows} Zeilen: {result['error']}")
+            else:
+                print(f"⏱️  {case:<26} {rows:>9} Zeilen {result['min_s']:9.3f} s "
+                      f"({result['per_row_us']:7.2f} µs/Zeile), RSS +{result['peak_mib']:7.1f} MiB")
+
+    save_results({"meta": metadata(), "repeat": args.repeat, "results": results}, output)
+    print(f"✅ Ergebnisse gespeichert unter: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Lokaler Ersatz-Server für das Adlershofer Firmenverzeichnis.
+
+Liefert deterministisch erzeugte Listen- und Detailseiten mit derselben
+Struktur wie www.adlershof.de, damit Crawler offline getestet und ihr
+Durchsatz gemessen werden kann. Optional wird pro Anfrage eine künstliche
+Latenz simuliert. Jede Antwort trägt ein ETag, auf passendes
+If-None-Match antwortet der Server mit 304. Mit `--max-rate` drosselt der
+Server wie ein echter Host (429 bzw. `--throttle-status 503` mit Retry-After).
+
+Start auf der Kommandozeile:
+    python benchmarks/fixture_server.py --port 8765 --pages 8 --per-page 20
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+from throttle import ServerThrottle
+
+LIST_PATH = "/firmensuche-institute/adressverzeichnis/firmen"
+PAGE_PARAM = "tx_sitepackage_company[companyPaginator][currentPage]"
+DETAIL_PREFIX = "/firmensuche-institute/adressverzeichnis/firmen/firma/"
+
+BRANCHES = [
+    "Photonik / Optik", "Laser", "Mikrosysteme / Materialien", "MEMS / Sensoren",
+    "IT / Medien", "Software", "IT-Dienstleistungen", "Biotechnologie",
+    "Medizintechnik", "Umweltanalytik / Schadstoffanalytik", "Unternehmensberatung",
+    "Gastronomie", "Handel / Dienstleistungen", "Luftfahrt / Raumfahrt",
+    "Erneuerbare Energien", "Wissenschaftliche Einrichtungen", "Kinderbetreuung",
+    "Fitness", "Logistik", "Elektronik / Elektrotechnik", "Immobilien",
+]
+STREETS = [
+    "Rudower Chaussee", "Max-Born-Straße", "Albert-Einstein-Straße",
+    "Volmerstraße", "Carl-Scheele-Straße", "Johann-Hittorf-Straße",
+    "Ernst-Augustin-Straße", "Wegedornstraße", "Newtonstraße",
+]
+HOUSE_NUMBERS = ["2", "4", "8", "12", "17", "29", "2 - 4", "16 und 18", "14/16", "73 A-E"]
+
+
+def page_path(page_num):
+    """Pfad einer Listenseite, wie ihn der Crawler anfragt."""
+    return (
+        LIST_PATH
+        + "?tx_sitepackage_company%5BcompanyPaginator%5D%5BcurrentPage%5D="
+        + str(page_num)
+    )
+
+
+class FixtureSite:
+    """Deterministisch erzeugtes Firmenverzeichnis mit `pages` Seiten."""
+
+    def __init__(self, pages=8, per_page=20, seed=0):
+        self.pages = pages
+        self.per_page = per_page
+        rng = random.Random(seed)
+        self.companies = []
+        for i in range(pages * per_page):
+            slug = f"firma-{i:05d}"
+            self.companies.append({
+                "slug": slug,
+                "name": f"Firma {i:05d} GmbH",
+                "branches": rng.sample(BRANCHES, rng.randint(0, 3)),
+                "address": f"{rng.choice(STREETS)} {rng.choice(HOUSE_NUMBERS)}, 12489 Berlin",
+            })
+        self.by_slug = {c["slug"]: c for c in self.companies}
+
+    def listing_html(self, page_num):
+        start = (page_num - 1) * self.per_page
+        items = "".join(
+            '<div class="company__item">'
+            f'<a class="headline company__title" href="{DETAIL_PREFIX}{c["slug"]}">{c["name"]}</a>'
+            '<p class="company__teaser">Lorem ipsum dolor sit amet.</p>'
+            "</div>"
+            for c in self.companies[start:start + self.per_page]
+        )
+        paginator = "".join(
+            f'<li><a class="page-link" href="{page_path(n)}">{n}</a></li>'
+            for n in range(1, self.pages + 1)
+        )
+        return (
+            "<!DOCTYPE html><html><head><title>Firmen</title></head><body>"
+            '<nav class="main">' + "<a href='/'>Start</a>" * 50 + "</nav>"
+            f'<div class="company__list">{items}</div>'
+            f'<ul class="pagination">{paginator}</ul>'
+            "<footer>" + "<p>Impressum</p>" * 50 + "</footer>"
+            "</body></html>"
+        )
+
+    def detail_html(self, slug):
+        c = self.by_slug[slug]
+        branches = ""
+        if c["branches"]:
+            branches = (
+                "<h2>Branchen</h2><ul class=\"bullets\">"
+                + "".join(f"<li>{b}</li>" for b in c["branches"])
+                + "</ul>"
+            )
+        maps = (
+            '<a class="google-maps" href="https://maps.google.com/maps?q='
+            f'{quote_plus(c["address"])}">Google Maps</a>'
+        )
+        return (
+            "<!DOCTYPE html><html><head><title>" + c["name"] + "</title></head><body>"
+            '<nav class="main">' + "<a href='/'>Start</a>" * 50 + "</nav>"
+            f"<h1>{c['name']}</h1><div class=\"text\">" + "<p>Beschreibung.</p>" * 20 + "</div>"
+            f"{branches}<h2>Kontakt</h2><ul class=\"bullets\"><li>Telefon</li></ul>{maps}"
+            "<footer>" + "<p>Impressum</p>" * 50 + "</footer>"
+            "</body></html>"
+        )
+
+
+def make_handler(site, latency=0.0, throttle=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if throttle is not None and not throttle.admit():
+                return throttle.reject(self)
+            parts = urlsplit(self.path)
+            body = None
+            if parts.path == LIST_PATH:
+                page = int(parse_qs(parts.query).get(PAGE_PARAM, ["1"])[0])
+                if 1 <= page <= site.pages:
+                    body = site.listing_html(page)
+            elif parts.path.startswith(DETAIL_PREFIX):
+                slug = parts.path[len(DETAIL_PREFIX):]
+                if slug in site.by_slug:
+                    body = site.detail_html(slug)
+
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = body.encode("utf-8")
+            etag = '"' + hashlib.md5(data).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FixtureServer:
+    """Startet den Ersatz-Server in einem Hintergrund-Thread (Context-Manager)."""
+
+    def __init__(self, site=None, latency=0.0, host="127.0.0.1", port=0, throttle=None):
+        self.site = site or FixtureSite()
+        self.throttle = throttle
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.site, latency, throttle))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--max-rate", type=float, default=None, help="Anfragen/s, darüber gedrosselt")
+    parser.add_argument("--throttle-status", type=int, default=429, choices=[429, 503])
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    throttle = ServerThrottle(args.max_rate, status=args.throttle_status, retry_after=args.retry_after) \
+        if args.max_rate else None
+    server = FixtureServer(FixtureSite(args.pages, args.per_page), args.latency, port=args.port, throttle=throttle)
+    print(f"Fixture-Server läuft unter {server.base_url}")
+    with server:
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
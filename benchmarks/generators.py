@@ -0,0 +1,328 @@
+"""
+Synthetische Eingaben für jede Stufe der Pipeline, im Schema der echten
+Dateien (für die Benchmarks, bench_suite.py und tests/).
+
+Alle Generatoren sind deterministisch (`seed`) und wiederholen Werte wie die
+echten Daten: `unique` verschiedene Werte auf `rows` Zeilen, standardmäßig
+einer je 20 Zeilen. Die Einzel-Benchmarks und die Tests nehmen ihre
+Eingaben von hier, damit alle dieselben Fälle abdecken:
+    from generators import branches, maps_links
+    links = maps_links(100_000)
+"""
+import json
+import os
+import random
+import sys
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from area_aggregation import STORE_COLUMNS  # noqa: E402
+from cluster_matching import cluster_keywords  # noqa: E402
+from fixture_server import FixtureSite  # noqa: E402
+
+
+# --------------------------------------------------
+# Google-Maps-Links (Adress-Extraktion)
+# --------------------------------------------------
+LINK_STREETS = ["Rudower Chaussee", "Volmerstraße", "Max-Born-Straße", "Albert-Einstein-Straße",
+                "Köpenicker Straße", "Groß-Berliner Damm", "Wegedornstraße", "Ernst-Ruska-Ufer", "Straße am Flugplatz",
+                "Kekuléstraße"]
+MAPS = "https://maps.google.com/maps"
+
+
+def make_link(rng, i):
+    address = f" {rng.choice(LINK_STREETS)} {rng.randint(1, 999)}, 12489 Berlin "
+    kind = i % 8
+    if kind == 0:
+        return f"{MAPS}?q={quote(address)}"
+    if kind == 1:
+        # doppelt kodiert: UTF-8-Bytes als cp1252 gelesen, dann prozentkodiert
+        return f"{MAPS}?q={quote(address.encode('utf-8').decode('cp1252', errors='replace'))}"
+    if kind == 2:
+        return f"{MAPS}?q={address.replace('ß', '&szlig;').replace('ö', '&ouml;')}&amp;hl=de"
+    if kind == 3:
+        return f"{MAPS}/place/{quote(address)}"
+    if kind == 4:
+        return f"{MAPS}?hl=de?q={address}"
+    if kind == 5:
+        # Mojibake direkt im Link, gemischt mit echtem Umlaut (Fallback-Pfad)
+        return f"{MAPS}?q={address.encode('utf-8').decode('cp1252', errors='replace')}ü"
+    if kind == 6:
+        return f"{MAPS}?q=%ZZ{quote(address, safe='')}%C3"
+    return f"{MAPS}?q={address}"
+
+
+def make_links(rows, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [make_link(rng, i) for i in range(unique)] + [None, float("nan")]
+    return pd.Series([rng.choice(pool) for _ in range(rows)], dtype=object)
+
+
+# --------------------------------------------------
+# Branchenzweige (Cluster-Zuordnung)
+# --------------------------------------------------
+BRANCHES = [
+    "Photonik / Optik", "Software", "IT / Medien", "Handel / Dienstleistungen", "Biotechnologie",
+    "Unternehmensberatung", "Mikrosysteme / MEMS / Sensoren", "Gastronomie", "Sport", "Materialien",
+    "Umwelttechnologie", "Allgemeine Dienstleistungen", "Luftfahrt / Raumfahrt", "Energiesysteme, Energieversorgung",
+    "Medizintechnik / Therapietechnik", "Kunst", "Wohnen", "Bildung", "Tiefgarage", "Hotels / Unterkünfte",
+]
+
+
+def fuzz_cases(keywords, n, seed=1):
+    rng = random.Random(seed)
+    alphabet = "abcdeilnorstuäöüß /-,"
+    cases = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(0, 5)):
+            if rng.random() < 0.7:
+                kw = rng.choice(keywords)
+                parts.append(kw[rng.randint(0, 3):len(kw) - rng.randint(0, 3)])
+            else:
+                parts.append("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))))
+        cases.append("".join(parts))
+    return cases
+
+
+def make_column(rows, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [", ".join(rng.sample(BRANCHES, rng.randint(1, 4))).lower() for _ in range(unique)] + [""]
+    return pd.Series([rng.choice(pool) for _ in range(rows)])
+
+
+# --------------------------------------------------
+# Adressen (Aufbereitung)
+# --------------------------------------------------
+STREETS = ["Rudower Chausee", "Volmerstraße", "Max-Born-Straße", "Albert-Einstein-Straße", "Kekuléstraße",
+           "Johann-Hittorf-Straße", "Carl-Scheele-Straße", "Ernst-Augustin-Straße", "Wegedornstraße"]
+FORMS = [
+    "12489 Berlin {s} {n}",
+    "{s} {n}, 12489 Berlin",
+    "{s} {n} - {m}",
+    "{s} {n}-{m}, 12489 Berlin",
+    "{s} {n} und {m}",
+    "{s} {n}/{m}",
+    "{s} {n} A-D",
+    "{s} {n}; {t} {m}",
+    "12489 Berlin ZPV, {s} {n}",
+    "12489 Berlin Haus 3, {s} {n}",
+    "12489 Berlin Firma GmbH, Eingang Süd",
+    "{s} {n} (Aufgang B)",
+    "{s} {n} / Ecke {t}",
+    "  {s} {n} OG 2, 12489 Berlin ",
+    "{s} {m} - {n}",
+]
+
+
+def make_companies(rows, unique, seed=0):
+    rng = random.Random(seed)
+    pool = []
+    for i in range(unique):
+        n = rng.randint(1, 60)
+        pool.append(FORMS[i % len(FORMS)].format(s=rng.choice(STREETS), t=rng.choice(STREETS), n=n, m=n + rng.randint(1, 4)))
+    pool.append(None)
+    np_rng = np.random.default_rng(seed)
+    lat = np_rng.uniform(52.42, 52.44, rows).round(7)
+    lat[::13] = np.nan
+    return pd.DataFrame({
+        "Nr.": np.arange(1, rows + 1),
+        "Name": [f"Firma {i}" for i in range(rows)],
+        "URL": [f"https://www.adlershof.de/firma/{i}" for i in range(rows)],
+        "Branchenzweig": [rng.choice(["Photonik / Optik", "Software", None]) for _ in range(rows)],
+        "Google Maps Link": "https://maps.google.com/maps?q=x",
+        "Adresse": [rng.choice(pool) for _ in range(rows)],
+        "Latitude": lat,
+        "Longitude": np_rng.uniform(13.5, 13.56, rows).round(7),
+    })
+
+
+# --------------------------------------------------
+# Aufgespaltene und verknüpfte Tabellen
+# --------------------------------------------------
+def make_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    companies = max(rows // 3, 1)
+    company = np.sort(rng.integers(0, companies, rows))
+    branches = np.array([", ".join(rng.choice(BRANCHES, rng.integers(1, 4), replace=False)) for _ in range(2000)])
+    clusters = np.array(["Büro", "Labor", "Produktion", "Lagerhalle", "Sonstiges", "Gastronomie"])
+    streets = np.array(STREETS)
+    lat = rng.uniform(52.42, 52.44, companies).round(7)
+    lat[::13] = np.nan
+    geschossfl = rng.uniform(100, 20000, companies).round(1)
+    return pd.DataFrame({
+        "Nr.": company + 1,
+        "Name": pd.Series(company).map("Firma {}".format),
+        "URL": pd.Series(company).map("https://www.adlershof.de/firma/{}".format),
+        "Branchenzweig": pd.Categorical(branches[rng.integers(0, len(branches), companies)][company]),
+        "Google Maps Link": "https://maps.google.com/maps?q=x",
+        "Adresse": pd.Series(streets[company % len(streets)]) + " " + pd.Series(rng.integers(1, 80, rows)).astype(str),
+        "Latitude": lat[company],
+        "Longitude": rng.uniform(13.5, 13.56, companies).round(7)[company],
+        "Cluster": pd.Categorical(clusters[rng.integers(0, len(clusters), companies)][company]),
+        "place_id": pd.Series(company // 4).map("DEBE{:08d}".format),
+        "Gebaeudegr": (geschossfl / 3).round(1)[company],
+        "Geschossfl": geschossfl[company],
+    })
+
+
+CLUSTERS = ["Büro", "Labor", "Produktion", "Lagerhalle", "Sonstiges", "Gastronomie", "Sporthalle"]
+
+
+def make_store_frame(rows, seed=0):
+    df = make_table(rows, seed)[STORE_COLUMNS]
+    rng = np.random.default_rng(seed)
+    df["Nr."] = df["Nr."].astype("float64")
+    for column, share in [("place_id", 0.05), ("Geschossfl", 0.03), ("Cluster", 0.01), ("Nr.", 0.001)]:
+        df.loc[rng.random(len(df)) < share, column] = np.nan
+    return df
+
+
+USES = ["Bürogebäude", "Laborgebäude", "Produktionshalle", "Lager", "Wohnhaus", "Hochschule", "Parkhaus"]
+
+
+def make_area_frame(rows, seed=0):
+    df = make_table(rows, seed)[["Nr.", "place_id", "Gebaeudegr", "Geschossfl", "Cluster"]]
+    rng = np.random.default_rng(seed)
+    building = df["place_id"].str[4:].astype(int).to_numpy()
+    df["mapular_le"] = np.array(USES, dtype=object)[building % len(USES)]
+    for column, share in [("place_id", 0.05), ("Geschossfl", 0.03), ("Cluster", 0.01), ("mapular_le", 0.02)]:
+        df.loc[rng.random(len(df)) < share, column] = np.nan
+    return df
+
+
+# --------------------------------------------------
+# Detailseiten (Parser)
+# --------------------------------------------------
+# Randfälle, bei denen sich Backends typischerweise unterscheiden würden
+EDGE_CASE_DETAILS = [
+    "<html><body><h2><span>Branchen</span></h2><ul class='bullets'><li>A &amp; B</li></ul></body></html>",
+    "<html><body><h2>Unsere Branchen</h2><div><ul class='x bullets'><li> <b>IT</b> / Medien </li>"
+    "<li><!-- kommentar -->Laser</li></ul></div><a class='google-maps' href='?q=a%20b'>x</a></body></html>",
+    "<html><body><h2>Kontakt</h2><ul class='bullets'><li>Tel</li></ul><h2>Branchen</h2></body></html>",
+    "<html><body><h2>\n<span>Branchen</span>\n</h2><ul class='bullets'><li>nicht gefunden</li></ul></body></html>",
+    "<html><body><h2><a href='#'><span><b>Branchen</b></span></a></h2><ul class='bullets'><li>tief</li></ul></body></html>",
+    "<html><body><h2><span>Bran</span>chen</h2><ul class='bullets'><li>geteilt</li></ul></body></html>",
+    "<html><body><h2><span>Branchen</span><span></span></h2><ul class='bullets'><li>zwei Kinder</li></ul></body></html>",
+    "<html><body><p>ohne alles</p></body></html>",
+]
+
+
+# --------------------------------------------------
+# Gebäude (Spatial Join)
+# --------------------------------------------------
+PLOT = 30.0  # Parzellengröße in Metern
+ORIGIN = (52.43, 13.53)  # Adlershof
+
+
+def to_lonlat(x, y):
+    lat = ORIGIN[0] + y / 110540.0
+    lon = ORIGIN[1] + x / (111320.0 * np.cos(np.radians(ORIGIN[0])))
+    return lon, lat
+
+
+def make_city(n_buildings, seed=0):
+    """Rechtecke (lokal in Metern) mit Mittelpunkt, Halbachsen und Drehwinkel."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_buildings)))
+    plot = np.arange(n_buildings)
+    cx = (plot % side + 0.5) * PLOT
+    cy = (plot // side + 0.5) * PLOT
+    half_w = rng.uniform(4, 10, n_buildings)
+    half_h = rng.uniform(4, 10, n_buildings)
+    angle = rng.uniform(-0.3, 0.3, n_buildings)
+    return cx, cy, half_w, half_h, angle
+
+
+def corners(cx, cy, half_w, half_h, angle):
+    local = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]], dtype=float)
+    cos, sin = np.cos(angle)[:, None], np.sin(angle)[:, None]
+    lx, ly = local[:, 0] * half_w[:, None], local[:, 1] * half_h[:, None]
+    return cx[:, None] + lx * cos - ly * sin, cy[:, None] + lx * sin + ly * cos
+
+
+def write_city_geojson(path, city):
+    xs, ys = corners(*city)
+    lon, lat = to_lonlat(xs, ys)
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"gml_id": f"B{i}", "Gebaeudegr": round(4 * city[2][i] * city[3][i], 1)},
+            "geometry": {"type": "Polygon", "coordinates": [np.column_stack([lon[i], lat[i]]).round(8).tolist()]},
+        }
+        for i in range(len(xs))
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+# --------------------------------------------------
+# Eingaben je Stufe
+# --------------------------------------------------
+# Branchen ohne Schlüsselwort (landen im Fallback-Cluster)
+UNMATCHED_BRANCHES = ["Photonik / Optik", "Software", "Mikrosysteme / MEMS / Sensoren", "Luftfahrt / Raumfahrt",
+                      "Umwelttechnologie", "Materialien", "Kunst"]
+
+
+def default_unique(rows):
+    return max(rows // 20, 10)
+
+
+def crawler_pages(pages, per_page=20, seed=0):
+    """(Listenseiten, Detailseiten) als HTML mit der Struktur von www.adlershof.de."""
+    site = FixtureSite(pages, per_page, seed)
+    listings = [site.listing_html(n) for n in range(1, pages + 1)]
+    details = [site.detail_html(c["slug"]) for c in site.companies]
+    return listings, details
+
+
+def maps_links(rows, unique=None, seed=0):
+    """Spalte `Google Maps Link`: sauber, prozent- und doppelt kodiert, Mojibake, HTML-Entities, fehlend."""
+    return make_links(rows, unique or default_unique(rows), seed)
+
+
+def geodata_table(rows, unique=None, seed=0):
+    """
+    Tabelle wie `adlershof_companies_geodata.csv`; `Adresse` in allen Formen der
+    Aufspaltung ("2 - 4", "16 und 18", "14/16", "73 A-D", ";"-Listen, Zusätze).
+    """
+    return make_companies(rows, unique or default_unique(rows), seed)
+
+
+def branches(rows, unique=None, seed=0):
+    """
+    Spalte `Branchenzweig`: ein bis drei Einträge je Firma, gezogen aus den
+    Schlüsselwörtern von cluster_rules.json (wie auf der Website geschrieben)
+    und aus Branchen ohne Treffer, dazu fehlende Werte.
+    """
+    rng = random.Random(seed)
+    keywords = [kw for words in cluster_keywords.values() for kw in words]
+    pool = []
+    for _ in range(unique or default_unique(rows)):
+        parts = []
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.3:
+                parts.append(rng.choice(UNMATCHED_BRANCHES))
+            else:
+                parts.append(" / ".join(w[:1].upper() + w[1:] for w in rng.choice(keywords).split(" / ")))
+        pool.append(", ".join(parts))
+    pool.append(None)
+    codes = np.random.default_rng(seed).integers(0, len(pool), rows)
+    return pd.Series(np.array(pool, dtype=object)[codes], name="Branchenzweig")
+
+
+def processed_table(rows, seed=0):
+    """Tabelle wie `adlershof_companies_processed.csv` (aufgespalten, mit Cluster und Gebäudedaten)."""
+    return make_table(rows, seed)
+
+
+def area_table(rows, seed=0):
+    """
+    Verknüpfte Firmentabelle wie `companies_Gebäudegrunddatensatz_vereinigt.csv`
+    (place_id, Geschossfl, Cluster, mapular_le, Gebaeudegr, mit Lücken).
+    """
+    return make_area_frame(rows, seed)
@@ -0,0 +1,123 @@
+"""
+Lokaler Ersatz für eine Nominatim-Instanz (nur /search mit format=json).
+
+Koordinaten werden deterministisch aus der Anfrage berechnet, Adressen mit
+"Nowhere" liefern keinen Treffer. Optional werden Latenz und ein Anteil
+zufälliger 503-Fehler simuliert, um Wiederholungen zu testen, und mit
+`--max-rate` eine Drosselung wie beim öffentlichen Server (429 mit Retry-After):
+    python benchmarks/nominatim_server.py --port 8766 --latency 0.05 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from throttle import ServerThrottle
+
+
+def expected_coordinates(query):
+    """Koordinaten, die der Ersatz-Server für `query` liefert (None = kein Treffer)."""
+    if "Nowhere" in query:
+        return None
+    digest = hashlib.sha1(query.encode("utf-8")).digest()
+    lat = 52.40 + digest[0] / 255 * 0.1
+    lon = 13.50 + digest[1] / 255 * 0.1
+    return round(lat, 7), round(lon, 7)
+
+
+def make_handler(server_state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with server_state["lock"]:
+                server_state["requests"] += 1
+            if server_state["latency"]:
+                time.sleep(server_state["latency"])
+            throttle = server_state["throttle"]
+            if throttle is not None and not throttle.admit():
+                return throttle.reject(self)
+            parts = urlsplit(self.path)
+            if parts.path != "/search":
+                return self._send(404, b"")
+            if server_state["rng"].random() < server_state["error_rate"]:
+                with server_state["lock"]:
+                    server_state["errors"] += 1
+                return self._send(503, b"Service Unavailable")
+
+            query = parse_qs(parts.query).get("q", [""])[0]
+            coords = expected_coordinates(query)
+            places = []
+            if coords:
+                places.append({
+                    "place_id": int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:8], 16),
+                    "lat": str(coords[0]),
+                    "lon": str(coords[1]),
+                    "display_name": query,
+                })
+            self._send(200, json.dumps(places).encode("utf-8"), "application/json")
+
+        def _send(self, status, body, content_type="text/plain"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class NominatimServer:
+    """Startet den Ersatz-Server in einem Hintergrund-Thread (Context-Manager)."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0, host="127.0.0.1", port=0, throttle=None):
+        self.state = {
+            "latency": latency,
+            "error_rate": error_rate,
+            "throttle": throttle,
+            "rng": random.Random(seed),
+            "lock": threading.Lock(),
+            "requests": 0,
+            "errors": 0,
+        }
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-rate", type=float, default=None, help="Anfragen/s, darüber gedrosselt")
+    parser.add_argument("--throttle-status", type=int, default=429, choices=[429, 503])
+    args = parser.parse_args()
+    throttle = ServerThrottle(args.max_rate, status=args.throttle_status) if args.max_rate else None
+    server = NominatimServer(args.latency, args.error_rate, port=args.port, throttle=throttle)
+    print(f"Nominatim-Ersatz läuft unter {server.url}")
+    with server:
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
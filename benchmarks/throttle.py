@@ -0,0 +1,53 @@
+"""
+Serverseitige Drosselung für die Ersatz-Server (fixture_server.py,
+nominatim_server.py): höchstens `rate` Anfragen pro Sekunde (Token-Bucket
+mit `burst`), darüber Antwort `status` (429 oder 503) mit Retry-After.
+"""
+import threading
+import time
+
+
+class ServerThrottle:
+    def __init__(self, rate, burst=None, status=429, retry_after=1):
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.status = status
+        self.retry_after = retry_after
+        # False: alles durchlassen (z.B. für einen Referenzlauf)
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Voller Bucket, Zähler auf 0 (z.B. zwischen zwei Messläufen)."""
+        with self.lock:
+            self.tokens = self.burst
+            self.updated = time.monotonic()
+            self.accepted = 0
+            self.rejected = 0
+
+    def admit(self):
+        """True, wenn die Anfrage bedient wird; sonst zählt sie als abgewiesen."""
+        if not self.enabled:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.accepted += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def reject(self, handler):
+        """Schickt die Drossel-Antwort über einen BaseHTTPRequestHandler."""
+        body = b"Too Many Requests" if self.status == 429 else b"Service Unavailable"
+        handler.send_response(self.status)
+        if self.retry_after is not None:
+            handler.send_header("Retry-After", str(self.retry_after))
+        handler.send_header("Content-Type", "text/plain")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
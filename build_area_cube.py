@@ -0,0 +1,87 @@
+"""
+Baut den Flächen-Würfel (Nutzfläche und Nutzeinheiten nach Cluster, place_id,
+mapular_le und Gebaeudegr, siehe area_cube.py) aus der verknüpften
+Firmentabelle, speichert ihn als `results/area_cube.npz` und exportiert
+`companies_area_and_units_per_cluster.csv` als eine Sicht darauf:
+    python build_area_cube.py
+    python build_area_cube.py --by mapular_le Cluster --view-output results/area_per_use_and_cluster.csv
+
+Weitere Sichten ohne Neuberechnung:
+    from area_cube import AreaCube
+    cube = AreaCube.load("results/area_cube.npz")
+    cube.query(["place_id", "Cluster"], where={"mapular_le": ["Bürogebäude"]})
+"""
+import argparse
+import os
+import time
+
+from area_cube import DIMENSIONS, AreaCube
+from site_profiles import PROFILE, RESULTS_PATH
+from table_storage import STORAGE, STORAGE_FORMATS, read_table, table_exists
+
+# wie get_area_per_type_of_use.py: Ergebnis des Spatial Joins vor dem manuellen GIS-Export
+joined_path = os.path.join(
+    RESULTS_PATH,
+    "companies_Gebäudegrunddatensatz_vereinigt.csv"
+)
+
+manual_export_path = PROFILE.area_export
+
+cube_path = os.path.join(
+    RESULTS_PATH,
+    "area_cube.npz"
+)
+
+per_cluster_path = os.path.join(
+    RESULTS_PATH,
+    "companies_area_and_units_per_cluster.csv"
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flächen-Würfel bauen und Sichten exportieren.")
+    parser.add_argument("--input", default=None,
+                        help="verknüpfte Firmentabelle (Standard: Spatial-Join-Ergebnis, sonst manueller Export)")
+    parser.add_argument("--storage", default=STORAGE, choices=STORAGE_FORMATS,
+                        help="Format des Spatial-Join-Ergebnisses (Standard: PIPELINE_STORAGE)")
+    parser.add_argument("--output", default=cube_path)
+    parser.add_argument("--per-cluster-output", default=per_cluster_path, help="leer = nicht exportieren")
+    parser.add_argument("--by", nargs="*", default=None, help="zusätzliche Sicht: Dimensionen der Gruppierung")
+    parser.add_argument("--view-output", default=None, help="CSV für die Sicht aus --by")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.input:
+        input_path, storage = args.input, "csv"
+    elif table_exists(joined_path, args.storage):
+        input_path, storage = joined_path, args.storage
+    elif manual_export_path:
+        input_path, storage = manual_export_path, "csv"
+    else:
+        raise SystemExit(f"Kein Join-Ergebnis unter {joined_path} und kein manueller Export für {PROFILE.name}")
+
+    df = read_table(input_path, columns=DIMENSIONS + ["Nr.", "Geschossfl"], storage=storage)
+    start = time.perf_counter()
+    cube = AreaCube.build(df)
+    print(f"🧊 Würfel aus {len(df)} Zeilen: {len(cube)} Zellen über {cube.dimensions} "
+          f"({time.perf_counter() - start:.2f} s)")
+    cube.save(args.output)
+    print("✅ Gespeichert unter:", args.output)
+
+    if args.per_cluster_output:
+        cube.export_per_cluster().to_csv(args.per_cluster_output, index=False)
+        print("✅ Nutzfläche und Nutzeinheiten je Cluster:", args.per_cluster_output)
+
+    if args.by is not None:
+        view = cube.query(args.by)
+        if args.view_output:
+            view.to_csv(args.view_output, index=False)
+            print(f"✅ Sicht nach {args.by}:", args.view_output)
+        else:
+            print(view.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Räumlicher Index über Gebäude (Grundrisse oder Schwerpunkte) in NumPy.
+
+Die Gebäude werden in ein metrisches Koordinatensystem gebracht (UTM bei
+EPSG:258xx/326xx, sonst eine lokale Abstandsprojektion um WGS84-Koordinaten)
+und ihre um `max_distance` vergrößerten Bounding-Boxen in ein gleichmäßiges
+Gitter einsortiert (CSR-Layout: Zellen-Schlüssel sortiert, Startoffsets per
+searchsorted). Abfragen laufen für alle Punkte gleichzeitig: Kandidatenpaare
+aus der Gitterzelle, dann Punkt-in-Polygon (Even-Odd über alle Kanten) und
+Abstand zur nächsten Kante. Enthaltende Gebäude gewinnen (bei Überlappung das
+kleinste), sonst das nächste innerhalb von `max_distance` Metern.
+"""
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Große Halbachse und Abplattung von GRS80 (ETRS89), für WGS84 praktisch identisch
+_A = 6378137.0
+_F = 1 / 298.257222101
+_UTM_CRS_RE = re.compile(r"^EPSG:(?:258|326)(\d{2})$")
+# innerste Klammerpaare einer WKT-Geometrie = einzelne Ringe
+_WKT_RING_RE = re.compile(r"\(([^()]+)\)")
+
+DEFAULT_CELL_SIZE = 100.0
+DEFAULT_MAX_DISTANCE = 30.0
+# Punkte je Abfrage-Block (begrenzt den Speicher für Kandidatenpaare)
+QUERY_CHUNK = 50_000
+
+
+def utm_forward(lat, lon, zone):
+    """WGS84/ETRS89 -> UTM (Krüger-Reihe, Genauigkeit im Millimeterbereich)."""
+    n = _F / (2 - _F)
+    big_a = _A / (1 + n) * (1 + n ** 2 / 4 + n ** 4 / 64)
+    alpha = (n / 2 - 2 * n ** 2 / 3 + 5 * n ** 3 / 16, 13 * n ** 2 / 48 - 3 * n ** 3 / 5, 61 * n ** 3 / 240)
+    phi = np.radians(lat)
+    dlam = np.radians(lon) - np.radians(zone * 6 - 183)
+    c = 2 * np.sqrt(n) / (1 + n)
+    t = np.sinh(np.arctanh(np.sin(phi)) - c * np.arctanh(c * np.sin(phi)))
+    xi = np.arctan2(t, np.cos(dlam))
+    eta = np.arctanh(np.sin(dlam) / np.sqrt(1 + t ** 2))
+    east, north = eta.copy(), xi.copy()
+    for j, a_j in enumerate(alpha, start=1):
+        east += a_j * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        north += a_j * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+    return 500000 + 0.9996 * big_a * east, 0.9996 * big_a * north
+
+
+class Projection:
+    """Bringt Längen-/Breitengrade in das metrische System der Gebäude."""
+
+    def __init__(self, crs="EPSG:4326", origin=None):
+        match = _UTM_CRS_RE.match(crs.upper())
+        self.zone = int(match.group(1)) if match else None
+        if self.zone is None and crs.upper() not in ("EPSG:4326", "WGS84"):
+            raise ValueError(f"Nicht unterstütztes Koordinatensystem: {crs}")
+        # lokale Abstandsprojektion (genügt auf Stadtebene)
+        self.origin = origin or (0.0, 0.0)
+        self._kx = 111320.0 * np.cos(np.radians(self.origin[0]))
+        self._ky = 110540.0
+
+    @property
+    def metric(self):
+        return self.zone is not None
+
+    def from_lonlat(self, lon, lat):
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        if self.metric:
+            return utm_forward(lat, lon, self.zone)
+        return (lon - self.origin[1]) * self._kx, (lat - self.origin[0]) * self._ky
+
+    def from_native(self, x, y):
+        """Koordinaten im System der Gebäude-Datei -> Meter."""
+        if self.metric:
+            return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        return self.from_lonlat(x, y)
+
+
+def parse_wkt_rings(wkt):
+    """'POLYGON ((x y, ...), (...))' / MULTIPOLYGON -> Liste von (k, 2)-Arrays."""
+    rings = []
+    for ring in _WKT_RING_RE.findall(str(wkt)):
+        coords = [point.split()[:2] for point in ring.split(",")]
+        rings.append(np.asarray(coords, dtype=float))
+    return rings
+
+
+def geojson_rings(geometry):
+    if geometry is None:
+        return []
+    kind, coords = geometry["type"], geometry["coordinates"]
+    if kind == "Point":
+        return [np.asarray([coords[:2]], dtype=float)]
+    if kind == "Polygon":
+        return [np.asarray(ring, dtype=float)[:, :2] for ring in coords]
+    if kind == "MultiPolygon":
+        return [np.asarray(ring, dtype=float)[:, :2] for polygon in coords for ring in polygon]
+    raise ValueError(f"Nicht unterstützter Geometrietyp: {kind}")
+
+
+class BuildingIndex:
+    """
+    Gitterindex über Gebäude-Geometrien.
+
+    `rings[i]` ist die Liste der Ringe (Arrays mit x/y im System `projection`)
+    des i-ten Gebäudes; ein einzelner Punkt steht für ein Gebäude, von dem nur
+    der Schwerpunkt bekannt ist.
+    """
+
+    def __init__(self, rings, projection, cell_size=DEFAULT_CELL_SIZE, max_distance=DEFAULT_MAX_DISTANCE):
+        self.projection = projection
+        self.cell_size = float(cell_size)
+        self.max_distance = float(max_distance)
+        self._build_edges(rings)
+        self._build_grid()
+
+    def __len__(self):
+        return len(self.edge_start) - 1
+
+    # --- Aufbau ---
+    def _build_edges(self, buildings):
+        buildings = [[ring for ring in building_rings if len(ring)] for building_rings in buildings]
+        rings = [ring for building_rings in buildings for ring in building_rings]
+        rings_per_building = np.array([len(building_rings) for building_rings in buildings], dtype=np.int64)
+        ring_building = np.repeat(np.arange(len(buildings)), rings_per_building)
+        ring_length = np.array([len(ring) for ring in rings], dtype=np.int64)
+        points = np.concatenate(rings) if rings else np.empty((0, 2))
+        x, y = self.projection.from_native(points[:, 0], points[:, 1])
+
+        # schließenden Punkt (gleich dem ersten) weglassen: Kante i verbindet Punkt i mit i+1
+        ring_first = np.cumsum(ring_length) - ring_length
+        ring_last = ring_first + ring_length - 1
+        closed = (ring_length > 1) & (x[ring_first] == x[ring_last]) & (y[ring_first] == y[ring_last])
+        keep = np.ones(len(x), dtype=bool)
+        keep[ring_last[closed]] = False
+        x, y = x[keep], y[keep]
+        ring_length = ring_length - closed
+        ring_first = np.cumsum(ring_length) - ring_length
+
+        point_ring = np.repeat(np.arange(len(ring_length)), ring_length)
+        following = np.arange(len(x)) + 1
+        following[ring_first + ring_length - 1] = ring_first  # letzter Punkt -> erster (ein Punkt: Kante der Länge 0)
+        self.x0, self.y0 = x, y
+        self.x1, self.y1 = x[following], y[following]
+
+        counts = np.bincount(ring_building, weights=ring_length, minlength=len(buildings)).astype(np.int64)
+        self.edge_start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        ring_area = 0.5 * np.bincount(point_ring, weights=x * self.y1 - self.x1 * y, minlength=len(ring_length))
+        self.area = np.abs(np.bincount(ring_building, weights=ring_area, minlength=len(buildings)))
+
+        has_edges = counts > 0
+        starts = self.edge_start[:-1][has_edges]
+        self.min_x = np.full(len(counts), np.nan)
+        self.min_y, self.max_x, self.max_y = self.min_x.copy(), self.min_x.copy(), self.min_x.copy()
+        if len(starts):
+            self.min_x[has_edges] = np.minimum.reduceat(self.x0, starts)
+            self.min_y[has_edges] = np.minimum.reduceat(self.y0, starts)
+            self.max_x[has_edges] = np.maximum.reduceat(self.x0, starts)
+            self.max_y[has_edges] = np.maximum.reduceat(self.y0, starts)
+
+    def _build_grid(self):
+        valid = np.flatnonzero(np.isfinite(self.min_x))
+        pad = self.max_distance
+        self.grid_x0 = float(np.min(self.min_x[valid]) - pad) if len(valid) else 0.0
+        self.grid_y0 = float(np.min(self.min_y[valid]) - pad) if len(valid) else 0.0
+        ix0, iy0 = self._cell(self.min_x[valid] - pad, self.min_y[valid] - pad)
+        ix1, iy1 = self._cell(self.max_x[valid] + pad, self.max_y[valid] + pad)
+        self.n_rows = int(iy1.max()) + 1 if len(valid) else 1
+
+        # jedes Gebäude in alle Zellen seiner vergrößerten Bounding-Box eintragen
+        width, height = ix1 - ix0 + 1, iy1 - iy0 + 1
+        per_building = width * height
+        building = np.repeat(valid, per_building)
+        local = np.arange(per_building.sum()) - np.repeat(np.cumsum(per_building) - per_building, per_building)
+        cell_x = np.repeat(ix0, per_building) + local // np.repeat(height, per_building)
+        cell_y = np.repeat(iy0, per_building) + local % np.repeat(height, per_building)
+        keys = cell_x * self.n_rows + cell_y
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys = keys[order]
+        self.cell_buildings = building[order]
+
+    def _cell(self, x, y):
+        ix = np.floor((np.asarray(x) - self.grid_x0) / self.cell_size).astype(np.int64)
+        iy = np.floor((np.asarray(y) - self.grid_y0) / self.cell_size).astype(np.int64)
+        return ix, iy
+
+    # --- Abfragen ---
+    def query_lonlat(self, lon, lat):
+        """Wie `query`, für Punkte in Längen-/Breitengraden."""
+        x, y = self.projection.from_lonlat(lon, lat)
+        return self.query(x, y)
+
+    def query(self, x, y):
+        """
+        Gebäude je Punkt (metrische Koordinaten).
+
+        Gibt (Gebäudeindex, Abstand in m) zurück; Index -1 für Punkte ohne
+        Gebäude innerhalb von `max_distance` (oder ohne Koordinaten), Abstand 0
+        für Punkte innerhalb eines Grundrisses.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        building = np.full(len(x), -1, dtype=np.int64)
+        distance = np.full(len(x), np.nan)
+        for start in range(0, len(x), QUERY_CHUNK):
+            chunk = slice(start, start + QUERY_CHUNK)
+            building[chunk], distance[chunk] = self._query_chunk(x[chunk], y[chunk])
+        return building, distance
+
+    def _query_chunk(self, x, y):
+        n = len(x)
+        building = np.full(n, -1, dtype=np.int64)
+        distance = np.full(n, np.nan)
+        points = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+        if not len(points) or not len(self.cell_keys):
+            return building, distance
+
+        # Kandidatenpaare (Punkt, Gebäude) aus der Gitterzelle jedes Punkts
+        ix, iy = self._cell(x[points], y[points])
+        inside_grid = (ix >= 0) & (iy >= 0) & (iy < self.n_rows)
+        keys = np.where(inside_grid, ix * self.n_rows + iy, -1)
+        lo = np.searchsorted(self.cell_keys, keys, side="left")
+        hi = np.searchsorted(self.cell_keys, keys, side="right")
+        per_point = np.where(inside_grid, hi - lo, 0)
+        pair_point = np.repeat(points, per_point)
+        offsets = np.arange(per_point.sum()) - np.repeat(np.cumsum(per_point) - per_point, per_point)
+        pair_building = self.cell_buildings[np.repeat(lo, per_point) + offsets]
+
+        px, py = x[pair_point], y[pair_point]
+        pad = self.max_distance
+        near = (
+            (px >= self.min_x[pair_building] - pad) & (px <= self.max_x[pair_building] + pad)
+            & (py >= self.min_y[pair_building] - pad) & (py <= self.max_y[pair_building] + pad)
+        )
+        pair_point, pair_building = pair_point[near], pair_building[near]
+        if not len(pair_point):
+            return building, distance
+
+        # alle Kanten der Kandidaten-Gebäude je Paar
+        edges_per_pair = self.edge_start[pair_building + 1] - self.edge_start[pair_building]
+        pair_starts = np.cumsum(edges_per_pair) - edges_per_pair
+        pair_of_edge = np.repeat(np.arange(len(pair_point)), edges_per_pair)
+        edge = np.repeat(self.edge_start[pair_building], edges_per_pair) + (
+            np.arange(edges_per_pair.sum()) - np.repeat(pair_starts, edges_per_pair)
+        )
+        ex = x[pair_point][pair_of_edge]
+        ey = y[pair_point][pair_of_edge]
+        x0, y0, x1, y1 = self.x0[edge], self.y0[edge], self.x1[edge], self.y1[edge]
+
+        # Even-Odd-Regel: Anzahl der Kanten, die der Strahl nach rechts schneidet
+        straddles = (y0 > ey) != (y1 > ey)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x0 + (ey - y0) * (x1 - x0) / (y1 - y0)
+        crossings = np.bincount(pair_of_edge, weights=straddles & (ex < x_cross), minlength=len(pair_point))
+        inside = crossings % 2 == 1
+
+        # Abstand zur nächsten Kante (Kanten der Länge 0 = Schwerpunkt)
+        dx, dy = x1 - x0, y1 - y0
+        length2 = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(length2 > 0, ((ex - x0) * dx + (ey - y0) * dy) / length2, 0.0), 0.0, 1.0)
+        edge_distance = np.hypot(ex - (x0 + t * dx), ey - (y0 + t * dy))
+        pair_distance = np.minimum.reduceat(edge_distance, pair_starts)
+        pair_distance[inside] = 0.0
+
+        # je Punkt: enthaltend vor nahe, dann kleinste Fläche, dann kleinster Abstand
+        candidate = inside | (pair_distance <= self.max_distance)
+        pair_point, pair_building = pair_point[candidate], pair_building[candidate]
+        rank = (~inside[candidate], np.where(inside[candidate], self.area[pair_building], 0.0), pair_distance[candidate])
+        order = np.lexsort((pair_building, rank[2], rank[1], rank[0], pair_point))
+        first = order[np.r_[True, pair_point[order][1:] != pair_point[order][:-1]]] if len(order) else order
+        building[pair_point[first]] = pair_building[first]
+        distance[pair_point[first]] = pair_distance[candidate][first]
+        return building, distance
+
+
+def load_buildings(path, crs="EPSG:4326", geometry_column=None, **index_options):
+    """
+    Lädt eine Gebäude-Datei (CSV mit WKT-Spalte oder Schwerpunkt-Spalten,
+    oder GeoJSON) und gibt (Attribute als DataFrame, BuildingIndex) zurück.
+    """
+    if path.lower().endswith((".geojson", ".json")):
+        with open(path, "r", encoding="utf-8") as f:
+            features = json.load(f)["features"]
+        attributes = pd.DataFrame([feature.get("properties") or {} for feature in features])
+        rings = [geojson_rings(feature.get("geometry")) for feature in features]
+    else:
+        attributes = pd.read_csv(path)
+        rings = _csv_rings(attributes, geometry_column)
+        attributes = attributes.drop(columns=[c for c in ("geometry", "WKT", geometry_column) if c in attributes])
+
+    projection = Projection(crs)
+    if not projection.metric:
+        # Bezugspunkt der lokalen Projektion: Mitte der Gebäude
+        points = np.concatenate([ring for building in rings for ring in building] or [np.zeros((1, 2))])
+        projection = Projection(crs, origin=(float(np.nanmean(points[:, 1])), float(np.nanmean(points[:, 0]))))
+    return attributes, BuildingIndex(rings, projection, **index_options)
+
+
+def _csv_rings(df, geometry_column=None):
+    column = geometry_column or next((c for c in ("geometry", "WKT", "wkt") if c in df.columns), None)
+    if column is not None:
+        return [parse_wkt_rings(wkt) if pd.notna(wkt) else [] for wkt in df[column]]
+    # nur Schwerpunkte
+    x_col = next((c for c in ("x", "lon", "Longitude", "longitude") if c in df.columns), None)
+    y_col = next((c for c in ("y", "lat", "Latitude", "latitude") if c in df.columns), None)
+    if x_col is None or y_col is None:
+        raise ValueError("Gebäude-Datei braucht eine WKT-Spalte 'geometry' oder Schwerpunkt-Spalten x/y bzw. lon/lat")
+    coords = df[[x_col, y_col]].to_numpy(dtype=float)
+    return [[coords[i:i + 1]] if np.isfinite(coords[i]).all() else [] for i in range(len(coords))]
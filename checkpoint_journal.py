@@ -0,0 +1,86 @@
+"""
+Append-only Checkpoint-Journal für lang laufende Stufen.
+
+Jeder Datensatz ist eine JSON-Zeile mit einem Schlüssel (z.B. die URL einer
+Firma) und beliebigen Werten. Geschrieben wird in einem Hintergrund-Thread,
+damit die Verarbeitungsschleife nie auf die Festplatte wartet. Beim Einlesen
+gewinnt je Schlüssel der zuletzt geschriebene Datensatz.
+"""
+import json
+import os
+import queue
+import threading
+
+_STOP = object()
+
+
+class CheckpointJournal:
+    def __init__(self, path, sync_every=100):
+        """`sync_every`: spätestens nach so vielen Datensätzen wird fsync aufgerufen."""
+        self.path = path
+        self.sync_every = sync_every
+        self.written = 0
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="checkpoint-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, key, **values):
+        """Reiht einen Datensatz zum Schreiben ein (blockiert nicht)."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put(dict(values, key=key))
+
+    def _run(self):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                unsynced = 0
+                while True:
+                    record = self._queue.get()
+                    if record is not _STOP:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        self.written += 1
+                        unsynced += 1
+                    # bei leerer Warteschlange oder nach `sync_every` Datensätzen sichern
+                    if unsynced and (record is _STOP or self._queue.empty() or unsynced >= self.sync_every):
+                        f.flush()
+                        os.fsync(f.fileno())
+                        unsynced = 0
+                    if record is _STOP:
+                        return
+        except Exception as e:  # wird beim nächsten append/close gemeldet
+            self._error = e
+
+    def close(self):
+        """Schreibt alle ausstehenden Datensätze und beendet den Writer-Thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def discard(self):
+        """Löscht das Journal, nachdem sein Inhalt dauerhaft übernommen wurde."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_journal(path):
+    """Liest ein Journal in O(n) als {Schlüssel: letzter Datensatz}."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # unvollständige letzte Zeile nach Absturz
+                continue
+            records[record.pop("key")] = record
+    return records
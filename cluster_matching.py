@@ -0,0 +1,252 @@
+"""
+Zuordnung von Firmen zu Clustern anhand ihres Branchenzweigs.
+
+Die Regeln stehen in `cluster_rules.json`: Cluster mit ihren Schlüsselwörtern
+(`cluster_keywords`), der Fallback-Cluster und händische Overrides je Name.
+Der erste Cluster (in Datei-Reihenfolge), von dem ein Schlüsselwort im Text
+vorkommt, gewinnt, sonst "Sonstiges". `assign_cluster` ist die zeilenweise
+Referenz. `ClusterMatcher` kompiliert alle Schlüsselwörter einmal in einen
+Regex und klassifiziert eine ganze Spalte mit einem einzigen
+Regex-Durchlauf über alle Texte (siehe `ClusterMatcher.classify`);
+`classify_column` macht das nur für die verschiedenen Werte einer Spalte.
+
+Zwischen Läufen merkt sich `ClusterMemo` Branchenzweig -> Cluster. Ändern
+sich die Regeln, verwirft der Memo nur die Werte, deren Ergebnis sich
+ändern kann.
+"""
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+FALLBACK_CLUSTER = "Sonstiges"
+# Trennzeichen zwischen den Texten beim Durchlauf über die ganze Spalte
+_SEPARATOR = "\x00"
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cluster_rules.json")
+
+
+# --------------------------------------------------
+# Regeln (Priorität von oben nach unten!)
+# --------------------------------------------------
+def load_cluster_rules(path=RULES_PATH):
+    """
+    Liest eine Regeldatei:
+    {"fallback": ..., "clusters": {Cluster: [Schlüsselwörter]}, "overrides": {Name: Cluster}}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    rules.setdefault("fallback", FALLBACK_CLUSTER)
+    rules.setdefault("overrides", {})
+    return rules
+
+
+cluster_keywords = load_cluster_rules()["clusters"]
+
+
+def rules_hash(cluster_keywords, fallback=FALLBACK_CLUSTER):
+    """Inhalts-Hash der Regeln, die das Ergebnis bestimmen (ohne Overrides)."""
+    content = json.dumps([fallback, list(cluster_keywords.items())], ensure_ascii=False)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def keyword_clusters(cluster_keywords):
+    """{Schlüsselwort: Cluster}; bei Dubletten zählt wie in `assign_cluster` das erste Vorkommen."""
+    clusters = {}
+    for cluster, keywords in cluster_keywords.items():
+        for kw in keywords:
+            clusters.setdefault(kw, cluster)
+    return clusters
+
+
+def changed_keywords(old_keywords, new_keywords, old_fallback=FALLBACK_CLUSTER, new_fallback=FALLBACK_CLUSTER):
+    """
+    Schlüsselwörter, die neu sind, wegfallen oder den Cluster wechseln. Ein Text
+    ohne eines davon behält seinen Cluster: er enthält dieselben Schlüsselwörter
+    mit denselben Clustern. Nur wenn sich der Fallback oder die Reihenfolge
+    gemeinsamer Cluster ändert, kann sich alles ändern (Rückgabe None).
+    """
+    if old_fallback != new_fallback:
+        return None
+    if [c for c in old_keywords if c in new_keywords] != [c for c in new_keywords if c in old_keywords]:
+        return None
+    old, new = keyword_clusters(old_keywords), keyword_clusters(new_keywords)
+    return {kw for kw in old.keys() | new.keys() if old.get(kw) != new.get(kw)}
+
+
+
+# --------------------------------------------------
+# Zeilenweise Referenz
+# --------------------------------------------------
+def assign_cluster(text, cluster_keywords=cluster_keywords, fallback=FALLBACK_CLUSTER):
+    for cluster, keywords in cluster_keywords.items():
+        for kw in keywords:
+            if kw in text:
+                return cluster
+    return fallback
+
+
+# --------------------------------------------------
+# Kompilierter Matcher
+# --------------------------------------------------
+def _lookahead_pattern(words):
+    """
+    Regex `(?=(w1|w2|...))`, der an jeder Position das erste dort beginnende
+    Wort aus `words` liefert. Die Wörter sind nach dem ersten Zeichen
+    gruppiert (an einer Position passt nur eine Gruppe), innerhalb der Gruppe
+    bleibt die Reihenfolge von `words` erhalten.
+    """
+    groups = {}
+    for word in words:
+        groups.setdefault(word[0], []).append(re.escape(word[1:]))
+    branches = [re.escape(char) + "(?:" + "|".join(rests) + ")" for char, rests in groups.items()]
+    return re.compile("(?=(" + "|".join(branches) + "))")
+
+
+class ClusterMatcher:
+    """
+    Kompilierte Form von `cluster_keywords` mit derselben Prioritäts-Semantik
+    wie `assign_cluster`.
+
+    Ein Lookahead `(?=(kw1|kw2|...))` mit den Schlüsselwörtern nach Priorität
+    findet in einem Durchlauf über alle Texte an jeder Position das beste dort
+    beginnende Schlüsselwort. Das Minimum der Prioritäten über alle Positionen
+    eines Textes ist die beste Priorität aller Schlüsselwörter, die er
+    enthält, also genau der Cluster von `assign_cluster`.
+    """
+
+    def __init__(self, cluster_keywords=cluster_keywords, fallback=FALLBACK_CLUSTER):
+        self.cluster_keywords = cluster_keywords
+        self.fallback = fallback
+        self.clusters = list(cluster_keywords) + [fallback]
+        priority = {}
+        for rank, keywords in enumerate(cluster_keywords.values()):
+            for kw in keywords:
+                if not kw or _SEPARATOR in kw:
+                    raise ValueError(f"Ungültiges Schlüsselwort: {kw!r}")
+                priority.setdefault(kw, rank)
+        self.priority = priority
+        # Trennzeichen zuerst, dann nach Priorität (sorted ist stabil: Datei-Reihenfolge je Cluster)
+        words = [_SEPARATOR] + sorted(priority, key=priority.get)
+        self.pattern = _lookahead_pattern(words)
+
+    def assign(self, text):
+        """Cluster für einen einzelnen Text."""
+        return self.classify([text]).iloc[0]
+
+    def classify(self, texts):
+        """
+        Cluster für eine ganze Spalte (Series oder Liste von Strings), in einem
+        Regex-Durchlauf über alle Texte. Gibt eine Series (gleicher Index bei
+        einer Series) zurück.
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        texts = texts.tolist() if isinstance(texts, pd.Series) else list(texts)
+        n = len(texts)
+        none = len(self.clusters) - 1
+        joined = _SEPARATOR.join(texts)
+
+        if joined.count(_SEPARATOR) != max(n - 1, 0):
+            # Trennzeichen kommt in den Daten vor: Zeile für Zeile
+            clusters = [assign_cluster(t, self.cluster_keywords, self.fallback) for t in texts]
+        else:
+            result = np.full(n, none, dtype=np.int64)
+            tokens = self.pattern.findall(joined)
+            if tokens:
+                codes, uniques = pd.factorize(pd.Series(tokens, dtype=object))
+                # Trennzeichen zählen die Zeile weiter, Treffer tragen ihre Priorität bei
+                is_separator = uniques == _SEPARATOR
+                token_ranks = np.array([none if sep else self.priority[t] for t, sep in zip(uniques, is_separator)])
+                separator_token = np.asarray(is_separator)[codes]
+                row = np.cumsum(separator_token)[~separator_token]
+                np.minimum.at(result, row, token_ranks[codes[~separator_token]])
+            clusters = np.asarray(self.clusters, dtype=object)[result]
+
+        # gleicher Spaltentyp wie bei `Series.apply(assign_cluster)`
+        return pd.Series(clusters, index=index, dtype=object).infer_objects()
+
+
+class ClusterMemo:
+    """
+    Branchenzweig (kleingeschrieben) -> Cluster, als JSON-Datei zwischen Läufen
+    gemerkt, zusammen mit den Regeln, unter denen die Werte entstanden sind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.values = {}
+        self.rules = None
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.values = data["values"]
+            self.rules = data["rules"]
+
+    def update_rules(self, cluster_keywords, fallback=FALLBACK_CLUSTER):
+        """
+        Stellt den Memo auf neue Regeln um und verwirft dabei nur die Werte, deren
+        Cluster sich ändern kann. Gibt die Anzahl verworfener Werte zurück.
+        """
+        key = rules_hash(cluster_keywords, fallback)
+        if self.rules is not None and self.rules["hash"] == key:
+            return 0
+        changed = None
+        if self.rules is not None:
+            changed = changed_keywords(self.rules["clusters"], cluster_keywords, self.rules["fallback"], fallback)
+        if changed is None:
+            stale = list(self.values)
+        elif changed:
+            pattern = re.compile("|".join(re.escape(kw) for kw in sorted(changed)))
+            stale = [text for text in self.values if pattern.search(text)]
+        else:
+            stale = []
+        for text in stale:
+            del self.values[text]
+        self.rules = {"hash": key, "fallback": fallback, "clusters": cluster_keywords}
+        self.dirty = True
+        return len(stale)
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rules": self.rules, "values": self.values}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def classify_column(branches, matcher, memo=None):
+    """
+    Cluster je Zeile als Categorical. Klassifiziert (und kleingeschrieben)
+    wird jeder verschiedene Branchenzweig nur einmal; fehlende Werte zählen
+    wie bisher als leerer Text. Mit `memo` (auf die Regeln von `matcher`
+    umgestellt, siehe `ClusterMemo.update_rules`) werden nur Werte
+    klassifiziert, die der Memo noch nicht kennt.
+    """
+    codes, uniques = pd.factorize(branches)
+    # angehängter leerer Text: Code -1 (fehlender Wert) zeigt auf den letzten Eintrag
+    normalized = pd.Series(uniques, dtype=object).str.lower().fillna("").tolist() + [""]
+    if memo is None:
+        clusters = matcher.classify(normalized).tolist()
+    else:
+        known = memo.values
+        missing = list(dict.fromkeys(text for text in normalized if text not in known))
+        if missing:
+            known.update(zip(missing, matcher.classify(missing).tolist()))
+            memo.dirty = True
+        memo.hits += len(normalized) - len(missing)
+        memo.misses += len(missing)
+        clusters = [known[text] for text in normalized]
+
+    categories = pd.Index(matcher.clusters)
+    unique_codes = categories.get_indexer(clusters)
+    if (unique_codes < 0).any():
+        raise ValueError("Memo enthält Cluster, die es in den Regeln nicht gibt (update_rules vergessen?)")
+    return pd.Categorical.from_codes(unique_codes[codes], categories=categories)
@@ -1,112 +1,488 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import csv
 import os
+import re
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 
-BASE_URL = "https://www.adlershof.de"
-PAGE_URL_TEMPLATE = BASE_URL + "/firmensuche-institute/adressverzeichnis/firmen?tx_sitepackage_company%5BcompanyPaginator%5D%5BcurrentPage%5D={}"
+from crawl_state import CrawlState, CsvAppender
+import html_parsing
+import metrics
+from html_archive import HtmlArchive, read_entry
+from http_cache import HttpCache, DEFAULT_TTL
+from rate_control import AdaptiveRateLimiter, RateControlledHttp, RateStore
+from site_profiles import OUTPUT_PREFIX, PROFILE, RESULTS_PATH
 
-CSV_FILENAME = os.path.join("results", "adlershof_companies.csv")
+# Verzeichnis, Selektoren und Ratenbudget des Standorts (PIPELINE_SITE, siehe site_profiles.py)
+BASE_URL = PROFILE.base_url
+PAGE_PATH_TEMPLATE = PROFILE.page_path_template
+PAGE_URL_TEMPLATE = BASE_URL + PAGE_PATH_TEMPLATE
+# Seitenzahlen in den Links des Paginators (kodiert oder unkodiert)
+PAGINATOR_RE = re.compile(PROFILE.paginator_pattern)
+SELECTORS = PROFILE.selectors
+
+# wie die übrigen Stufen relativ zum Projektordner (auch beim Import aus pipeline.py)
+CSV_FILENAME = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies.csv")
+# Ergebnis von --from-archive, wenn das Archiv nicht alle Firmen abdeckt
+ARCHIVE_CSV_FILENAME = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies.from_archive.csv")
+HTTP_CACHE_FILENAME = os.path.join(RESULTS_PATH, "http_cache.sqlite")
+HTML_ARCHIVE_PATH = os.path.join(RESULTS_PATH, "html_archive")
+STATE_FILENAME = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies.state.json")
+# gelernte Anfrageraten je Host (siehe rate_control.py), gemeinsam mit dem Geocoder
+RATE_STORE_FILENAME = os.path.join(RESULTS_PATH, "rate_limits.json")
+CSV_FIELDS = ["Nr.", "Name", "URL", "Branchenzweig", "Google Maps Link"]
 HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+# Wartezeit pro Detailseite im sequentiellen Modus (Sekunden), zugleich Startrate
+# der adaptiven Ratenbegrenzung (1 / REQUEST_DELAY Anfragen pro Sekunde)
+REQUEST_DELAY = PROFILE.request_delay
+# harte Obergrenze der adaptiven Rate (Anfragen pro Sekunde, alle Seiten des Hosts)
+MAX_REQUEST_RATE = PROFILE.max_request_rate
+# Maximale Anzahl gleichzeitiger Anfragen im asyncio-Modus
+DEFAULT_CONCURRENCY = PROFILE.concurrency
+REQUEST_TIMEOUT = 30
+# Parser-Backend aus html_parsing ("auto", "strainer", "lxml", "bs4")
+PARSER_BACKEND = "auto"
+
+# Persistenter Antwort-Cache, Seitenarchiv und Ratenbegrenzung (werden in main() gesetzt, None = aus)
+http_cache = None
+html_archive = None
+rate_limiter = None
+
 
-def get_existing_names():
-    """Liest bestehende Namen aus der CSV-Datei."""
+def get_existing_urls():
+    """
+    Liest bestehende Detail-URLs und die höchste vergebene Nr. aus der CSV-Datei.
+
+    Die URL ist der stabile Schlüssel einer Firma – eine Umbenennung führt
+    so nicht zu einem erneuten Abruf.
+    """
+    urls = set()
+    last_nr = 0
     if not os.path.exists(CSV_FILENAME):
-        return set()
+        return urls, last_nr
 
     with open(CSV_FILENAME, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return set(row["Name"] for row in reader)
+        for row in csv.DictReader(f):
+            urls.add(row["URL"])
+            if row.get("Nr.", "").isdigit():
+                last_nr = max(last_nr, int(row["Nr."]))
+    return urls, last_nr
 
 
-def get_company_links_from_page(page_num):
-    """Extrahiert alle Firmen auf einer bestimmten Seite."""
+def read_rows(path=None):
+    """Alle Zeilen der CSV-Datei in Datei-Reihenfolge (leer, wenn es sie noch nicht gibt)."""
+    path = path or CSV_FILENAME
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def create_session(pool_size=DEFAULT_CONCURRENCY):
+    """Erzeugt eine Session mit Keep-Alive-Verbindungspool."""
+    # requests erst hier laden: Import des Moduls (pipeline.py, --from-archive) braucht es nicht
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_html(url, session=None, delay=0):
+    """
+    Lädt eine Seite und gibt den HTML-Text zurück.
+
+    Ist ein `http_cache` gesetzt, wird die Seite von dort geliefert bzw. bedingt
+    revalidiert. Ist ein `rate_limiter` gesetzt, laufen alle Anfragen über ihn
+    (429/503 werden wiederholt) und `delay` entfällt, sonst wird `delay` nur
+    abgewartet, wenn wirklich angefragt wird.
+    Ist ein `html_archive` gesetzt, landet jede (geänderte) Seite im Archiv.
+    """
+    http = session
+    if http is None:
+        import requests
+
+        http = requests
+    # mit PIPELINE_METRICS: Latenz je Anfrage und Wartezeit (sonst unverändert)
+    http = metrics.instrument_http(http, "crawler")
+
+    def wait():
+        with metrics.timer("rate_limit_wait_seconds", target="crawler", reason="pacing"):
+            time.sleep(delay)
+
+    wait = wait if delay else None
+    if rate_limiter is not None:
+        http = RateControlledHttp(http, rate_limiter)
+        wait = None
+    if http_cache is not None:
+        html = http_cache.get(http, url, headers=HEADERS, timeout=REQUEST_TIMEOUT,
+                              before_request=wait)
+    else:
+        if wait:
+            wait()
+        html = http.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT).text
+    if html_archive is not None:
+        html_archive.add(url, html)
+    return html
+
+
+def parse_company_links(html, base_url=BASE_URL):
+    """Extrahiert Name und Detail-URL aller Firmen aus einer Listenseite."""
+    return html_parsing.parse_company_links(html, base_url, PARSER_BACKEND, SELECTORS)
+
+
+def parse_page_count(html):
+    """Ermittelt die Seitenzahl aus den Links des Paginators (mindestens 1)."""
+    return max((int(n) for n in PAGINATOR_RE.findall(html)), default=1)
+
+
+def parse_company_details(html, backend=None, selectors=None):
+    """Extrahiert Branchen und Google-Maps-Link aus einer Detailseite."""
+    return html_parsing.parse_company_details(html, backend or PARSER_BACKEND, selectors or SELECTORS)
+
+
+def fetch_company_links(page_num, session=None, base_url=BASE_URL):
+    """Lädt eine Listenseite und gibt (Name, URL) aller Firmen sowie die Seitenzahl zurück."""
+    url = base_url + PAGE_PATH_TEMPLATE.format(page_num)
+    html = fetch_html(url, session)
+    return parse_company_links(html, base_url), parse_page_count(html)
+
+
+def get_company_links_and_page_count(page_num, session=None, base_url=BASE_URL):
+    """Extrahiert alle Firmen auf einer bestimmten Seite und die Seitenzahl aus dem Paginator."""
     print(f"\n🔎 Durchsuche Seite {page_num}...")
-    url = PAGE_URL_TEMPLATE.format(page_num)
-    response = requests.get(url, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
-    company_divs = soup.select("div.company__item")
-    companies = []
+    return fetch_company_links(page_num, session, base_url)
 
-    for div in company_divs:
-        name_tag = div.select_one("a.headline.company__title")
-        if not name_tag:
-            continue
-        name = name_tag.get_text(strip=True)
-        href = name_tag.get("href")
-        full_url = BASE_URL + href
-        companies.append((name, full_url))
 
-    return companies
+def get_company_links_from_page(page_num, session=None, base_url=BASE_URL):
+    """Extrahiert alle Firmen auf einer bestimmten Seite."""
+    return get_company_links_and_page_count(page_num, session, base_url)[0]
 
 
-def get_company_details(company_url):
+def get_company_details(company_url, session=None, delay=REQUEST_DELAY):
     """Besucht die Detailseite und extrahiert Branchen und Google-Maps-Link."""
-    time.sleep(1)
-    response = requests.get(company_url, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # Branchen extrahieren
-    h2 = soup.find("h2", string=lambda s: s and "Branchen" in s)
-    branches = []
-    if h2:
-        ul = h2.find_next("ul", class_="bullets")
-        if ul:
-            branches = [li.get_text(strip=True) for li in ul.find_all("li")]
-
-    # Google Maps Link extrahieren
-    maps_tag = soup.find("a", class_="google-maps")
-    maps_link = maps_tag["href"] if maps_tag else ""
-    # Adresse extrahieren
-    address = 1
-
-    return branches, maps_link
-
-
-def append_to_csv(rows):
-    """Speichert neue Zeilen in die bestehende oder neue CSV."""
-    file_exists = os.path.exists(CSV_FILENAME)
-    with open(CSV_FILENAME, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["Nr.", "Name", "URL", "Branchenzweig", "Google Maps Link"])
-        if not file_exists:
-            writer.writeheader()
+    return parse_company_details(fetch_html(company_url, session, delay))
+
+
+def build_row(nr, name, url, branches, maps_link):
+    """Baut eine CSV-Zeile für eine Firma."""
+    return {
+        "Nr.": nr,
+        "Name": name,
+        "URL": url,
+        "Branchenzweig": ", ".join(branches),
+        "Google Maps Link": maps_link
+    }
+
+
+def write_csv(rows, path=None):
+    """Schreibt die CSV komplett neu (atomar über eine temporäre Datei)."""
+    path = path or CSV_FILENAME
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp_path, path)
 
 
-def main():
-    existing_names = get_existing_names()
-    all_new_rows = []
-    next_id = len(existing_names) + 1
+def crawl_sequential(existing_urls, next_id, emit, state=None, base_url=BASE_URL,
+                     delay=REQUEST_DELAY):
+    """
+    Crawlt alle Seiten nacheinander und übergibt jede neue Zeile sofort an `emit`.
 
-    for page in range(1, 9):  # Seiten 1 bis 8
-        companies = get_company_links_from_page(page)
+    Die Seitenzahl wird aus dem Paginator ermittelt. Bereits fertige Seiten
+    aus `state` werden übersprungen. Gibt die nächste freie Nr. zurück.
+    """
+    state = state or CrawlState()
+    page = 1
+    while state.page_count is None or page <= state.page_count:
+        if page in state.pages_done:
+            print(f"⏭️  Seite {page} bereits vollständig – übersprungen.")
+            page += 1
+            continue
+
+        companies, page_count = get_company_links_and_page_count(page, base_url=base_url)
+        state.set_page_count(max(page_count, page))
         for name, url in companies:
-            if name in existing_names:
+            if url in existing_urls:
                 print(f"⏭️  {name} bereits vorhanden – übersprungen.")
                 continue
 
             print(f"➡️  Verarbeite {name}")
-            branches, maps_link = get_company_details(url)
-            branch_string = ", ".join(branches)
-            all_new_rows.append({
-                "Nr.": next_id,
-                "Name": name,
-                "URL": url,
-                "Branchenzweig": branch_string,
-                "Google Maps Link": maps_link
-            })
+            branches, maps_link = get_company_details(url, delay=delay)
+            emit(build_row(next_id, name, url, branches, maps_link))
+            existing_urls.add(url)
             next_id += 1
 
-    if all_new_rows:
-        append_to_csv(all_new_rows)
-        print(f"\n✅ {len(all_new_rows)} neue Einträge wurden zur CSV hinzugefügt.")
+        state.mark_page_done(page)
+        page += 1
+
+    return next_id
+
+
+async def crawl_async(existing_urls, next_id, emit, state=None, base_url=BASE_URL,
+                      concurrency=DEFAULT_CONCURRENCY):
+    """
+    Crawlt Listen- und Detailseiten nebenläufig über eine gemeinsame Session.
+
+    Höchstens `concurrency` Anfragen sind gleichzeitig unterwegs. Fertige
+    Zeilen werden in derselben Reihenfolge (und mit denselben Nummern) wie bei
+    `crawl_sequential` an `emit` übergeben; gepuffert werden dabei nur die
+    Detailseiten im aktuellen Fenster. Gibt die nächste freie Nr. zurück.
+    """
+    state = state or CrawlState()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    session = create_session(concurrency)
+
+    with session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run(func, *args):
+            async with semaphore:
+                return await loop.run_in_executor(executor, func, *args)
+
+        # 1) Seitenzahl ermitteln, dann alle offenen Listenseiten gleichzeitig laden
+        listings = {}
+        if state.page_count is None:
+            print("\n🔎 Durchsuche Seite 1...")
+            listings[1], page_count = await run(fetch_company_links, 1, session, base_url)
+            state.set_page_count(page_count)
+        open_pages = [
+            page for page in range(1, state.page_count + 1)
+            if page not in state.pages_done and page not in listings
+        ]
+        for page in open_pages:
+            print(f"\n🔎 Durchsuche Seite {page}...")
+        for page, (companies, _) in zip(open_pages, await asyncio.gather(*(
+            run(fetch_company_links, page, session, base_url) for page in open_pages
+        ))):
+            listings[page] = companies
+
+        # 2) Detailseiten in einem gleitenden Fenster laden, in Reihenfolge schreiben
+        async def details(name, url):
+            result = await run(get_company_details, url, session, 0)
+            print(f"➡️  Verarbeite {name}")
+            return result
+
+        window = deque()
+
+        async def flush_head():
+            nonlocal next_id
+            page, name, url, task = window.popleft()
+            if task is None:
+                # Seitenende-Marker: alle Firmen der Seite sind geschrieben
+                state.mark_page_done(page)
+                return
+            branches, maps_link = await task
+            emit(build_row(next_id, name, url, branches, maps_link))
+            next_id += 1
+
+        for page in sorted(listings):
+            for name, url in listings.pop(page):
+                if url in existing_urls:
+                    print(f"⏭️  {name} bereits vorhanden – übersprungen.")
+                    continue
+                existing_urls.add(url)
+                window.append((page, name, url, asyncio.ensure_future(details(name, url))))
+                while len(window) > 2 * concurrency:
+                    await flush_head()
+            window.append((page, None, None, None))
+        while window:
+            await flush_head()
+
+    return next_id
+
+
+def parse_archived_details(data_path, entry, backend, selectors):
+    """Worker für den Prozesspool: liest eine Detailseite aus dem Archiv und parst sie."""
+    return parse_company_details(read_entry(data_path, entry), backend, selectors)
+
+
+def extract_from_archive(archive, base_url=BASE_URL, workers=None, existing_rows=()):
+    """
+    Erzeugt die CSV-Zeilen offline aus dem Seitenarchiv.
+
+    Es wird jeweils die neueste archivierte Version jeder Seite verwendet,
+    die Detailseiten werden in einem Prozesspool geparst. Die Ergebnisse
+    werden über die Detail-URL in `existing_rows` (die bisherige CSV)
+    eingearbeitet: vorhandene Zeilen behalten ihre Nr., Firmen ohne
+    archivierte Detailseite bleiben unverändert, neue Firmen werden in der
+    Reihenfolge der Listenseiten mit fortlaufender Nr. angehängt.
+
+    Gibt (Zeilen, URLs ohne archivierte Detailseite) zurück.
+    """
+    latest = archive.latest()
+    listing_prefix = base_url + PAGE_PATH_TEMPLATE.format("")
+    pages = sorted(
+        (int(url[len(listing_prefix):]), entry)
+        for url, entry in latest.items()
+        if url.startswith(listing_prefix) and url[len(listing_prefix):].isdigit()
+    )
+
+    companies = []
+    for page_num, entry in pages:
+        companies.extend(parse_company_links(archive.read(entry), base_url))
+
+    archived = []
+    missing = []
+    seen = set()
+    for name, url in companies:
+        if url in seen:
+            continue
+        seen.add(url)
+        if url not in latest:
+            print(f"⚠️  {name}: Detailseite nicht im Archiv – übersprungen.")
+            missing.append(url)
+            continue
+        archived.append((name, url))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        details = list(pool.map(
+            parse_archived_details,
+            repeat(archive.data_path),
+            [latest[url] for _, url in archived],
+            repeat(PARSER_BACKEND),
+            repeat(SELECTORS),
+            chunksize=16,
+        ))
+
+    rows = [dict(row) for row in existing_rows]
+    by_url = {row["URL"]: row for row in rows}
+    archived_urls = {url for _, url in archived}
+    missing += [url for url in by_url if url not in archived_urls and url not in seen]
+    next_nr = max((int(row["Nr."]) for row in rows if str(row.get("Nr.", "")).isdigit()), default=0) + 1
+    for (name, url), (branches, maps_link) in zip(archived, details):
+        row = by_url.get(url)
+        if row is not None:
+            row.update(build_row(row["Nr."], name, url, branches, maps_link))
+            continue
+        row = build_row(next_nr, name, url, branches, maps_link)
+        rows.append(row)
+        by_url[url] = row
+        next_nr += 1
+    return rows, missing
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawlt das Firmenverzeichnis des Standorts (PIPELINE_SITE).")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Seiten nebenläufig mit asyncio laden")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximale Anzahl gleichzeitiger Anfragen im asyncio-Modus")
+    parser.add_argument("--max-rate", type=float, default=MAX_REQUEST_RATE,
+                        help="Obergrenze der adaptiven Anfragerate (Anfragen pro Sekunde)")
+    parser.add_argument("--fixed-delay", action="store_true",
+                        help="Keine adaptive Rate: feste Wartezeit (sequentiell) bzw. nur --concurrency (asyncio)")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Basis-URL des Verzeichnisses (z.B. lokaler Testserver)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="HTTP-Cache nicht verwenden, alle Seiten neu laden")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL / 3600,
+                        help="Gültigkeit von Cache-Einträgen ohne ETag/Last-Modified (Stunden)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="Geladene Seiten nicht im HTML-Archiv ablegen")
+    parser.add_argument("--from-archive", action="store_true",
+                        help="Kein Netzzugriff: CSV-Zeilen aus dem HTML-Archiv neu extrahieren")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Anzahl Prozesse für --from-archive (Standard: alle Kerne)")
+    parser.add_argument("--parser", default=PARSER_BACKEND,
+                        choices=["auto"] + sorted(html_parsing.BACKENDS),
+                        help="HTML-Parser-Backend (auto = strainer; lxml nur ausdrücklich)")
+    return parser.parse_args(argv)
+
+
+def create_rate_limiter(base_url=BASE_URL, max_rate=MAX_REQUEST_RATE, store=None):
+    """Adaptive Rate für den Host des Verzeichnisses, Start bei 1 / REQUEST_DELAY oder der gelernten Rate."""
+    start_rate = 1 / REQUEST_DELAY if REQUEST_DELAY else max_rate
+    return AdaptiveRateLimiter.for_url(base_url, rate=min(start_rate, max_rate), max_rate=max_rate,
+                                       store=store, target="crawler")
+
+
+def main(argv=None):
+    global http_cache, html_archive, rate_limiter, PARSER_BACKEND
+    args = parse_args(argv)
+    PARSER_BACKEND = html_parsing.resolve_backend(args.parser)
+
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    if args.from_archive:
+        with metrics.stage("crawl") as stage:
+            existing_rows = read_rows()
+            stage.rows_in = len(existing_rows)
+            rows, missing = extract_from_archive(
+                HtmlArchive(HTML_ARCHIVE_PATH), args.base_url, args.workers, existing_rows
+            )
+            # unvollständiges Archiv: die bisherige CSV nicht überschreiben
+            path = ARCHIVE_CSV_FILENAME if missing else CSV_FILENAME
+            write_csv(rows, path)
+            stage.rows_out = len(rows)
+        if missing:
+            print(f"\n⚠️  {len(missing)} Firmen ohne archivierte Detailseite (unverändert übernommen). "
+                  f"Die CSV bleibt unverändert, Ergebnis gespeichert unter: {path}")
+        else:
+            print(f"\n✅ {len(rows)} Einträge aus dem Archiv extrahiert und in die CSV geschrieben.")
+        return
+
+    if not args.no_archive:
+        html_archive = HtmlArchive(HTML_ARCHIVE_PATH)
+    if not args.no_cache:
+        http_cache = HttpCache(HTTP_CACHE_FILENAME, ttl=args.cache_ttl * 3600)
+    rate_store = None
+    if not args.fixed_delay:
+        rate_store = RateStore(RATE_STORE_FILENAME)
+        rate_limiter = create_rate_limiter(args.base_url, args.max_rate, rate_store)
+        print(f"🚦 Startrate {rate_limiter.rate:.2f} Anfragen/s (höchstens {rate_limiter.max_rate:g})")
+
+    state = CrawlState(STATE_FILENAME)
+    if state.resumed:
+        print(f"♻️  Setze abgebrochenen Crawl fort ({len(state.pages_done)}/{state.page_count} Seiten fertig).")
+
+    # Jede fertige Zeile wird sofort angehängt und per fsync gesichert
+    try:
+        with metrics.stage("crawl") as stage, CsvAppender(CSV_FILENAME, CSV_FIELDS) as appender:
+            existing_urls, last_nr = get_existing_urls()
+            stage.rows_in = len(existing_urls)
+            if args.use_async:
+                asyncio.run(crawl_async(
+                    existing_urls, last_nr + 1, appender.write, state,
+                    base_url=args.base_url, concurrency=args.concurrency
+                ))
+            else:
+                crawl_sequential(existing_urls, last_nr + 1, appender.write, state, base_url=args.base_url)
+            stage.rows_out = appender.written
+    finally:
+        # gelernte Rate auch nach einem Abbruch (z.B. dauerhaft 429) für den nächsten Lauf
+        if rate_limiter is not None:
+            rate_store.save(rate_limiter)
+            print(f"🚦 {rate_limiter.stats()}")
+            rate_limiter = None
+    state.clear()
+
+    if appender.written:
+        print(f"\n✅ {appender.written} neue Einträge wurden zur CSV hinzugefügt.")
     else:
         print("\n📄 Keine neuen Unternehmen gefunden – CSV bleibt unverändert.")
 
+    if http_cache is not None:
+        print(f"🗄️  HTTP-Cache: {http_cache.stats()}")
+        for result, n in [("fresh", http_cache.hits), ("revalidated", http_cache.revalidated),
+                          ("fetched", http_cache.misses)]:
+            metrics.count("http_cache_total", n, target="crawler", result=result)
+        http_cache.close()
+        http_cache = None
+    if html_archive is not None:
+        print(f"🗃️  HTML-Archiv: {html_archive.added} Seiten neu archiviert")
+        html_archive = None
+
 
 if __name__ == "__main__":
     main()
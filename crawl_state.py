@@ -0,0 +1,124 @@
+"""
+Absturzsichere Bausteine für den inkrementellen Crawl.
+
+- `CsvAppender` hängt jede fertige Zeile sofort an die CSV an und ruft
+  `fsync` auf, damit ein Absturz höchstens die gerade laufende Firma kostet.
+- `CrawlState` ist ein kleiner JSON-Index (Seitenzahl, fertige Seiten), mit
+  dem ein abgebrochener Crawl genau dort weitermacht, wo er stehen blieb.
+"""
+import csv
+import json
+import os
+
+
+def _fsync_replace(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def repair_truncated_csv(path):
+    """Schneidet eine beim Absturz halb geschriebene letzte Zeile ab."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # rückwärts bis zum letzten vollständigen Zeilenende suchen
+        pos = size - 1
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            idx = chunk.rfind(b"\n")
+            if idx != -1:
+                f.truncate(pos - step + idx + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+class CsvAppender:
+    """Hängt Zeilen einzeln und dauerhaft an eine CSV an (Context-Manager)."""
+
+    def __init__(self, path, fieldnames):
+        repair_truncated_csv(path)
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self.written = 0
+        if write_header:
+            self._writer.writeheader()
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._sync()
+        self.written += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CrawlState:
+    """
+    Fortschrittsindex eines laufenden Crawls (Seitenzahl und fertige Seiten).
+
+    Mit `path=None` wird nur im Speicher gezählt (z.B. für Benchmarks).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.page_count = None
+        self.pages_done = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.page_count = data.get("page_count")
+            self.pages_done = set(data.get("pages_done", []))
+
+    @property
+    def resumed(self):
+        return bool(self.pages_done)
+
+    def save(self):
+        if not self.path:
+            return
+        _fsync_replace(self.path, json.dumps({
+            "page_count": self.page_count,
+            "pages_done": sorted(self.pages_done),
+        }))
+
+    def set_page_count(self, page_count):
+        if page_count != self.page_count:
+            self.page_count = page_count
+            self.save()
+
+    def mark_page_done(self, page):
+        self.pages_done.add(page)
+        self.save()
+
+    def clear(self):
+        """Crawl vollständig – beim nächsten Lauf wieder von vorne (inkrementell) beginnen."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.page_count = None
+        self.pages_done = set()
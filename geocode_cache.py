@@ -0,0 +1,113 @@
+"""
+Persistenter Geocode-Cache (SQLite).
+
+Schlüssel ist die normalisierte Adresse, gespeichert werden Latitude,
+Longitude, die rohe Antwort des Geocoders und der Abrufzeitpunkt. Auch
+Adressen ohne Treffer werden (kürzer) gecacht, damit sie nicht bei jedem
+Lauf erneut abgefragt werden. Abgelaufene Einträge werden beim Öffnen
+entfernt.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_TTL = 180 * 24 * 60 * 60          # Treffer: 180 Tage
+DEFAULT_NEGATIVE_TTL = 14 * 24 * 60 * 60  # kein Treffer: 14 Tage
+
+_COMMA_RE = re.compile(r"\s*,\s*")
+
+
+def normalize_address(address):
+    """Normalisiert eine Adresse für den Cache-Schlüssel (Unicode, Groß/klein, Leerzeichen)."""
+    key = unicodedata.normalize("NFC", str(address)).casefold()
+    # "+" steht in Query-Strings für ein Leerzeichen
+    key = " ".join(key.replace("+", " ").split())
+    key = _COMMA_RE.sub(", ", key)
+    return key.strip(" ,;")
+
+
+class GeocodeCache:
+    def __init__(self, path, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocodes (
+                address_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                raw TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self.evicted = self.evict_expired()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def evict_expired(self):
+        """Löscht abgelaufene Treffer und Nicht-Treffer, gibt die Anzahl zurück."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM geocodes WHERE "
+                "(latitude IS NOT NULL AND fetched_at < ?) OR "
+                "(latitude IS NULL AND fetched_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def get(self, address):
+        """
+        Gibt (Latitude, Longitude) zurück – bei gecachtem Nicht-Treffer (None, None).
+        Ist die Adresse nicht im Cache, wird None zurückgegeben.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT latitude, longitude FROM geocodes WHERE address_key = ?",
+                (normalize_address(address),),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def put(self, address, location):
+        """Speichert ein Geocoding-Ergebnis (`location` ist ein geopy-Location oder None)."""
+        if location is None:
+            values = (None, None, None)
+        else:
+            values = (location.latitude, location.longitude, json.dumps(location.raw))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_address(address), str(address), *values, time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        return f"{self.hits} aus dem Cache, {self.misses} neu abgefragt, {self.evicted} abgelaufen entfernt"
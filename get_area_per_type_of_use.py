@@ -1,20 +1,33 @@
-import pandas as pd
 import os
 
-THIS_PATH = os.path.dirname(os.path.abspath(__file__))
+import metrics
+from area_aggregation import AreaStore
+from site_profiles import PROFILE, RESULTS_PATH
+from table_storage import read_table, table_exists
 
-input_path = os.path.join(
-    THIS_PATH,
-    "raw_data",
+# manueller GIS-Export des Standorts (nicht jeder Standort hat einen, siehe sites.json)
+input_path = PROFILE.area_export
+
+# Ergebnis von join_companies_to_buildings.py hat Vorrang vor dem manuellen GIS-Export
+joined_path = os.path.join(
+    RESULTS_PATH,
     "companies_Gebäudegrunddatensatz_vereinigt.csv"
 )
 
 output_path = os.path.join(
-    THIS_PATH,
-    "results",
+    RESULTS_PATH,
     "companies_area_and_units_per_cluster.csv"
 )
 
+# materialisierte Aggregate des letzten Laufs (nur Änderungen werden nachgerechnet)
+area_store_path = os.path.join(
+    RESULTS_PATH,
+    "area_store.json"
+)
+
+# AREA_CHECK=1: Ergebnis gegen eine vollständige Neuberechnung prüfen
+check = os.environ.get("AREA_CHECK") == "1"
+
 # --------------------------------------------------
 # 1. CSV mit ausgewählten Spalten einlesen
 # --------------------------------------------------
@@ -28,37 +41,67 @@ cols = [
     "Cluster"
 ]
 
-df = pd.read_csv(input_path, sep=",", usecols=cols)
 
-# --------------------------------------------------
-# 2. Anzahl Einträge pro place_id berechnen
-# --------------------------------------------------
-entries_per_place = df.groupby("place_id")["place_id"].transform("count")
+def read_area_input():
+    """Join-Ergebnis (im Format von PIPELINE_STORAGE), sonst der manuelle Export (immer CSV)."""
+    if table_exists(joined_path):
+        path, storage = joined_path, None
+    elif input_path:
+        path, storage = input_path, "csv"
+    else:
+        raise FileNotFoundError(f"Kein Join-Ergebnis unter {joined_path} und kein manueller Export für {PROFILE.name}")
+    # nicht jeder Gebäudedatensatz hat alle Spalten (z.B. mapular_le)
+    return read_table(path, columns=cols, dtype={"Cluster": "category"}, storage=storage)
 
-# --------------------------------------------------
-# 3. Nutzfläche berechnen (Geschossfläche / Anzahl Einträge)
-# --------------------------------------------------
-df["Geschossfl"] = (df["Geschossfl"] / entries_per_place).round()
 
 # --------------------------------------------------
-# 4. Nutzfläche UND Nutzeinheiten pro Cluster aggregieren
+# 2. + 3. + 4. Änderungen gegenüber dem letzten Lauf nachtragen, Summen je Cluster
 # --------------------------------------------------
-result_df = (
-    df.groupby("Cluster", as_index=False)
-      .agg(
-          **{
-              "Nutzfläche (m²)": ("Geschossfl", "sum"),
-              "Nutzeinheiten": ("Nr.", "count")
-          }
-      )
-)
+def area_per_cluster(df, store_path=area_store_path, check=check):
+    """
+    Nutzfläche UND Nutzeinheiten pro Cluster wie `area_aggregation.aggregate_area`,
+    inkrementell über den gespeicherten `AreaStore`.
+    """
+    with metrics.stage("area") as stage:
+        stage.rows_in = len(df)
+        result = _area_per_cluster(df, store_path, check)
+        stage.rows_out = len(result)
+    return result
 
-# Optional: runden
-# result_df["Nutzfläche (m²)"] = result_df["Nutzfläche (m²)"].round(2)
 
-# --------------------------------------------------
-# 5. CSV speichern
-# --------------------------------------------------
-result_df.to_csv(output_path, index=False)
+def _area_per_cluster(df, store_path, check):
+    # Nutzfläche = Geschossfläche / Anzahl Einträge je place_id (siehe area_aggregation.py);
+    # neu aufgeteilt werden nur Gebäude, in denen Firmen hinzukommen, wegfallen oder wechseln
+    store = AreaStore.load(store_path)
+    added, removed = store.diff(df)
+    store.apply(added, removed)
+    print(f"🏢 {len(added)} Firmen neu oder geändert, {len(removed)} entfernt")
+
+    if check:
+        mismatched = store.check(df)
+        if mismatched:
+            print(f"⚠️  Aggregate weichen für {mismatched} ab, rechne vollständig neu")
+            store = AreaStore.from_frame(df)
+        else:
+            print("✅ Aggregate stimmen mit der vollständigen Neuberechnung überein")
+
+    store.save(store_path)
+    return store.result()
+
+
+def main():
+    result_df = area_per_cluster(read_area_input())
+
+    # Optional: runden
+    # result_df["Nutzfläche (m²)"] = result_df["Nutzfläche (m²)"].round(2)
+
+    # --------------------------------------------------
+    # 5. CSV speichern
+    # --------------------------------------------------
+    result_df.to_csv(output_path, index=False)
+
+    print("Fertig! Datei gespeichert unter:", output_path)
+
 
-print("Fertig! Datei gespeichert unter:", output_path)
+if __name__ == "__main__":
+    main()
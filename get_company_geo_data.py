@@ -1,83 +1,81 @@
 import os
-import time
 import pandas as pd
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-from geopy.extra.rate_limiter import RateLimiter
-from urllib.parse import unquote
-import html
-
-this_path = os.path.dirname(os.path.abspath(__file__))
-companies_path = os.path.join(this_path, "results", "adlershof_companies.csv")
-companies_geodata = os.path.join(this_path, "results", "adlershof_companies_geodata.csv")
-
-# --- 1) CSV einlesen mit Fallback-Encoding ---
-def read_csv_with_fallback(path):
-    try:
-        return pd.read_csv(path, encoding="utf-8")
-    except UnicodeDecodeError:
-        # Manche Windows-Exporte sind cp1252 (latin-1) kodiert
-        return pd.read_csv(path, encoding="cp1252")
 
-companies = read_csv_with_fallback(companies_path)
+import metrics
+from address_extraction import AddressMemo, extract_addresses, fix_mojibake_column
+from checkpoint_journal import CheckpointJournal, read_journal
+from geocode_cache import GeocodeCache, normalize_address
+from local_geocoder import LocalGeocoder
+from rate_control import RateStore
+from site_profiles import OUTPUT_PREFIX, PROFILE, RESULTS_PATH
+from table_storage import read_table, table_exists, write_table
+
+# Ergebnisse des Standorts (PIPELINE_SITE, siehe site_profiles.py)
+companies_path = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies.csv")
+companies_geodata = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies_geodata.csv")
+geocode_cache_path = os.path.join(RESULTS_PATH, "geocode_cache.sqlite")
+journal_path = os.path.join(RESULTS_PATH, f"{OUTPUT_PREFIX}_companies_geodata.journal.jsonl")
+address_memo_path = os.path.join(RESULTS_PATH, "address_memo.json")
+# gelernte Anfrageraten je Host, gemeinsam mit dem Crawler (siehe rate_control.py)
+rate_store_path = os.path.join(RESULTS_PATH, "rate_limits.json")
+# Adress-Referenz für den lokalen Geocoder (Straße, Hausnummer, PLZ, lat/lon)
+address_reference_path = os.environ.get("ADDRESS_REFERENCE", PROFILE.address_reference)
+# GEOCODER_OFFLINE=1: Nominatim nie fragen, nur lokale Referenz und Cache verwenden
+offline = os.environ.get("GEOCODER_OFFLINE") == "1"
+# NOMINATIM_ENDPOINTS=url1,url2: nebenläufiger Batch-Modus gegen eigene Instanzen,
+# NOMINATIM_PROFILE wählt das Ratenprofil ("public" oder "self-hosted")
+# (Standard aus dem Standortprofil)
+nominatim_endpoints = [url.strip() for url in os.environ.get("NOMINATIM_ENDPOINTS", ",".join(PROFILE.nominatim_endpoints)).split(",")
+                       if url.strip()]
+nominatim_profile = os.environ.get("NOMINATIM_PROFILE") or PROFILE.nominatim_profile or (
+    "self-hosted" if nominatim_endpoints else "public"
+)
+progress_interval = 10
 
-# --- 2) Setup Geocoder (Rate Limiting bleibt konservativ) ---
-geolocator = Nominatim(user_agent="adlershof-geocoder")
-geocode = RateLimiter(geolocator.geocode, min_delay_seconds=5, max_retries=3, error_wait_seconds=10)
+# --- 1) CSV des Crawlers einlesen: siehe main() (mit Fallback-Encoding, siehe table_storage.py) ---
 
-# --- 3) Helfer: Mojibake reparieren ---
-def fix_mojibake(s):
+
+# --- 2) Setup Geocoder (adaptive Rate, siehe rate_control.py und batch_geocoder.RATE_PROFILES) ---
+# geopy wird erst geladen, wenn wirklich Nominatim gefragt wird
+def create_nominatim(store=None):
     """
-    Versucht typische Mojibake-Fälle zu reparieren:
-      - Wenn s None, zurück None
-      - Wenn s Zeichen wie 'Ã' enthält, versuchen wir `.encode('cp1252').decode('utf-8')`
-      - Sonst s unverändert zurückgeben
-    Das fängt die üblichen Fälle wie 'StraÃŸe' -> 'Straße' ab.
+    Öffentliches Nominatim mit adaptiver Ratenbegrenzung: Start bei einer
+    Anfrage alle 5 s (bzw. der in `store` gelernten Rate), höchstens 1/s,
+    langsamer bei 429/503 und Zeitüberschreitungen, Retry-After wird befolgt.
+    Gibt (geocode-Funktion, Endpunkt) zurück.
     """
-    if s is None:
-        return None
-    # already clean?
-    if not isinstance(s, str):
-        s = str(s)
-    # quick heuristic: oft taucht 'Ã' bei Mojibake auf, aber auch 'Ã¤', 'Ã¶', 'Ã¼', 'ÃŸ'
-    if "Ã" in s or "Â" in s:
-        try:
-            # interpretiere die vorhandenen Zeichen als cp1252/latin1-bytes, dann dekodiere als utf-8
-            repaired = s.encode("cp1252").decode("utf-8")
-            return repaired
-        except Exception:
-            # fallback: gib original zurück, wir wollen nicht crashen
-            return s
-    return s
-
-# --- 4) Adresse extrahieren und korrekt unquote mit utf-8 ---
-def extract_address(url):
-    if pd.isna(url):
-        return None
-    # Google Maps Links haben oft '?q=' oder '/place/' etc. Wir behandeln '?q=' wie vorher.
-    # Unquote explizit mit encoding utf-8
-    try:
-        if "?q=" in url:
-            raw = url.split("?q=")[-1]
-            decoded = unquote(raw, encoding="utf-8", errors="replace")
-        else:
-            # fallback: unquote der ganzen URL falls keine ?q= vorhanden
-            decoded = unquote(url, encoding="utf-8", errors="replace")
-        # HTML-Entities (falls vorhanden) entfernen
-        decoded = html.unescape(decoded)
-        # Mojibake-Reparatur
-        decoded = fix_mojibake(decoded)
-        # Strip whitespace
-        return decoded.strip()
-    except Exception:
-        return None
+    from batch_geocoder import DEFAULT_ENDPOINT, Endpoint
+
+    endpoint = Endpoint(DEFAULT_ENDPOINT, "public", user_agent="adlershof-geocoder", store=store)
+    return endpoint.geocode, endpoint
+
+
+def load_local_geocoder(path=address_reference_path):
+    """Lokaler Geocoder – Nominatim wird nur noch für Adressen gefragt, die er nicht kennt."""
+    if os.path.exists(path):
+        local_geocoder = LocalGeocoder.from_csv(path)
+        print(f"Lokale Adress-Referenz geladen: {len(local_geocoder)} Adressen")
+        return local_geocoder
+    if offline:
+        print(f"Warnung: offline, aber keine Adress-Referenz unter {path}")
+    return None
+
+
+# --- 3) + 4) Mojibake-Reparatur und Adress-Extraktion: siehe address_extraction.py ---
 
 # --- 5) Geocoding-Funktion mit Fehlerbehandlung ---
-def get_coordinates(address):
+def get_coordinates(address, nominatim, geocode_cache):
+    """Fragt Nominatim; lokaler Geocoder und Cache sind in `main` schon abgefragt."""
     if not address:
         return pd.Series([None, None])
+    if offline:
+        return pd.Series([None, None])
+    from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+
     try:
-        location = geocode(address)
+        location = nominatim(address)
+        # Treffer und Nicht-Treffer cachen, Fehler nicht (nächster Lauf versucht es erneut)
+        geocode_cache.put(address, location)
         if location:
             return pd.Series([location.latitude, location.longitude])
     except (GeocoderTimedOut, GeocoderServiceError) as e:
@@ -86,62 +84,218 @@ def get_coordinates(address):
         print(f"Unexpected geocoding error for '{address}': {e}")
     return pd.Series([None, None])
 
-# --- 6) Resume / Checkpoint Logik vorbereiten ---
-# Falls bereits existierende geodata vorhanden ist, lade und verwende vorhandene Ergebnisse
-if os.path.exists(companies_geodata):
-    existing = read_csv_with_fallback(companies_geodata)
-    # Wenn Spalten passen, kopieren wir Latitude/Longitude zurück
-    if "Latitude" in existing.columns and "Longitude" in existing.columns:
-        # Zuordnung per Index: vorausgesetzt Reihenfolge unverändert - alternativ: ein Join auf eindeutige ID nutzen
-        companies["Latitude"] = existing.get("Latitude")
-        companies["Longitude"] = existing.get("Longitude")
-
-# Erstelle Adresse-Spalte falls noch nicht vorhanden
-if "Adresse" not in companies.columns:
-    companies["Adresse"] = companies["Google Maps Link"].apply(extract_address)
-else:
-    # Falls bereits vorhanden, repariere sie trotzdem (Mojibake könnte dort sein)
-    companies["Adresse"] = companies["Adresse"].apply(lambda x: fix_mojibake(x) if pd.notna(x) else x)
-
-# Erstelle Platzhalter für Koordinaten
-if "Latitude" not in companies.columns:
-    companies["Latitude"] = None
-if "Longitude" not in companies.columns:
-    companies["Longitude"] = None
-
-# --- 7) Verarbeitung mit Checkpointing und finaler Speicherung ---
-checkpoint_interval = 10
-processed_since_save = 0
-
-try:
-    for idx, row in companies.iterrows():
-        # Skip, wenn bereits Koordinaten vorhanden
-        if pd.notna(row["Latitude"]) and pd.notna(row["Longitude"]):
-            continue
-
-        addr = row["Adresse"]
-        lat, lon = get_coordinates(addr)
-        companies.at[idx, "Latitude"] = lat
-        companies.at[idx, "Longitude"] = lon
-        processed_since_save += 1
-
-        if processed_since_save >= checkpoint_interval:
-            print(f"Checkpoint: speichere Ergebnisse (Index {idx})...")
-            companies.to_csv(companies_geodata, index=False)
-            processed_since_save = 0
-
-except KeyboardInterrupt:
-    print("Abbruch durch User. Speichere Zwischenergebnisse...")
-    companies.to_csv(companies_geodata, index=False)
-    raise
-
-except Exception as e:
-    print(f"Unerwarteter Fehler: {e}. Speichere Zwischenergebnisse...")
-    companies.to_csv(companies_geodata, index=False)
-    raise
-
-finally:
-    print("Fertig — schreibe finale Datei.")
-    companies.to_csv(companies_geodata, index=False)
-
-print("Fertig.")
+
+# --- 6) Adressen und Platzhalter vorbereiten ---
+def prepare_addresses(companies):
+    """Setzt Adresse und leere Koordinaten-Spalten, gibt die normalisierten Adress-Schlüssel zurück."""
+    # Erstelle Adresse-Spalte falls noch nicht vorhanden
+    if "Adresse" not in companies.columns:
+        # spaltenweise je eindeutigem Link, bekannte Links aus dem Memo des letzten Laufs
+        address_memo = AddressMemo(address_memo_path)
+        companies["Adresse"] = extract_addresses(companies["Google Maps Link"], address_memo)
+        address_memo.save()
+    else:
+        # Falls bereits vorhanden, repariere sie trotzdem (Mojibake könnte dort sein)
+        companies["Adresse"] = fix_mojibake_column(companies["Adresse"])
+
+    # Erstelle Platzhalter für Koordinaten
+    if "Latitude" not in companies.columns:
+        companies["Latitude"] = None
+    if "Longitude" not in companies.columns:
+        companies["Longitude"] = None
+
+    return companies["Adresse"].map(normalize_address, na_action="ignore")
+
+
+# --- 7) Resume: vorhandene Ergebnisse per Schlüssel übernehmen ---
+def company_keys(df):
+    """Stabiler Schlüssel je Firma: URL, ersatzweise Nr."""
+    if "URL" in df.columns:
+        return df["URL"].astype(str)
+    return df["Nr."].astype(str)
+
+
+def load_previous_coordinates(previous_path=companies_geodata):
+    """Ergebnisse früherer Läufe (finale Datei, dann Journal) als {Schlüssel: (Adresse, lat, lon)}."""
+    previous = {}
+    if table_exists(previous_path):
+        existing = read_table(previous_path)
+        if {"Adresse", "Latitude", "Longitude"} <= set(existing.columns):
+            existing = existing[existing["Latitude"].notna() & existing["Longitude"].notna()]
+            previous.update(zip(
+                company_keys(existing),
+                zip(existing["Adresse"], existing["Latitude"], existing["Longitude"]),
+            ))
+    for key, record in read_journal(journal_path).items():
+        previous[key] = (record["Adresse"], record["Latitude"], record["Longitude"])
+    return previous
+
+
+def merge_previous_coordinates(companies, address_keys, previous):
+    """
+    Keyed Merge in O(n): Koordinaten werden nur übernommen, wenn die Firma noch
+    keine hat und ihre Adresse seit dem früheren Lauf unverändert ist.
+    """
+    if not previous:
+        return 0
+    prev = pd.DataFrame.from_dict(previous, orient="index", columns=["Adresse", "Latitude", "Longitude"])
+    prev_address_keys = prev["Adresse"].map(normalize_address, na_action="ignore")
+    keys = company_keys(companies)
+    missing = companies["Latitude"].isna() | companies["Longitude"].isna()
+    usable = missing & keys.map(prev_address_keys).eq(address_keys) & keys.map(prev["Latitude"]).notna()
+    companies.loc[usable, "Latitude"] = keys[usable].map(prev["Latitude"]).astype(float)
+    companies.loc[usable, "Longitude"] = keys[usable].map(prev["Longitude"]).astype(float)
+    return int(usable.sum())
+
+
+# --- 8) Verarbeitung mit Checkpoint-Journal und finaler Speicherung ---
+# Jede eindeutige (normalisierte) Adresse wird nur einmal geokodiert,
+# die Ergebnisse werden anschließend vektorisiert auf alle Firmen übertragen.
+# Neue Ergebnisse gehen je Firma ins Journal (Hintergrund-Thread); die CSV
+# wird nur einmal am Ende geschrieben.
+def join_coordinates(companies, address_keys, results):
+    """Überträgt Koordinaten je Adress-Schlüssel auf alle Firmen ohne Koordinaten."""
+    if not results:
+        return
+    coords = pd.DataFrame.from_dict(
+        results, orient="index", columns=["Latitude", "Longitude"]
+    ).astype(float)
+    missing = companies["Latitude"].isna() | companies["Longitude"].isna()
+    keys = address_keys[missing]
+    companies.loc[missing, "Latitude"] = keys.map(coords["Latitude"])
+    companies.loc[missing, "Longitude"] = keys.map(coords["Longitude"])
+
+
+def geocode(companies, output_path=None, previous_path=companies_geodata):
+    """
+    Tabelle des Crawlers mit Adresse, Latitude und Longitude je Firma.
+
+    Koordinaten kommen aus früheren Läufen (`previous_path` und Journal), der
+    lokalen Referenz, dem Geocode-Cache und erst zuletzt von Nominatim. Mit
+    `output_path` wird das Ergebnis dort gespeichert, auch bei einem Abbruch;
+    ohne bleibt das Journal nach einem Abbruch für die Wiederaufnahme liegen.
+    """
+    with metrics.stage("geocode") as stage:
+        stage.rows_in = len(companies)
+        companies = _geocode(companies, output_path, previous_path)
+        stage.rows_out = len(companies)
+    return companies
+
+
+def _geocode(companies, output_path, previous_path):
+    companies = companies.copy()
+    address_keys = prepare_addresses(companies)
+
+    merged = merge_previous_coordinates(companies, address_keys, load_previous_coordinates(previous_path))
+    if merged:
+        print(f"Resume: Koordinaten von {merged} Firmen aus früheren Läufen übernommen.")
+
+    # Persistenter Cache je normalisierter Adresse (inkl. Nicht-Treffer)
+    geocode_cache = GeocodeCache(geocode_cache_path)
+    local_geocoder = load_local_geocoder()
+
+    missing = companies["Latitude"].isna() | companies["Longitude"].isna()
+    pending_mask = missing & address_keys.notna() & (address_keys != "")
+    pending = companies.loc[pending_mask, "Adresse"]
+    unique_addresses = pending.groupby(address_keys[pending_mask], sort=False).first()
+    # Adress-Schlüssel -> Firmen-Schlüssel (für das Journal)
+    companies_by_address = company_keys(companies)[pending_mask].groupby(address_keys[pending_mask], sort=False).agg(list)
+
+    results = {}
+    to_geocode = {}
+    for key, addr in unique_addresses.items():
+        coords = local_geocoder.lookup(addr) if local_geocoder is not None else None
+        if coords is None:
+            coords = geocode_cache.get(addr)
+        if coords is None:
+            to_geocode[key] = addr
+        else:
+            results[key] = coords
+    join_coordinates(companies, address_keys, results)
+    print(
+        f"{len(pending)} Firmen ohne Koordinaten, {len(unique_addresses)} eindeutige Adressen, "
+        f"davon {len(to_geocode)} neu zu geokodieren."
+    )
+
+    journal = CheckpointJournal(journal_path)
+    rate_store = RateStore(rate_store_path)
+    limiters = []
+    geocoded = 0
+
+    def record_result(key, address, lat, lon):
+        """Ergebnis übernehmen und je betroffener Firma ins Journal schreiben."""
+        nonlocal geocoded
+        results[key] = (lat, lon)
+        for company_key in companies_by_address.get(key, []):
+            journal.append(company_key, Adresse=address, Latitude=lat, Longitude=lon)
+        geocoded += 1
+        if geocoded % progress_interval == 0:
+            print(f"Fortschritt: {geocoded}/{len(to_geocode)} Adressen geokodiert...")
+
+    def store_batch_result(address, location):
+        """Callback des Batch-Geocoders: Ergebnis cachen und übernehmen."""
+        geocode_cache.put(address, location)
+        if location:
+            record_result(normalize_address(address), address, location.latitude, location.longitude)
+        else:
+            record_result(normalize_address(address), address, None, None)
+
+    try:
+        if nominatim_endpoints and not offline and to_geocode:
+            from batch_geocoder import BatchGeocoder
+
+            batch_geocoder = BatchGeocoder(nominatim_endpoints, nominatim_profile, user_agent="adlershof-geocoder",
+                                           store=rate_store)
+            limiters = batch_geocoder.limiters
+            print(f"Batch-Geocoding über {len(nominatim_endpoints)} Endpunkt(e), Profil '{nominatim_profile}'")
+            batch_geocoder.geocode_many(list(to_geocode.values()), on_result=store_batch_result)
+            print(f"Batch-Geocoder: {batch_geocoder.stats()}")
+        else:
+            nominatim = None
+            if to_geocode and not offline:
+                nominatim, endpoint = create_nominatim(rate_store)
+                limiters = [endpoint.limiter]
+            for key, addr in to_geocode.items():
+                lat, lon = get_coordinates(addr, nominatim, geocode_cache)
+                record_result(key, addr, lat, lon)
+
+    except KeyboardInterrupt:
+        print("Abbruch durch User. Speichere Zwischenergebnisse...")
+        raise
+
+    except Exception as e:
+        print(f"Unerwarteter Fehler: {e}. Speichere Zwischenergebnisse...")
+        raise
+
+    finally:
+        journal.close()
+        if limiters:
+            rate_store.save(*limiters)
+            for limiter in limiters:
+                print(f"Rate: {limiter.stats()}")
+        join_coordinates(companies, address_keys, results)
+        if output_path:
+            print("Fertig — schreibe finale Datei.")
+            write_table(companies, output_path)
+            # Alles steht jetzt in der finalen Datei – das Journal wird nicht mehr gebraucht
+            journal.discard()
+        print(f"Geocode-Cache: {geocode_cache.stats()}")
+        if local_geocoder is not None:
+            print(f"Lokaler Geocoder: {local_geocoder.stats()}")
+        geocode_cache.close()
+
+    if not output_path:
+        # ohne Ausgabedatei erst nach einem vollständigen Lauf verwerfen
+        journal.discard()
+    return companies
+
+
+def main():
+    # Ergebnis geht mit PIPELINE_STORAGE=parquet als Parquet an die nächste Stufe
+    companies = read_table(companies_path, storage="csv")
+    geocode(companies, output_path=companies_geodata)
+    print("Fertig.")
+
+
+if __name__ == "__main__":
+    main()
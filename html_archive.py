@@ -0,0 +1,79 @@
+"""
+Append-only Archiv aller vom Crawler geladenen Seiten.
+
+Das Archiv besteht aus zwei Dateien:
+  - `<name>.dat`: aneinandergehängte, einzeln zlib-komprimierte Seiten
+  - `<name>.idx`: eine Zeile pro Seite (Zeitpunkt, URL, Offset, Länge,
+    Encoding, SHA-1 des Inhalts), tab-getrennt
+
+Beide Dateien werden nur angehängt. Eine Seite wird nur dann erneut
+gespeichert, wenn sich ihr Inhalt seit dem letzten Eintrag geändert hat.
+"""
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+ArchiveEntry = namedtuple("ArchiveEntry", "fetched_at url offset length encoding sha1")
+
+
+class HtmlArchive:
+    def __init__(self, path):
+        """`path` ohne Endung, z.B. `results/html_archive`."""
+        self.data_path = path + ".dat"
+        self.index_path = path + ".idx"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._latest = {entry.url: entry for entry in self.entries()}
+        self.added = 0
+
+    def entries(self):
+        """Alle Indexeinträge in Schreibreihenfolge."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 6:
+                    # unvollständige letzte Zeile nach Absturz
+                    continue
+                fetched_at, url, offset, length, encoding, sha1 = parts
+                yield ArchiveEntry(float(fetched_at), url, int(offset), int(length), encoding, sha1)
+
+    def latest(self):
+        """Neuester Eintrag je URL."""
+        return dict(self._latest)
+
+    def add(self, url, html, encoding="utf-8"):
+        """Hängt eine Seite an, sofern sie sich seit dem letzten Abruf geändert hat."""
+        raw = html.encode(encoding, errors="replace")
+        sha1 = hashlib.sha1(raw).hexdigest()
+        with self._lock:
+            previous = self._latest.get(url)
+            if previous is not None and previous.sha1 == sha1:
+                return previous
+            data = zlib.compress(raw, 6)
+            with open(self.data_path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            entry = ArchiveEntry(time.time(), url, offset, len(data), encoding, sha1)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("\t".join(str(value) for value in entry) + "\n")
+            self._latest[url] = entry
+            self.added += 1
+            return entry
+
+    def read(self, entry):
+        return read_entry(self.data_path, entry)
+
+
+def read_entry(data_path, entry):
+    """Liest eine einzelne Seite (auch aus Worker-Prozessen nutzbar)."""
+    with open(data_path, "rb") as f:
+        f.seek(entry.offset)
+        data = f.read(entry.length)
+    return zlib.decompress(data).decode(entry.encoding, errors="replace")
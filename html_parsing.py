@@ -0,0 +1,235 @@
+"""
+Parser für die Listen- und Detailseiten des Firmenverzeichnisses.
+
+Es gibt mehrere Backends mit feldgenau identischen Ergebnissen:
+  - "bs4":      vollständiger BeautifulSoup-Baum (Referenz, wie bisher)
+  - "strainer": BeautifulSoup mit SoupStrainer – es werden nur die benötigten
+                Teilbäume aufgebaut (reines Python, immer verfügbar)
+  - "lxml":     lxml.html mit XPath, falls lxml installiert ist
+
+"auto" wählt "strainer". lxml muss ausdrücklich gewählt werden, bis
+`benchmarks/bench_parsing.py --archive ... --check` es auf echten archivierten Seiten
+bestätigt hat (die Fixture-Seiten decken nicht jede Eigenheit ab).
+
+bs4 und lxml werden erst beim ersten Parsen importiert.
+
+Welche Elemente gelesen werden, bestimmen die `Selectors` (je Standort aus
+site_profiles.py). Selektoren haben die Form "tag.klasse1.klasse2"; der
+Standard entspricht www.adlershof.de.
+"""
+import importlib.util
+import re
+from collections import namedtuple
+from functools import cache
+
+# lxml ist optional; nur prüfen, ob es installiert ist
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+# item: Firmen-Kachel der Listenseite, title: Link mit Name darin,
+# branches_heading: Text der h2 über der Branchenliste, branches_list: die Liste danach,
+# maps_link: Link zu Google Maps auf der Detailseite
+Selectors = namedtuple(
+    "Selectors", "item title branches_heading branches_list maps_link",
+    defaults=("div.company__item", "a.headline.company__title", "Branchen", "ul.bullets", "a.google-maps"),
+)
+DEFAULT_SELECTORS = Selectors()
+
+
+def _split(selector):
+    """"div.a.b" -> ("div", ["a", "b"])"""
+    tag, *classes = selector.split(".")
+    return tag, classes
+
+
+def _soup_filter(selector):
+    """Argumente für `find`/`find_next`: Tag und (einzelne) Klasse wie bisher, sonst eine Funktion."""
+    tag, classes = _split(selector)
+    if len(classes) <= 1:
+        return (tag, {"class_": classes[0]} if classes else {})
+    return (lambda t: t.name == tag and all(c in t.get("class", []) for c in classes), {})
+
+
+# --------------------------------------------------
+# 1. Referenz: vollständiger BeautifulSoup-Baum
+# --------------------------------------------------
+def _links_from_soup(soup, base_url, selectors=DEFAULT_SELECTORS):
+    companies = []
+    for div in soup.select(selectors.item):
+        name_tag = div.select_one(selectors.title)
+        if not name_tag:
+            continue
+        name = name_tag.get_text(strip=True)
+        href = name_tag.get("href")
+        companies.append((name, base_url + href))
+    return companies
+
+
+def _details_from_soup(soup, selectors=DEFAULT_SELECTORS):
+    # Branchen extrahieren
+    h2 = soup.find("h2", string=lambda s: s and selectors.branches_heading in s)
+    branches = []
+    if h2:
+        name, attrs = _soup_filter(selectors.branches_list)
+        ul = h2.find_next(name, **attrs)
+        if ul:
+            branches = [li.get_text(strip=True) for li in ul.find_all("li")]
+
+    # Google Maps Link extrahieren
+    name, attrs = _soup_filter(selectors.maps_link)
+    maps_tag = soup.find(name, **attrs)
+    maps_link = maps_tag["href"] if maps_tag else ""
+    return branches, maps_link
+
+
+def links_bs4(html, base_url, selectors=DEFAULT_SELECTORS):
+    from bs4 import BeautifulSoup
+
+    return _links_from_soup(BeautifulSoup(html, "html.parser"), base_url, selectors)
+
+
+def details_bs4(html, selectors=DEFAULT_SELECTORS):
+    from bs4 import BeautifulSoup
+
+    return _details_from_soup(BeautifulSoup(html, "html.parser"), selectors)
+
+
+# --------------------------------------------------
+# 2. SoupStrainer: nur die benötigten Teilbäume
+# --------------------------------------------------
+@cache
+def _strainers(selectors=DEFAULT_SELECTORS):
+    from bs4 import SoupStrainer
+
+    # Listenseite: nur die Firmen-Kacheln (weitere Klassen prüft danach select); die Klasse
+    # als ganzes Wort, beim Filtern während des Parsens ist das class-Attribut noch ungeteilt
+    tag, classes = _split(selectors.item)
+    if classes:
+        listing = SoupStrainer(tag, class_=re.compile(rf"(?:^|\s){re.escape(classes[0])}(?:\s|$)"))
+    else:
+        listing = SoupStrainer(tag)
+    # Detailseite: Überschriften, Listen und Links (für h2 -> ul.bullets und a.google-maps);
+    # die Dokumentreihenfolge bleibt erhalten, find_next funktioniert daher wie im vollen Baum
+    detail = SoupStrainer(sorted({"h2", _split(selectors.branches_list)[0], _split(selectors.maps_link)[0]}))
+    return listing, detail
+
+
+def links_strainer(html, base_url, selectors=DEFAULT_SELECTORS):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser", parse_only=_strainers(selectors)[0])
+    return _links_from_soup(soup, base_url, selectors)
+
+
+def details_strainer(html, selectors=DEFAULT_SELECTORS):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser", parse_only=_strainers(selectors)[1])
+    return _details_from_soup(soup, selectors)
+
+
+# --------------------------------------------------
+# 3. lxml (optional)
+# --------------------------------------------------
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath_step(selector):
+    tag, classes = _split(selector)
+    condition = " and ".join(_has_class(c) for c in classes)
+    return f"{tag}[{condition}]" if condition else tag
+
+
+@cache
+def _xpaths(selectors=DEFAULT_SELECTORS):
+    """XPath-Ausdrücke für Kacheln, Titel, Branchenliste (nach der h2) und Maps-Link."""
+    bullets = _xpath_step(selectors.branches_list)
+    return {
+        "items": f"//{_xpath_step(selectors.item)}",
+        "title": f".//{_xpath_step(selectors.title)}",
+        "bullets": f"(descendant::{bullets} | following::{bullets})[1]",
+        "maps": f"(//{_xpath_step(selectors.maps_link)})[1]",
+    }
+
+
+_XP_H2 = "//h2"
+
+
+def _text(element):
+    """Entspricht `Tag.get_text(strip=True)`."""
+    return "".join(
+        stripped for stripped in (t.strip() for t in element.itertext()) if stripped
+    )
+
+
+def _single_string(element):
+    """Entspricht `Tag.string`: Text nur bei genau einem (verschachtelten) Textknoten."""
+    if len(element) == 0:
+        return element.text
+    if len(element) == 1 and not element.text and not element[0].tail:
+        return _single_string(element[0])
+    return None
+
+
+def links_lxml(html, base_url, selectors=DEFAULT_SELECTORS):
+    import lxml.html
+
+    xpaths = _xpaths(selectors)
+    root = lxml.html.fromstring(html)
+    companies = []
+    for div in root.xpath(xpaths["items"]):
+        titles = div.xpath(xpaths["title"])
+        if not titles:
+            continue
+        name_tag = titles[0]
+        companies.append((_text(name_tag), base_url + name_tag.get("href")))
+    return companies
+
+
+def details_lxml(html, selectors=DEFAULT_SELECTORS):
+    import lxml.html
+
+    xpaths = _xpaths(selectors)
+    root = lxml.html.fromstring(html)
+    branches = []
+    for h2 in root.xpath(_XP_H2):
+        string = _single_string(h2)
+        if string and selectors.branches_heading in string:
+            uls = h2.xpath(xpaths["bullets"])
+            if uls:
+                branches = [_text(li) for li in uls[0].iter("li")]
+            break
+
+    maps_tags = root.xpath(xpaths["maps"])
+    maps_link = maps_tags[0].attrib["href"] if maps_tags else ""
+    return branches, maps_link
+
+
+# --------------------------------------------------
+# 4. Backend-Auswahl
+# --------------------------------------------------
+BACKENDS = {
+    "bs4": (links_bs4, details_bs4),
+    "strainer": (links_strainer, details_strainer),
+}
+if HAS_LXML:
+    BACKENDS["lxml"] = (links_lxml, details_lxml)
+
+
+def resolve_backend(name="auto"):
+    """Gibt den Namen des tatsächlich verwendeten Backends zurück."""
+    if name == "auto":
+        return "strainer"
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes oder nicht installiertes Parser-Backend: {name!r}")
+    return name
+
+
+def parse_company_links(html, base_url, backend="auto", selectors=DEFAULT_SELECTORS):
+    """Extrahiert (Name, URL) aller Firmen aus einer Listenseite."""
+    return BACKENDS[resolve_backend(backend)][0](html, base_url, selectors)
+
+
+def parse_company_details(html, backend="auto", selectors=DEFAULT_SELECTORS):
+    """Extrahiert Branchen und Google-Maps-Link aus einer Detailseite."""
+    return BACKENDS[resolve_backend(backend)][1](html, selectors)
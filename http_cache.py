@@ -0,0 +1,146 @@
+"""
+Persistenter HTTP-Cache für den Crawler.
+
+Antworten werden pro URL in einer SQLite-Datei abgelegt, der Body
+zlib-komprimiert. Beim nächsten Abruf wird mit ETag / Last-Modified
+bedingt nachgefragt (304 = Body aus dem Cache). Schickt der Server keinen
+dieser Validatoren, gilt der Eintrag für `ttl` Sekunden als frisch und es
+wird gar nicht erst angefragt.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_TTL = 24 * 60 * 60  # 1 Tag
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class HttpCache:
+    """URL -> (Validatoren, komprimierter Body) in einer SQLite-Datei."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0          # frisch, ohne Anfrage
+        self.revalidated = 0   # 304 Not Modified
+        self.misses = 0        # vollständig geladen
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                max_age REAL,
+                fetched_at REAL NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _lookup(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, max_age, fetched_at, encoding, body "
+                "FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _store(self, url, response):
+        cache_control = response.headers.get("Cache-Control", "")
+        match = _MAX_AGE_RE.search(cache_control)
+        max_age = float(match.group(1)) if match else None
+        if "no-store" in cache_control:
+            return
+        encoding = response.encoding or response.apparent_encoding
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    max_age,
+                    time.time(),
+                    encoding,
+                    zlib.compress(response.content, 6),
+                ),
+            )
+            self._conn.commit()
+
+    def _touch(self, url):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self._conn.commit()
+
+    def is_fresh(self, etag, last_modified, max_age, fetched_at):
+        """Darf der Eintrag ohne Nachfrage beim Server verwendet werden?"""
+        age = time.time() - fetched_at
+        if max_age is not None:
+            return age < max_age
+        if etag or last_modified:
+            return False
+        return age < self.ttl
+
+    def get(self, http, url, headers=None, timeout=None, before_request=None):
+        """
+        Liefert den Text von `url`, wenn möglich aus dem Cache.
+
+        `http` ist `requests` oder eine `requests.Session`. `before_request`
+        wird nur aufgerufen, wenn tatsächlich eine Anfrage ans Netz geht
+        (z.B. für Wartezeiten).
+        """
+        entry = self._lookup(url)
+        request_headers = dict(headers or {})
+        if entry:
+            etag, last_modified, max_age, fetched_at, encoding, body = entry
+            if self.is_fresh(etag, last_modified, max_age, fetched_at):
+                self.hits += 1
+                return _decode(body, encoding)
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        if before_request:
+            before_request()
+        response = http.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            self.revalidated += 1
+            self._touch(url)
+            return _decode(entry[5], entry[4])
+
+        self.misses += 1
+        if response.status_code == 200:
+            self._store(url, response)
+        return response.text
+
+    def stats(self):
+        return f"{self.hits} frisch, {self.revalidated} revalidiert (304), {self.misses} geladen"
+
+
+def _decode(body, encoding):
+    return zlib.decompress(body).decode(encoding or "utf-8", errors="replace")
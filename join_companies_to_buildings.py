@@ -0,0 +1,102 @@
+"""
+Ordnet die geokodierten Firmen ihren Gebäuden zu (ersetzt den manuellen GIS-Join).
+
+Liest die Firmen mit Cluster (`results/<Präfix>_companies_processed.csv`,
+Spalten Latitude/Longitude) und einen Gebäudedatensatz (GeoJSON oder CSV mit
+WKT-Spalte `geometry` bzw. Schwerpunkt-Spalten, z.B. mit `Gebaeudegr` und
+`Geschossfl`), sucht je Firma das enthaltende bzw. nächste Gebäude und
+schreibt das Ergebnis mit `place_id` für `get_area_per_type_of_use.py`:
+    python join_companies_to_buildings.py --buildings raw_data/gebaeude.geojson --crs EPSG:25833
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from building_index import DEFAULT_CELL_SIZE, DEFAULT_MAX_DISTANCE, load_buildings
+from site_profiles import OUTPUT_PREFIX, PROFILE, RESULTS_PATH
+from table_storage import STORAGE, STORAGE_FORMATS, read_table, storage_path, write_table
+
+# Ergebnisse und Gebäude des Standorts (PIPELINE_SITE, siehe site_profiles.py)
+companies_path = os.path.join(
+    RESULTS_PATH,
+    f"{OUTPUT_PREFIX}_companies_processed.csv"
+)
+
+buildings_path = PROFILE.buildings or ""
+
+joined_path = os.path.join(
+    RESULTS_PATH,
+    "companies_Gebäudegrunddatensatz_vereinigt.csv"
+)
+
+# Mögliche Spalten mit einer Gebäude-ID (erste vorhandene wird zu place_id)
+ID_COLUMN_CANDIDATES = ["place_id", "gml_id", "id", "OBJECTID", "fid"]
+
+
+def join_companies_to_buildings(companies, buildings, index, id_column=None):
+    """
+    Hängt an jede Firma die Attribute ihres Gebäudes, `place_id` und den
+    Abstand zum Grundriss in Metern (0 = innerhalb) an. Firmen ohne
+    Koordinaten oder ohne Gebäude in Reichweite behalten leere Werte.
+    """
+    building, distance = index.query_lonlat(companies["Longitude"], companies["Latitude"])
+    found = building >= 0
+
+    id_column = id_column or next((c for c in ID_COLUMN_CANDIDATES if c in buildings.columns), None)
+    attributes = buildings.drop(columns=[id_column]) if id_column else buildings
+    # gleichnamige Gebäude-Spalten nicht über die Firmen-Spalten schreiben
+    attributes = attributes.rename(columns={c: f"{c}_gebaeude" for c in attributes.columns if c in companies.columns})
+    place_ids = buildings[id_column] if id_column else pd.Series(range(1, len(buildings) + 1))
+
+    joined = attributes.iloc[building[found]].reset_index(drop=True)
+    joined.insert(0, "place_id", place_ids.iloc[building[found]].to_numpy())
+    joined["Abstand Gebäude (m)"] = distance[found].round(1)
+    joined.index = companies.index[found]
+    return companies.join(joined.reindex(companies.index))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Firmen per Spatial Join ihren Gebäuden zuordnen.")
+    parser.add_argument("--companies", default=companies_path)
+    parser.add_argument("--buildings", default=buildings_path, help="GeoJSON oder CSV (WKT-Spalte 'geometry' oder x/y)")
+    parser.add_argument("--output", default=joined_path)
+    parser.add_argument("--crs", default="EPSG:4326",
+                        help="Koordinatensystem der Gebäude-Datei: EPSG:4326 oder UTM, z.B. EPSG:25833")
+    parser.add_argument("--id-column", default=None, help="Spalte mit der Gebäude-ID (wird zu place_id)")
+    parser.add_argument("--max-distance", type=float, default=DEFAULT_MAX_DISTANCE,
+                        help="größter Abstand in Metern zu einem Gebäude außerhalb eines Grundrisses")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Kantenlänge der Indexzellen in Metern")
+    parser.add_argument("--storage", default=STORAGE, choices=STORAGE_FORMATS,
+                        help="Format der Zwischenstände (Standard: PIPELINE_STORAGE); "
+                             "die Ausgabe wird immer auch als CSV geschrieben")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    buildings, index = load_buildings(
+        args.buildings, crs=args.crs, cell_size=args.cell_size, max_distance=args.max_distance
+    )
+    print(f"🏢 {len(index)} Gebäude geladen und indiziert ({time.perf_counter() - start:.1f} s)")
+
+    companies = read_table(args.companies, storage=args.storage)
+    start = time.perf_counter()
+    joined = join_companies_to_buildings(companies, buildings, index, args.id_column)
+    matched = joined["place_id"].notna()
+    inside = joined["Abstand Gebäude (m)"] == 0
+    print(
+        f"📍 {matched.sum()} von {len(joined)} Firmen zugeordnet "
+        f"({inside.sum()} innerhalb eines Grundrisses, {(matched & ~inside).sum()} nächstes Gebäude) "
+        f"in {time.perf_counter() - start:.2f} s"
+    )
+
+    write_table(joined, args.output, args.storage, export_csv=True)
+    print("✅ Gespeichert unter:", storage_path(args.output, args.storage))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Lokaler Offline-Geocoder auf Basis einer Adress-Referenzdatei.
+
+Die Referenz (z.B. ein Berliner Adressverzeichnis mit Straße, Hausnummer und
+Koordinaten als CSV oder ein entsprechender OSM-Export) wird einmal in einen
+Dictionary-Index geladen. Abfragen laufen als exakter Lookup auf
+normalisierter Straße + Hausnummer (bei bekannter PLZ zuerst mit PLZ, da
+Straßennamen in mehreren Bezirken vorkommen); bei unbekannter Straße wird auf einen
+unscharfen Vergleich mit den bekannten Straßennamen zurückgegriffen
+(z.B. "Rudower Chausee" -> "Rudower Chaussee"): zuerst über einen Index aller
+Straßennamen mit einem gelöschten Zeichen (ein Tippfehler, Lookup in
+Mikrosekunden), danach per difflib nur innerhalb gleich beginnender Namen.
+"""
+import difflib
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+import pandas as pd
+
+# Mögliche Spaltennamen in gängigen Adressdatensätzen (erste vorhandene gewinnt)
+COLUMN_CANDIDATES = {
+    "street": ["street", "strasse", "straße", "str_name", "strname", "addr:street"],
+    "housenumber": ["housenumber", "hausnummer", "hnr", "addr:housenumber"],
+    "suffix": ["hnr_zusatz", "zusatz", "suffix"],
+    "postcode": ["postcode", "plz", "addr:postcode"],
+    "lat": ["lat", "latitude", "y"],
+    "lon": ["lon", "lng", "longitude", "x"],
+}
+
+FUZZY_CUTOFF = 0.85
+
+_POSTCODE_RE = re.compile(r"\b(\d{5})\b")
+_POSTCODE_CITY_RE = re.compile(r"\b\d{5}\s+[^\d,;]+")
+_STREET_NUMBER_RE = re.compile(r"^(?P<street>.*?[^\W\d])\.?\s*(?P<number>\d+)\s*(?P<suffix>[a-z])?\b", re.IGNORECASE)
+_STREET_SUFFIX_RE = re.compile(r"(strasse|str\.?)$")
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]")
+# Segmente wie "Haus 5" oder "Raum 12" sind keine Straßen
+_NOT_A_STREET = {"haus", "gebaude", "geb", "aufgang", "raum", "etage", "ecke"}
+
+
+def normalize_street(street):
+    """'Max-Born-Straße' / 'max born str.' -> 'maxbornstr'"""
+    key = unicodedata.normalize("NFKD", str(street).casefold().replace("ß", "ss"))
+    key = "".join(c for c in key if not unicodedata.combining(c))
+    key = key.strip()
+    key = _STREET_SUFFIX_RE.sub("str", key)
+    return _NON_ALNUM_RE.sub("", key)
+
+
+def normalize_housenumber(number, suffix=""):
+    """'73', 'A' -> '73a'"""
+    number = str(number).strip()
+    if number.endswith(".0"):
+        number = number[:-2]
+    suffix = "" if suffix is None or pd.isna(suffix) else str(suffix)
+    return _NON_ALNUM_RE.sub("", (number + suffix).casefold())
+
+
+def split_address(address):
+    """
+    Zerlegt eine Adresse in (PLZ, Straßen-Schlüssel, Hausnummer-Schlüssel).
+
+    PLZ/Ort und Zusätze vor bzw. nach Kommas werden ignoriert; verwendet wird
+    das erste Segment mit Straße und Hausnummer. Bei Bereichen ("2 - 4",
+    "14/16") zählt die erste Nummer. Die PLZ ist None, wenn keine angegeben
+    ist. Ohne Straße und Hausnummer: None.
+    """
+    text = str(address).replace("+", " ")
+    postcode = _POSTCODE_RE.search(text)
+    text = _POSTCODE_CITY_RE.sub(",", text)
+    for segment in re.split(r"[,;(]", text):
+        match = _STREET_NUMBER_RE.match(segment.strip())
+        if match:
+            street = normalize_street(match.group("street"))
+            if street and street not in _NOT_A_STREET:
+                number = normalize_housenumber(match.group("number"), match.group("suffix") or "")
+                return (postcode.group(1) if postcode else None), street, number
+    return None
+
+
+def _deletions(word):
+    """Alle Varianten von `word` mit genau einem gelöschten Zeichen."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _pick_column(columns, role, explicit=None):
+    if explicit:
+        return explicit
+    lowered = {c.lower(): c for c in columns}
+    for candidate in COLUMN_CANDIDATES[role]:
+        if candidate in lowered:
+            return lowered[candidate]
+    return None
+
+
+class LocalGeocoder:
+    """In-Memory-Index (Straße, Hausnummer) -> (Latitude, Longitude)."""
+
+    def __init__(self, reference, columns=None):
+        """
+        `reference` ist ein DataFrame mit Straße, Hausnummer, Koordinaten (und
+        optional Hausnummernzusatz). `columns` bildet Rollen wie "street" oder
+        "lat" auf abweichende Spaltennamen ab.
+        """
+        columns = columns or {}
+        cols = {role: _pick_column(reference.columns, role, columns.get(role)) for role in COLUMN_CANDIDATES}
+        for role in ("street", "housenumber", "lat", "lon"):
+            if cols[role] is None:
+                raise ValueError(f"Adress-Referenz: keine Spalte für '{role}' gefunden")
+
+        street_names = reference[cols["street"]]
+        streets = street_names.map({name: normalize_street(name) for name in street_names.unique()})
+        suffixes = reference[cols["suffix"]] if cols["suffix"] else pd.Series("", index=reference.index)
+        numbers = [
+            normalize_housenumber(n, s) for n, s in zip(reference[cols["housenumber"]], suffixes)
+        ]
+        coords = list(zip(reference[cols["lat"]].astype(float), reference[cols["lon"]].astype(float)))
+        self.index = dict(zip(zip(streets, numbers), coords))
+        self.postcode_index = {}
+        if cols["postcode"]:
+            postcodes = reference[cols["postcode"]].astype(str).str.strip().str[:5]
+            self.postcode_index = dict(zip(zip(postcodes, streets, numbers), coords))
+        self.street_set = set(streets)
+        self.streets = sorted(self.street_set)
+        # Tippfehler-Index: Straßenname mit je einem gelöschten Zeichen -> Straßenname
+        self.deletions = defaultdict(set)
+        self.by_prefix = defaultdict(list)
+        for street in self.streets:
+            for variant in _deletions(street):
+                self.deletions[variant].add(street)
+            self.by_prefix[street[:2]].append(street)
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        # Caches je Instanz (ein lru_cache auf der Methode hielte jede Instanz am Leben)
+        self.match_street = lru_cache(maxsize=None)(self._match_street)
+        self.lookup = lru_cache(maxsize=100_000)(self._lookup)
+
+    @classmethod
+    def from_csv(cls, path, columns=None, **read_csv_kwargs):
+        read_csv_kwargs.setdefault("dtype", str)
+        return cls(pd.read_csv(path, **read_csv_kwargs), columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def _match_street(self, street):
+        """Unscharfer Abgleich eines unbekannten Straßen-Schlüssels (gecacht)."""
+        # Ein Zeichen fehlt, ist zu viel oder vertauscht/ersetzt (Editierdistanz 1)
+        candidates = set(self.deletions.get(street, ()))
+        for variant in _deletions(street):
+            candidates |= self.deletions.get(variant, set())
+            if variant in self.street_set:
+                candidates.add(variant)
+        if not candidates:
+            candidates = self.by_prefix.get(street[:2], ())
+        matches = difflib.get_close_matches(street, sorted(candidates), n=1, cutoff=FUZZY_CUTOFF)
+        return matches[0] if matches else None
+
+    def _lookup(self, address):
+        """
+        Gibt (Latitude, Longitude) zurück oder None, wenn die Adresse unbekannt ist.
+        Ergebnisse werden je Adresse gemerkt, die Statistik zählt jede Adresse einmal.
+        """
+        parts = split_address(address)
+        if parts is None:
+            self.misses += 1
+            return None
+        postcode, street, number = parts
+        result = self._lookup_key(postcode, street, number)
+        if result is not None:
+            self.exact_hits += 1
+            return result
+
+        fuzzy_street = self.match_street(street)
+        if fuzzy_street and fuzzy_street != street:
+            result = self._lookup_key(postcode, fuzzy_street, number)
+            if result is not None:
+                self.fuzzy_hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def _lookup_key(self, postcode, street, number):
+        numbers = [number]
+        if not number.isdigit():
+            # "73a" unbekannt -> Grundnummer "73"
+            numbers.append(number.rstrip("abcdefghijklmnopqrstuvwxyz"))
+        for n in numbers:
+            if postcode and self.postcode_index:
+                result = self.postcode_index.get((postcode, street, n))
+                if result is not None:
+                    return result
+            result = self.index.get((street, n))
+            if result is not None:
+                return result
+        return None
+
+    def stats(self):
+        return f"{self.exact_hits} exakt, {self.fuzzy_hits} unscharf, {self.misses} nicht gefunden"
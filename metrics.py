@@ -0,0 +1,303 @@
+"""
+Messwerte der Pipeline: Zeiten je Stufe, HTTP-Latenzen, Wiederholungen und
+Wartezeiten in Ratenbegrenzern.
+
+Eingeschaltet über PIPELINE_METRICS=<Ordner>. Jeder Prozess schreibt beim
+Beenden `<Ordner>/<Skriptname>.json` und `<Ordner>/<Skriptname>.prom`
+(Prometheus-Textformat, z.B. für den Textfile-Collector des node_exporter):
+
+    PIPELINE_METRICS=results/metrics python run_pipeline.py
+
+Ohne die Variable sind alle Funktionen hier fast kostenlos: `timer` gibt
+einen gemeinsamen leeren Kontext zurück, `timed` und `instrument_http` die
+Funktion bzw. Session unverändert, `count` und `observe` kehren sofort zurück.
+
+    with metrics.stage("preprocess") as stage:
+        stage.rows_in = len(df)
+        ...
+    with metrics.timer("rate_limit_wait_seconds", target="crawler", reason="pacing"):
+        time.sleep(delay)
+"""
+import atexit
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+METRICS_DIR = os.path.abspath(os.environ["PIPELINE_METRICS"]) if os.environ.get("PIPELINE_METRICS") else None
+ENABLED = METRICS_DIR is not None
+PREFIX = "pipeline_"
+# Obergrenzen der Latenz-Buckets (Sekunden)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NULL = contextlib.nullcontext()
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_stages = []
+_registered = False
+
+
+class Histogram:
+    """Kumulative Buckets wie bei Prometheus, dazu Summe und Anzahl."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _register():
+    global _registered
+    if not _registered:
+        _registered = True
+        atexit.register(write)
+
+
+def count(name, value=1, **labels):
+    """Zähler `name` mit den Labels um `value` erhöhen."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        _register()
+
+
+def observe(name, seconds, **labels):
+    """Einen Wert (Sekunden) in das Histogramm `name` eintragen."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+        _register()
+
+
+class _Timer:
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def timer(name, **labels):
+    """Kontext, dessen Dauer ins Histogramm `name` geht (auch bei Ausnahmen)."""
+    return _Timer(name, labels) if ENABLED else _NULL
+
+
+def timed(func, name, **labels):
+    """
+    `func` mit Zeitmessung je Aufruf. Die Hülle zählt außerdem `calls` und
+    `seconds` mit (z.B. um Wartezeiten eines Ratenbegrenzers herauszurechnen).
+    """
+    if not ENABLED:
+        return func
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            wrapper.calls += 1
+            wrapper.seconds += seconds
+            observe(name, seconds, **labels)
+
+    wrapper.calls = 0
+    wrapper.seconds = 0.0
+    return wrapper
+
+
+class _TimedHttp:
+    """`requests` bzw. Session mit Latenz je Anfrage und Zähler je Statuscode/Fehler."""
+
+    def __init__(self, http, target):
+        self.http = http
+        self.target = target
+
+    def get(self, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.http.get(url, **kwargs)
+        except Exception as e:
+            count("http_errors_total", target=self.target, error=type(e).__name__)
+            raise
+        finally:
+            observe("http_request_seconds", time.perf_counter() - start, target=self.target)
+        count("http_responses_total", target=self.target, status=response.status_code)
+        return response
+
+
+def instrument_http(http, target):
+    return _TimedHttp(http, target) if ENABLED else http
+
+
+# --------------------------------------------------
+# Stufen
+# --------------------------------------------------
+def _read_status(field):
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """VmHWM auf den aktuellen RSS zurücksetzen (Linux), damit die Spitze je Stufe gilt."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    peak = _read_status("VmHWM:")
+    if peak is None:
+        # ohne /proc: Spitze des ganzen Prozesses (Linux: KiB)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return peak
+
+
+class StageRecord:
+    """Messwerte einer Stufe; `rows_in` und `rows_out` setzt die Stufe selbst."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+
+    def as_dict(self):
+        return {
+            "stage": self.name, "status": self.status, "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds, "rows_in": self.rows_in, "rows_out": self.rows_out,
+            "peak_rss_bytes": self.peak_rss_bytes, "peak_rss_per_stage": self.peak_rss_per_stage,
+        }
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Wand- und CPU-Zeit, Zeilen und Spitzen-RSS einer Stufe (Status "error" bei Ausnahmen)."""
+    record = StageRecord(name)
+    if not ENABLED:
+        yield record
+        return
+    record.peak_rss_per_stage = _reset_peak_rss()
+    wall, cpu = time.perf_counter(), time.process_time()
+    record.status = "error"
+    try:
+        yield record
+        record.status = "ok"
+    finally:
+        record.wall_seconds = time.perf_counter() - wall
+        record.cpu_seconds = time.process_time() - cpu
+        record.peak_rss_bytes = peak_rss_bytes()
+        with _lock:
+            _stages.append(record)
+            _register()
+
+
+# --------------------------------------------------
+# Ausgabe
+# --------------------------------------------------
+def snapshot():
+    with _lock:
+        return {
+            "stages": [record.as_dict() for record in _stages],
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(_counters.items())],
+            "histograms": [{"name": name, "labels": dict(labels), "sum": h.sum, "count": h.count,
+                            "buckets": dict(zip(map(str, h.buckets), h.counts))}
+                           for (name, labels), h in sorted(_histograms.items())],
+        }
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def to_prometheus(data):
+    """Prometheus-Textformat aus `snapshot()`."""
+    lines = []
+    gauges = [("stage_wall_seconds", "wall_seconds"), ("stage_cpu_seconds", "cpu_seconds"),
+              ("stage_rows_in", "rows_in"), ("stage_rows_out", "rows_out"),
+              ("stage_peak_rss_bytes", "peak_rss_bytes")]
+    for metric, field in gauges:
+        values = [(s, s[field]) for s in data["stages"] if s[field] is not None]
+        if values:
+            lines.append(f"# TYPE {PREFIX}{metric} gauge")
+            lines += [f"{PREFIX}{metric}{_labels([('stage', s['stage']), ('status', s['status'])])} {v}"
+                      for s, v in values]
+
+    typed = set()
+    for counter in data["counters"]:
+        name = PREFIX + counter["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_labels(sorted(counter['labels'].items()))} {counter['value']}")
+
+    for h in data["histograms"]:
+        name = PREFIX + h["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        labels = sorted(h["labels"].items())
+        for bound, n in h["buckets"].items():
+            lines.append(f"{name}_bucket{_labels(labels + [('le', bound)])} {n}")
+        lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {h['count']}")
+        lines.append(f"{name}_sum{_labels(labels)} {h['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write(name=None):
+    """Schreibt `<Name>.json` und `<Name>.prom` nach PIPELINE_METRICS (Standard: Name des Skripts)."""
+    if not ENABLED:
+        return
+    name = name or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    data = {"name": name, "pid": os.getpid(), "written_at": time.time(), **snapshot()}
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    base = os.path.join(METRICS_DIR, name)
+    _write_atomic(base + ".json", json.dumps(data, ensure_ascii=False, indent=2))
+    _write_atomic(base + ".prom", to_prometheus(data))
@@ -0,0 +1,143 @@
+"""
+Alle Stufen in einem Prozess. run_pipeline.py startet jedes Skript als
+eigenen Prozess und verbindet sie über Dateien; hier gehen die Tabellen als
+DataFrames von Stufe zu Stufe, und geschrieben werden nur die gewünschten
+Ergebnisse (Zwischenstände im Format von PIPELINE_STORAGE):
+
+    python pipeline.py                                   # nur companies_area_and_units_per_cluster.csv
+    python pipeline.py --outputs processed area cube
+    python pipeline.py --crawl --crawl-args "--async"    # vorher crawlen
+
+Aus Python:
+    from pipeline import run_all
+    tables = run_all(outputs=[])    # nichts schreiben, alle Tabellen zurück
+
+Die Stufen selbst sind Funktionen der Skripte: `geocode`, `preprocess`,
+`assign_clusters`, `join_companies_to_buildings` und `area_per_cluster`.
+Caches und Memos der Stufen (Geocode-Cache, Cluster-Memo, AreaStore, ...)
+werden wie bei den Skripten fortgeschrieben.
+"""
+import argparse
+import os
+import shlex
+import time
+
+import assign_company_to_cluster as cluster_stage
+import build_area_cube as cube_stage
+import get_area_per_type_of_use as area_stage
+import get_company_geo_data as geo_stage
+import join_companies_to_buildings as join_stage
+import preprocess_companies as preprocess_stage
+from area_cube import AreaCube
+from building_index import load_buildings
+from table_storage import read_table, storage_path, table_exists, write_table
+
+# Ergebnisse, die run_all schreiben kann (Pfade wie in den Skripten)
+OUTPUTS = {
+    "geodata": geo_stage.companies_geodata,
+    "preprocessed": preprocess_stage.results_path,
+    "processed": cluster_stage.companies_assigned_cluster_path,
+    "joined": join_stage.joined_path,
+    "area": area_stage.output_path,
+    "cube": cube_stage.cube_path,
+}
+
+
+def run_all(outputs=("area",), crawl_args=None, buildings_path=join_stage.buildings_path):
+    """
+    geocode -> preprocess -> cluster -> join -> area (und cube) in einem Prozess.
+
+    Mit `crawl_args` (Liste, auch leer) wird vorher gecrawlt. Der Join läuft
+    nur, wenn `buildings_path` existiert, sonst liest area wie das Skript das
+    frühere Join-Ergebnis bzw. den manuellen Export; gibt es beides nicht,
+    endet der Lauf nach den Clustern. Schreibt nur `outputs`
+    (Schlüssel von OUTPUTS) und gibt alle Tabellen als {Name: DataFrame} zurück.
+    """
+    unknown = sorted(set(outputs) - set(OUTPUTS))
+    if unknown:
+        raise ValueError(f"Unbekannte Ergebnisse {unknown}, möglich sind {list(OUTPUTS)}")
+    tables = {}
+
+    def step(name, func, *args):
+        start = time.perf_counter()
+        tables[name] = func(*args)
+        print(f"⏱️  {name}: {time.perf_counter() - start:.2f} s")
+        return tables[name]
+
+    def crawl():
+        if crawl_args is not None:
+            import crawl_enterprizes_Adlershof as crawler
+
+            crawler.main(list(crawl_args))
+        return read_table(geo_stage.companies_path, storage="csv")
+
+    df = step("companies", crawl)
+    df = step("geodata", geo_stage.geocode, df)
+    df = step("preprocessed", preprocess_stage.preprocess, df)
+    df = step("processed", cluster_stage.assign_clusters, df)
+
+    if os.path.exists(buildings_path):
+        def join(companies):
+            buildings, index = load_buildings(buildings_path)
+            return join_stage.join_companies_to_buildings(companies, buildings, index)
+
+        df = step("joined", join, df)
+        area_input = df[[c for c in area_stage.cols if c in df.columns]]
+        # Kategorien wie beim Lesen der Datei: nur vorkommende Werte, sortiert
+        clusters = area_input["Cluster"].cat.remove_unused_categories()
+        area_input = area_input.assign(Cluster=clusters.cat.reorder_categories(sorted(clusters.cat.categories)))
+    elif "joined" in outputs:
+        raise ValueError(f"'joined' verlangt, aber keine Gebäude unter {buildings_path}")
+    elif has_area_input():
+        area_input = area_stage.read_area_input()
+    elif {"area", "cube"} & set(outputs):
+        raise ValueError(f"Flächen verlangt, aber weder Gebäude unter {buildings_path} noch ein Export")
+    else:
+        # Standort ohne Gebäudedaten: Firmen und Cluster, aber keine Flächen
+        return _write_outputs(tables, outputs)
+
+    step("area", area_stage.area_per_cluster, area_input)
+    if "cube" in outputs:
+        step("cube", AreaCube.build, area_input)
+
+    return _write_outputs(tables, outputs)
+
+
+def has_area_input():
+    """Gibt es ohne Join ein früheres Join-Ergebnis oder einen manuellen Export?"""
+    return table_exists(area_stage.joined_path) or bool(area_stage.input_path)
+
+
+def _write_outputs(tables, outputs):
+    for name in outputs:
+        path = OUTPUTS[name]
+        if name == "area":
+            tables[name].to_csv(path, index=False)
+        elif name == "cube":
+            tables[name].save(path)
+        else:
+            # Endergebnisse der Skripte (processed, joined) zusätzlich als CSV
+            write_table(tables[name], path, export_csv=name in ("processed", "joined"))
+            path = storage_path(path)
+        print(f"✅ {name} gespeichert unter: {path}")
+    return tables
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Alle Stufen in einem Prozess ausführen.")
+    parser.add_argument("--outputs", nargs="*", default=["area"], choices=list(OUTPUTS),
+                        help="zu schreibende Ergebnisse (Standard: area)")
+    parser.add_argument("--crawl", action="store_true", help="vorher crawlen")
+    parser.add_argument("--crawl-args", default="", help="Argumente für den Crawler, z.B. \"--async --concurrency 8\"")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    run_all(args.outputs, shlex.split(args.crawl_args) if args.crawl else None)
+    print(f"Fertig in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
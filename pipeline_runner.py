@@ -0,0 +1,276 @@
+"""
+Stufen der Pipeline als DAG mit Cache über Fingerabdrücke (für run_pipeline.py).
+
+Jede Stufe (`Stage`) nennt ihr Skript, ihre Eingabe- und Ausgabedateien,
+ihre Vorgänger und die Umgebungsvariablen, die ihr Ergebnis bestimmen. Der
+Fingerabdruck ist ein SHA-256 über den Inhalt der Eingaben, den Code (Skript
+plus alle lokal importierten Module) und die Parameter. Stimmt er mit dem
+letzten erfolgreichen Lauf überein und sind dessen Ausgaben unverändert
+vorhanden, wird die Stufe übersprungen. Ändert ein neuer Lauf die Ausgaben
+nicht, bleiben auch die Nachfolger Treffer. Stufen, deren Vorgänger fertig
+sind, laufen gleichzeitig als eigene Prozesse.
+"""
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+CACHE_VERSION = 1
+HASH_BLOCK = 1 << 20
+# Läufe je Stufe, die im Cache bleiben (z.B. CSV- und Parquet-Lauf nebeneinander)
+KEEP_RECORDS = 8
+
+# Status einer Stufe im Bericht
+HIT = "Treffer"
+ADOPTED = "übernommen"
+RAN = "ausgeführt"
+PLANNED = "würde laufen"
+FAILED = "fehlgeschlagen"
+SKIPPED = "übersprungen"
+
+
+class Stage:
+    """
+    Eine Stufe: `script` wird mit `args` im Projektordner ausgeführt, `env`
+    (Umgebungsvariablen) wird übergeben und geht in den Fingerabdruck ein.
+    Mit `adopt_existing` gelten vorhandene Ausgaben ohne Cache-Eintrag als
+    gültig (z.B. heruntergeladene Crawl- und Geodaten statt Schritt 1 und 2).
+    Mit `max_age` (Sekunden) ist ein Cache-Eintrag danach abgelaufen, auch bei
+    gleichem Fingerabdruck (z.B. der Crawl, dessen Eingabe die Website ist).
+    """
+
+    def __init__(self, name, script, args=(), inputs=(), outputs=(), deps=(), env=None, adopt_existing=False,
+                 max_age=None):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.env = dict(env or {})
+        self.adopt_existing = adopt_existing
+        self.max_age = max_age
+
+
+def local_modules(script, root):
+    """Skript plus alle (auch erst in Funktionen) importierten Module aus `root`, sortiert."""
+    seen = set()
+    todo = [os.path.join(root, script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(root, name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    todo.append(candidate)
+    return sorted(seen)
+
+
+def topological_order(stages):
+    """Stufen so sortiert, dass Vorgänger zuerst kommen (ValueError bei Zyklen oder unbekannten Vorgängern)."""
+    by_name = {stage.name: stage for stage in stages}
+    order, state = [], {}
+
+    def visit(stage):
+        if state.get(stage.name) == "fertig":
+            return
+        if state.get(stage.name) == "aktiv":
+            raise ValueError(f"Zyklus in der Pipeline bei Stufe {stage.name!r}")
+        state[stage.name] = "aktiv"
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stufe {stage.name!r} hängt von unbekannter Stufe {dep!r} ab")
+            visit(by_name[dep])
+        state[stage.name] = "fertig"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+
+class StageCache:
+    """
+    `pipeline_cache.json`: je Stufe die Fingerabdrücke der letzten erfolgreichen
+    Läufe mit den Hashes ihrer Ausgaben, je Datei der Hash zu (Größe, mtime),
+    damit unveränderte große Dateien nicht jedes Mal neu gelesen werden.
+    """
+
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.files = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.files = data["files"]
+                self.stages = data["stages"]
+
+    def _key(self, path):
+        return os.path.relpath(path, self.root)
+
+    def file_hash(self, path):
+        """SHA-256 des Inhalts, None wenn die Datei fehlt."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = self._key(path)
+        with self._lock:
+            known = self.files.get(key)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+        with self._lock:
+            self.files[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def fingerprint(self, stage):
+        parts = {
+            "code": {self._key(p): self.file_hash(p) for p in local_modules(stage.script, self.root)},
+            "inputs": {self._key(p): self.file_hash(p) for p in stage.inputs},
+            "args": stage.args,
+            "env": stage.env,
+        }
+        text = json.dumps([stage.name, parts], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def lookup(self, stage, fingerprint):
+        """HIT, ADOPTED (noch mit `record` einzutragen) oder None (Stufe muss laufen)."""
+        records = self.stages.get(stage.name, [])
+        if not records:
+            if stage.adopt_existing and stage.outputs and all(os.path.exists(p) for p in stage.outputs):
+                return ADOPTED
+            return None
+        wanted = sorted(self._key(p) for p in stage.outputs)
+        for record in records:
+            if record["fingerprint"] != fingerprint or sorted(record["outputs"]) != wanted:
+                continue
+            if stage.max_age is not None and time.time() - record.get("recorded_at", 0) > stage.max_age:
+                continue
+            if all(self.file_hash(p) == record["outputs"][self._key(p)] for p in stage.outputs):
+                return HIT
+        return None
+
+    def record(self, stage, fingerprint):
+        missing = [p for p in stage.outputs if not os.path.exists(p)]
+        if missing:
+            raise FileNotFoundError(f"Stufe {stage.name!r} hat {missing} nicht geschrieben")
+        outputs = {self._key(p): self.file_hash(p) for p in stage.outputs}
+        with self._lock:
+            records = [r for r in self.stages.get(stage.name, []) if r["fingerprint"] != fingerprint]
+            records.append({"fingerprint": fingerprint, "outputs": outputs, "recorded_at": time.time()})
+            self.stages[stage.name] = records[-KEEP_RECORDS:]
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files, "stages": self.stages}, f,
+                      ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def run_script(stage, root, log_path):
+    """Führt das Skript der Stufe als eigenen Prozess aus, Ausgabe ins Log. Gibt den Exit-Code zurück."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1", **stage.env)
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.run(
+            [sys.executable, stage.script, *stage.args],
+            cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    return process.returncode
+
+
+def _tail(path, lines=20):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return "".join(f.readlines()[-lines:])
+
+
+def run_stages(stages, cache, root, log_dir, jobs=2, force=(), dry_run=False):
+    """
+    Führt die Stufen in Abhängigkeitsreihenfolge aus, bis zu `jobs` gleichzeitig.
+    Stufen in `force` laufen unabhängig vom Cache. Gibt je Stufe einen Bericht
+    {"stage", "status", "seconds", "fingerprint"} in Startreihenfolge zurück.
+    """
+    order = topological_order(stages)
+    os.makedirs(log_dir, exist_ok=True)
+    results = {}
+
+    def process(stage):
+        start = time.perf_counter()
+        fingerprint = cache.fingerprint(stage)
+        status = None if stage.name in force else cache.lookup(stage, fingerprint)
+        if status == ADOPTED and not dry_run:
+            cache.record(stage, fingerprint)
+        elif status is None and dry_run:
+            status = PLANNED
+        elif status is None:
+            log_path = os.path.join(log_dir, f"{stage.name}.log")
+            if run_script(stage, root, log_path) != 0:
+                print(f"❌ {stage.name} fehlgeschlagen, Ende von {log_path}:\n{_tail(log_path)}")
+                status = FAILED
+            else:
+                cache.record(stage, fingerprint)
+                status = RAN
+        seconds = time.perf_counter() - start
+        icon = {HIT: "⏩", ADOPTED: "⏩", RAN: "✅", PLANNED: "📝"}.get(status, "❌")
+        print(f"{icon} {stage.name}: {status} ({seconds:.2f} s)")
+        return {"stage": stage.name, "status": status, "seconds": seconds, "fingerprint": fingerprint}
+
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        while pending or running:
+            for stage in list(pending):
+                if any(dep not in results for dep in stage.deps):
+                    continue
+                pending.remove(stage)
+                dep_status = [results[dep]["status"] for dep in stage.deps]
+                if FAILED in dep_status or SKIPPED in dep_status:
+                    print(f"⏭️  {stage.name}: übersprungen (Vorgänger fehlgeschlagen)")
+                    results[stage.name] = {"stage": stage.name, "status": SKIPPED, "seconds": 0.0, "fingerprint": None}
+                elif dry_run and PLANNED in dep_status:
+                    # Eingaben entstehen erst im Lauf des Vorgängers
+                    print(f"📝 {stage.name}: {PLANNED} (nach Vorgänger)")
+                    results[stage.name] = {"stage": stage.name, "status": PLANNED, "seconds": 0.0, "fingerprint": None}
+                else:
+                    running[executor.submit(process, stage)] = stage.name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+    return [results[stage.name] for stage in order]
+
+
+def print_report(report, total_seconds):
+    hits = sum(r["status"] in (HIT, ADOPTED) for r in report)
+    misses = sum(r["status"] in (RAN, PLANNED, FAILED) for r in report)
+    width = max((len(r["stage"]) for r in report), default=0)
+    print()
+    for r in report:
+        print(f"  {r['stage']:<{width}}  {r['status']:<14} {r['seconds']:8.2f} s")
+    print(f"🧮 Cache: {hits} Treffer, {misses} Fehlschläge, Gesamtzeit {total_seconds:.2f} s")
@@ -1,192 +1,76 @@
-import pandas as pd
 import os
-import re
-import string
 
+import pandas as pd
+
+import metrics
+from address_expansion import expand_addresses, expand_table_in_chunks
+from site_profiles import OUTPUT_PREFIX, PROFILE, RESULTS_PATH
+from table_storage import iter_table_chunks, read_table, storage_path, write_table
 
-THIS_PATH = os.path.dirname(os.path.abspath(__file__))
 
+# Ergebnisse des Standorts (PIPELINE_SITE, siehe site_profiles.py)
 input_path = os.path.join(
-    THIS_PATH,
-    "results",
-    "adlershof_companies_geodata.csv"
+    RESULTS_PATH,
+    f"{OUTPUT_PREFIX}_companies_geodata.csv"
 )
 
 results_path = os.path.join(
-    THIS_PATH,
-    "results",
-    "adlershof_companies_geodata_preprocessed.csv"
+    RESULTS_PATH,
+    f"{OUTPUT_PREFIX}_companies_geodata_preprocessed.csv"
 )
 
+# PREPROCESS_CHUNK_SIZE=50000: Eingabe chunkweise lesen und Ausgabe stückweise
+# anhängen (Speicher begrenzt durch die Chunk-Größe statt durch die Dateigröße)
+chunk_size = int(os.environ.get("PREPROCESS_CHUNK_SIZE", "0"))
+# Bereiche wie "1 - 200" mit mehr Einträgen werden nicht aufgespalten (Warnung).
+# Ohne PREPROCESS_MAX_EXPANSION keine Grenze wie bisher, nur im Chunk-Modus
+# 100, damit ein Bereich den Speicher je Chunk nicht sprengt
+CHUNKED_MAX_EXPANSION = 100
+max_expansion = os.environ.get("PREPROCESS_MAX_EXPANSION")
+if max_expansion:
+    max_expansion = int(max_expansion)
+else:
+    max_expansion = CHUNKED_MAX_EXPANSION if chunk_size > 0 else None
+# "PLZ Ort" für Adressen ohne Postleitzahl (z.B. "12489 Berlin")
+address_prefix = PROFILE.address_prefix
 
-# --------------------------------------------------
-# 1. CSV einlesen
-# --------------------------------------------------
-df = pd.read_csv(input_path, sep=",")
-
-
-
-# --------------------------------------------------
-# 2. Adresse preprocessing
-# --------------------------------------------------
-
-def clean_and_expand_adresse(row):
-    adresse = str(row["Adresse"]).strip()
-
-    # ------------------------------------------
-    # Fix typo
-    # ------------------------------------------
-    adresse = adresse.replace("Chausee", "Chaussee")
-
-    # ------------------------------------------
-    # Add missing PLZ if not present
-    # ------------------------------------------
-    if not re.match(r"^\d{5}\s", adresse):
-        adresse = f"12489 Berlin {adresse}"
-
-    # ------------------------------------------
-    # Remove company prefix after "Berlin"
-    # Example:
-    # 12489 Berlin ZPV, Johann-Hittorf-Straße 8
-    # Only if what follows comma contains a number
-    # ------------------------------------------
-    match = re.match(r"^(\d{5}\sBerlin)\s([^,]+),\s(.+)", adresse)
-    if match and "Haus" not in match.string and "OG" not in match.string:
-        plz_part = match.group(1)
-        after_comma = match.group(3)
-
-        if re.search(r"\d", after_comma):
-            adresse = f"{plz_part} {after_comma}"
-
-    # ------------------------------------------
-    # Remove everything after first comma
-    # (this fixes Haus, OG, company prefixes, etc.)
-    # ------------------------------------------
-    adresse = adresse.split(",")[0].strip()
-
-    # ------------------------------------------
-    # Remove everything after "("
-    # ------------------------------------------
-    adresse = adresse.split("(")[0].strip()
-
-    # ------------------------------------------
-    # Remove "/ Ecke ..."
-    # ------------------------------------------
-    adresse = re.sub(r"\s*/\s*Ecke.*", "", adresse).strip()
-
-    # ------------------------------------------
-    # Add missing PLZ if not present
-    # ------------------------------------------
-    if not re.match(r"^\d{5}\s", adresse):
-        adresse = f"12489 Berlin {adresse}"
-
-    # ==================================================
-    # SPLITTING CASES
-    # ==================================================
-
-    # ------------------------------------------
-    # Case 1: Multiple addresses separated by ";"
-    # ------------------------------------------
-    if ";" in adresse:
-        parts = [part.strip() for part in adresse.split(";")]
-        new_rows = []
-
-        for part in parts:
-            if not re.match(r"^\d{5}\s", part):
-                part = f"12489 Berlin {part}"
-
-            new_row = row.copy()
-            new_row["Adresse"] = part
-            new_rows.append(new_row)
-
-        return new_rows
-
-    # ------------------------------------------
-    # Case 2: Number range "2 - 4"
-    # ------------------------------------------
-    range_match = re.search(r"(\d+)\s*-\s*(\d+)", adresse)
-    if range_match:
-        start = int(range_match.group(1))
-        end = int(range_match.group(2))
-        prefix = adresse[:range_match.start()].strip()
-
-        return [
-            create_row(row, f"{prefix} {n}")
-            for n in range(start, end + 1)
-        ]
-
-    # ------------------------------------------
-    # Case 3: "16 und 18"
-    # ------------------------------------------
-    und_match = re.search(r"(\d+)\s*und\s*(\d+)", adresse)
-    if und_match:
-        num1, num2 = und_match.groups()
-        prefix = adresse[:und_match.start()].strip()
-
-        return [
-            create_row(row, f"{prefix} {num1}"),
-            create_row(row, f"{prefix} {num2}")
-        ]
-
-    # ------------------------------------------
-    # Case 4: "14/16"
-    # ------------------------------------------
-    slash_match = re.search(r"(\d+)\s*/\s*(\d+)", adresse)
-    if slash_match:
-        num1, num2 = slash_match.groups()
-        prefix = adresse[:slash_match.start()].strip()
-
-        return [
-            create_row(row, f"{prefix} {num1}"),
-            create_row(row, f"{prefix} {num2}")
-        ]
-
-    # ------------------------------------------
-    # Case 5: "73 A-E"
-    # ------------------------------------------
-    letter_range_match = re.search(r"(\d+)\s*([A-Z])\s*-\s*([A-Z])", adresse)
-    if letter_range_match:
-        number, start_letter, end_letter = letter_range_match.groups()
-        prefix = adresse[:letter_range_match.start()].strip()
-
-        letters = list(string.ascii_uppercase)
-        start_index = letters.index(start_letter)
-        end_index = letters.index(end_letter)
-
-        return [
-            create_row(row, f"{prefix} {number} {letter}")
-            for letter in letters[start_index:end_index + 1]
-        ]
-
-    # ------------------------------------------
-    # Default case
-    # ------------------------------------------
-    row["Adresse"] = adresse
-    return [row]
-
-
-def create_row(original_row, new_address):
-    new_row = original_row.copy()
-    new_row["Adresse"] = new_address
-    return new_row
 
+# PIPELINE_STORAGE=parquet: Zwischenstände als Parquet statt CSV (table_storage.py)
 
 # --------------------------------------------------
-# 3. Apply transformation
+# 1. + 3. Aufspalten
 # --------------------------------------------------
+# Regeln und Aufspaltung (Bereiche "2 - 4", "16 und 18", "14/16", "73 A-E",
+# ";"-Listen) stehen in address_expansion.py
+def preprocess(df, max_expansion=max_expansion, prefix=address_prefix):
+    """Eine Zeile je Hausnummer (Tabelle von get_company_geo_data.py)."""
+    with metrics.stage("preprocess") as stage:
+        stage.rows_in = len(df)
+        if not isinstance(df["Branchenzweig"].dtype, pd.CategoricalDtype):
+            # Branchenzweig als Categorical: die Index-Wiederholung kopiert nur Codes
+            df = df.astype({"Branchenzweig": "category"})
+        # spaltenweise je eindeutiger Adresse, Zeilen per Index-Wiederholung
+        df = expand_addresses(df, max_expansion, prefix)
+        stage.rows_out = len(df)
+    return df
 
-processed_rows = []
-
-for _, row in df.iterrows():
-    expanded = clean_and_expand_adresse(row)
-    processed_rows.extend(expanded)
-
-df = pd.DataFrame(processed_rows).reset_index(drop=True)
-
-df.to_csv(results_path, index=False)
 
 # --------------------------------------------------
-# 4. Result
+# 2. + 4. Einlesen, speichern und Result
 # --------------------------------------------------
-
-print(df.head())
+def main():
+    if chunk_size > 0:
+        with metrics.stage("preprocess") as stage:
+            written = stage.rows_out = expand_table_in_chunks(input_path, results_path, chunk_size, max_expansion,
+                                                              prefix=address_prefix)
+        print(f"✅ {written} Zeilen chunkweise geschrieben nach {storage_path(results_path)}")
+        df = next(iter_table_chunks(results_path, 5), pd.DataFrame())
+    else:
+        df = preprocess(read_table(input_path, dtype={"Branchenzweig": "category"}))
+        write_table(df, results_path)
+
+    print(df.head())
+
+
+if __name__ == "__main__":
+    main()
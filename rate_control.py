@@ -0,0 +1,268 @@
+"""
+Adaptive Ratenbegrenzung je Host, gemeinsam für Crawler und Geocoder.
+
+Ein Token-Bucket (virtuelle Zeitplanung: jede Anfrage bekommt einen
+Startzeitpunkt, höchstens `burst` Anfragen dürfen aufholen) mit AIMD-Anpassung
+der Rate wie bei TCP:
+  - jede erfolgreiche Anfrage erhöht die Rate additiv, um `increase` Anfragen/s
+    je Sekunde ungebremsten Betriebs, höchstens bis `max_rate`
+  - eine Drosselung (429, 503, Zeitüberschreitung, siehe `throttle_statuses`)
+    oder deutlich gestiegene Latenz halbiert sie (`decrease`), höchstens einmal
+    je Fenster: Antworten auf Anfragen, die vor der letzten Senkung losgingen,
+    senken nicht noch einmal
+  - `Retry-After` sperrt den Host bis zum genannten Zeitpunkt
+
+`max_rate` ist eine harte Obergrenze (z.B. 1 Anfrage/s beim öffentlichen
+Nominatim), `min_rate` die Untergrenze. Gelernte Raten speichert `RateStore`
+je Host zwischen den Läufen:
+
+    store = RateStore("results/rate_limits.json")
+    limiter = AdaptiveRateLimiter.for_url(url, rate=1, max_rate=5, store=store)
+    http = RateControlledHttp(requests.Session(), limiter)
+    html = http.get(url).text          # wartet, wiederholt 429/503, passt die Rate an
+    store.save(limiter)
+"""
+import asyncio
+import email.utils
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import metrics
+
+# Antworten, die als Drosselung gelten
+THROTTLE_STATUSES = (429, 503)
+# längste Sperre aus Retry-After (Sekunden), falls ein Server Unsinn schickt
+MAX_RETRY_AFTER = 600
+# gelernte Raten, die älter sind, werden nicht mehr übernommen (Sekunden)
+STORE_TTL = 30 * 24 * 3600
+
+
+def parse_retry_after(value, now=None):
+    """Sekunden aus einem Retry-After-Header (Sekunden oder HTTP-Datum), None wenn nicht lesbar."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - (now or time.time()), 0.0)
+
+
+def host_of(url):
+    return urlsplit(url).netloc or url
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-Bucket mit AIMD-Anpassung für einen Host (thread-sicher, auch aus asyncio nutzbar).
+
+    `acquire()` wartet auf den nächsten Startzeitpunkt und gibt ihn zurück;
+    danach meldet der Aufrufer das Ergebnis mit `success(sent_at, latency)`
+    oder `throttled(sent_at, status, retry_after)`.
+    """
+
+    def __init__(self, name, rate, max_rate, min_rate=None, burst=1, increase=None, decrease=0.5,
+                 latency_factor=3.0, throttle_statuses=THROTTLE_STATUSES + ("timeout",), target=None):
+        if max_rate <= 0:
+            raise ValueError("max_rate muss positiv sein")
+        self.name = name
+        self.target = target or name
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate if min_rate is not None else max_rate / 100)
+        self.initial_rate = float(rate)
+        self.rate = min(max(float(rate), self.min_rate), self.max_rate)
+        self.burst = burst
+        # Standard: in etwa 20 s von 0 bis zur Obergrenze
+        self.increase = increase if increase is not None else self.max_rate / 20
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.throttle_statuses = tuple(throttle_statuses)
+
+        self._lock = threading.Lock()
+        self._next = 0.0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._latency_fast = None
+        self._latency_slow = None
+        self.requests = 0
+        self.throttles = 0
+        self.decreases = 0
+        self.waited = 0.0
+
+    @classmethod
+    def for_url(cls, url, rate, max_rate, store=None, **settings):
+        """Begrenzer für den Host von `url`; mit `store` startet er bei der zuletzt gelernten Rate."""
+        limiter = cls(host_of(url), rate, max_rate, **settings)
+        if store is not None:
+            store.restore(limiter)
+        return limiter
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = min(max(float(rate), self.min_rate), self.max_rate)
+
+    # --------------------------------------------------
+    # Warten
+    # --------------------------------------------------
+    def _reserve(self):
+        """Reserviert den nächsten Startzeitpunkt; gibt (Wartezeit, Startzeitpunkt, gesperrt) zurück."""
+        with self._lock:
+            now = time.monotonic()
+            blocked = self._blocked_until > now
+            # höchstens `burst` Anfragen aufholen, nie vor Ablauf einer Sperre
+            start = max(self._next, now - (self.burst - 1) / self.rate, self._blocked_until)
+            self._next = start + 1 / self.rate
+            self.requests += 1
+            return max(start - now, 0.0), start, blocked
+
+    def _waited(self, seconds, blocked):
+        self.waited += seconds
+        reason = "retry_after" if blocked else "pacing"
+        metrics.observe("rate_limit_wait_seconds", seconds, target=self.target, reason=reason)
+
+    def acquire(self):
+        """Blockiert bis zum nächsten freien Startzeitpunkt und gibt ihn zurück (time.monotonic)."""
+        while True:
+            wait, start, blocked = self._reserve()
+            if wait:
+                time.sleep(wait)
+            self._waited(wait, blocked)
+            # während des Wartens kam eine neue Sperre (Retry-After): neu einreihen
+            if self._blocked_until <= start:
+                return start
+
+    async def acquire_async(self):
+        """Wie `acquire`, wartet aber mit asyncio.sleep."""
+        while True:
+            wait, start, blocked = self._reserve()
+            if wait:
+                await asyncio.sleep(wait)
+            self._waited(wait, blocked)
+            if self._blocked_until <= start:
+                return start
+
+    # --------------------------------------------------
+    # Rückmeldung
+    # --------------------------------------------------
+    def _decrease(self, sent_at):
+        # nur einmal je Fenster: ältere Anfragen haben die alte Rate schon gesehen
+        if sent_at < self._last_decrease:
+            return
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+
+    def success(self, sent_at, latency=None):
+        """Erfolgreiche Antwort: Rate additiv erhöhen, bei stark gestiegener Latenz senken."""
+        with self._lock:
+            if latency is not None and self.latency_factor:
+                if self._latency_fast is None:
+                    self._latency_fast = self._latency_slow = latency
+                # schneller und langsamer gleitender Mittelwert: Anstieg gegenüber dem üblichen Niveau
+                self._latency_fast += 0.3 * (latency - self._latency_fast)
+                self._latency_slow += 0.02 * (latency - self._latency_slow)
+                if self._latency_fast > self.latency_factor * self._latency_slow:
+                    self._decrease(sent_at)
+                    return
+            self.rate = min(self.rate + self.increase / self.rate, self.max_rate)
+
+    def throttled(self, sent_at, status, retry_after=None):
+        """
+        Drosselung oder Fehler: `status` ist der HTTP-Status oder "timeout".
+        Senkt die Rate, wenn der Status in `throttle_statuses` steht, und
+        sperrt den Host für `retry_after` Sekunden.
+        """
+        with self._lock:
+            self.throttles += 1
+            if status in self.throttle_statuses:
+                self._decrease(sent_at)
+            if retry_after:
+                until = time.monotonic() + min(retry_after, MAX_RETRY_AFTER)
+                self._blocked_until = max(self._blocked_until, until)
+        metrics.count("throttled_total", target=self.target, status=status)
+
+    def stats(self):
+        return (f"{self.name}: {self.rate:.2f} Anfragen/s (Start {self.initial_rate:.2f}, max {self.max_rate:g}), "
+                f"{self.requests} Anfragen, {self.throttles} gedrosselt, {self.decreases} Senkungen, "
+                f"{self.waited:.1f} s Wartezeit (Summe über alle Anfragen)")
+
+
+class RateStore:
+    """Gelernte Raten je Host als JSON-Datei: {Host: {"rate": ..., "updated_at": ...}}."""
+
+    def __init__(self, path, ttl=STORE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def restore(self, limiter):
+        """Übernimmt die gespeicherte Rate (innerhalb der aktuellen Grenzen), falls nicht zu alt."""
+        entry = self._read().get(limiter.name)
+        if entry and time.time() - entry.get("updated_at", 0) < self.ttl:
+            limiter.set_rate(entry["rate"])
+            limiter.initial_rate = limiter.rate
+            return True
+        return False
+
+    def save(self, *limiters):
+        """Schreibt die aktuellen Raten; Einträge anderer Hosts bleiben erhalten."""
+        data = self._read()
+        for limiter in limiters:
+            data[limiter.name] = {"rate": limiter.rate, "updated_at": time.time()}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class RateControlledHttp:
+    """
+    `requests` bzw. Session, deren Anfragen über einen `AdaptiveRateLimiter`
+    laufen. 429/503 und Verbindungsfehler werden bis zu `max_retries` Mal
+    wiederholt; bleibt es dabei, wird die Antwort als HTTPError bzw. der
+    Fehler weitergereicht.
+    """
+
+    def __init__(self, http, limiter, max_retries=3):
+        self.http = http
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def get(self, url, **kwargs):
+        attempt = 0
+        while True:
+            sent_at = self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.http.get(url, **kwargs)
+            except OSError:
+                # requests.RequestException ist ein OSError (Timeout, Verbindungsabbruch)
+                self.limiter.throttled(sent_at, "timeout")
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in THROTTLE_STATUSES:
+                    self.limiter.success(sent_at, time.perf_counter() - start)
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.limiter.throttled(sent_at, response.status_code, retry_after)
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+            attempt += 1
+            metrics.count("retries_total", target=self.limiter.target)
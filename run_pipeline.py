@@ -0,0 +1,164 @@
+"""
+Führt die ganze Pipeline als DAG aus und überspringt jede Stufe, deren
+Eingaben, Code und Parameter sich seit dem letzten erfolgreichen Lauf nicht
+geändert haben (siehe pipeline_runner.py):
+
+    crawl -> geocode -> preprocess -> cluster -> join -> area
+                                                     \\-> cube
+
+`join` läuft nur, wenn `raw_data/Gebäudegrunddatensatz.geojson` existiert;
+sonst lesen `area` und `cube` den manuellen GIS-Export und hängen nicht von
+den übrigen Stufen ab. Unabhängige Stufen laufen gleichzeitig. Mit
+PIPELINE_SITE läuft die Pipeline für diesen Standort (siehe site_profiles.py).
+
+    python run_pipeline.py                   # alles, was veraltet ist
+    python run_pipeline.py cluster           # nur bis einschließlich cluster
+    python run_pipeline.py --dry-run         # nur anzeigen, was laufen würde
+    python run_pipeline.py --force geocode   # geocode neu, Nachfolger nur bei geänderter Ausgabe
+"""
+import argparse
+import json
+import os
+import shlex
+import time
+
+from pipeline_runner import FAILED, SKIPPED, Stage, StageCache, print_report, run_stages
+from site_profiles import OUTPUT_PREFIX, PROFILE, RESULTS_PATH, SITES_PATH
+from table_storage import STORAGE, STORAGE_FORMATS, storage_path, table_exists
+
+THIS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+cache_path = os.path.join(RESULTS_PATH, "pipeline_cache.json")
+log_dir = os.path.join(RESULTS_PATH, "pipeline_logs")
+
+# PIPELINE_CRAWL_MAX_AGE=168: Website nach einer Woche erneut crawlen (Stunden)
+CRAWL_MAX_AGE = float(os.environ.get("PIPELINE_CRAWL_MAX_AGE", "0")) or None
+
+STAGE_NAMES = ["crawl", "geocode", "preprocess", "cluster", "join", "area", "cube"]
+
+
+def _env(*names):
+    """Umgebungsvariablen, die das Ergebnis einer Stufe bestimmen (nur gesetzte)."""
+    return {name: os.environ[name] for name in names if name in os.environ}
+
+
+def build_stages(storage=STORAGE, crawl_args=(), crawl_max_age=None):
+    """
+    Die Stufen mit ihren Dateien im Format `storage` (wie die Skripte sie lesen
+    und schreiben). Der Crawl hängt von der Website ab, nicht von lokalen
+    Dateien: ohne `crawl_max_age` (Sekunden) läuft er nur mit `--force crawl`.
+    """
+    def result(name):
+        return os.path.join(RESULTS_PATH, name)
+
+    companies = result(f"{OUTPUT_PREFIX}_companies.csv")
+    geodata = storage_path(result(f"{OUTPUT_PREFIX}_companies_geodata.csv"), storage)
+    preprocessed = storage_path(result(f"{OUTPUT_PREFIX}_companies_geodata_preprocessed.csv"), storage)
+    processed_csv = result(f"{OUTPUT_PREFIX}_companies_processed.csv")
+    joined_csv = result("companies_Gebäudegrunddatensatz_vereinigt.csv")
+    buildings = PROFILE.buildings or ""
+    manual_export = PROFILE.area_export
+    address_reference = os.environ.get("ADDRESS_REFERENCE", PROFILE.address_reference or "")
+    cluster_rules = os.environ.get("CLUSTER_RULES", os.path.join(THIS_PATH, "cluster_rules.json"))
+    # Standort: Verzeichnis, Selektoren, PLZ/Ort und Geocoder stehen in sites.json
+    storage_env = {"PIPELINE_STORAGE": storage, **_env("PIPELINE_SITE", "SITE_PROFILES")}
+
+    stages = [
+        Stage("crawl", "crawl_enterprizes_Adlershof.py", args=crawl_args, inputs=[SITES_PATH], outputs=[companies],
+              env=_env("PIPELINE_SITE", "SITE_PROFILES"), adopt_existing=True, max_age=crawl_max_age),
+        Stage("geocode", "get_company_geo_data.py",
+              inputs=[companies, SITES_PATH] + ([address_reference] if os.path.exists(address_reference) else []),
+              outputs=[geodata], deps=["crawl"],
+              env={**storage_env,
+                   **_env("ADDRESS_REFERENCE", "GEOCODER_OFFLINE", "NOMINATIM_ENDPOINTS", "NOMINATIM_PROFILE")},
+              adopt_existing=True),
+        Stage("preprocess", "preprocess_companies.py", inputs=[geodata, SITES_PATH], outputs=[preprocessed],
+              deps=["geocode"], env={**storage_env, **_env("PREPROCESS_MAX_EXPANSION", "PREPROCESS_CHUNK_SIZE")}),
+        Stage("cluster", "assign_company_to_cluster.py", inputs=[preprocessed, cluster_rules],
+              outputs=sorted({storage_path(processed_csv, storage), processed_csv}), deps=["preprocess"],
+              env={**storage_env, **_env("CLUSTER_RULES")}),
+    ]
+
+    # Eingabe von area und cube: wie in den Skripten Join-Ergebnis vor manuellem Export
+    area_deps = []
+    if os.path.exists(buildings):
+        stages.append(Stage("join", "join_companies_to_buildings.py", args=["--storage", storage],
+                            inputs=[storage_path(processed_csv, storage), buildings],
+                            outputs=sorted({storage_path(joined_csv, storage), joined_csv}), deps=["cluster"]))
+        area_input, area_deps = storage_path(joined_csv, storage), ["join"]
+    elif table_exists(joined_csv, storage):
+        area_input = storage_path(joined_csv, storage)
+    elif manual_export:
+        area_input = manual_export
+    else:
+        # Standort ohne Gebäude und ohne manuellen Export: keine Flächen
+        return stages
+
+    stages += [
+        Stage("area", "get_area_per_type_of_use.py", inputs=[area_input],
+              outputs=[result("companies_area_and_units_per_cluster.csv")], deps=area_deps,
+              env={**storage_env, **_env("AREA_CHECK")}),
+        # die Je-Cluster-Tabelle schreibt schon area
+        Stage("cube", "build_area_cube.py", args=["--storage", storage, "--per-cluster-output", ""],
+              inputs=[area_input], outputs=[result("area_cube.npz")], deps=area_deps),
+    ]
+    return stages
+
+
+def select(stages, targets):
+    """Die Zielstufen und alle ihre Vorgänger."""
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"Stufen {unknown} gibt es hier nicht (vorhanden: {list(by_name)})")
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo += by_name[name].deps
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline als DAG mit Cache je Stufe ausführen.")
+    parser.add_argument("targets", nargs="*", metavar="STUFE",
+                        help=f"Zielstufen (Standard: alle), aus {STAGE_NAMES}")
+    parser.add_argument("--force", nargs="+", default=[], choices=STAGE_NAMES, metavar="STUFE",
+                        help="diese Stufen unabhängig vom Cache ausführen")
+    parser.add_argument("--dry-run", action="store_true", help="nur anzeigen, welche Stufen laufen würden")
+    parser.add_argument("--jobs", type=int, default=2, help="Stufen gleichzeitig")
+    parser.add_argument("--storage", default=STORAGE, choices=STORAGE_FORMATS,
+                        help="Format der Zwischenergebnisse (Standard: PIPELINE_STORAGE)")
+    parser.add_argument("--crawl-args", default="", help="Argumente für den Crawler, z.B. \"--async --concurrency 8\"")
+    parser.add_argument("--crawl-max-age", type=float, default=CRAWL_MAX_AGE, metavar="STUNDEN",
+                        help="Crawl erneut ausführen, wenn der letzte älter ist (Standard: PIPELINE_CRAWL_MAX_AGE, "
+                             "sonst nie ohne --force crawl)")
+    parser.add_argument("--report", default=None, help="Bericht je Stufe zusätzlich als JSON speichern")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    crawl_max_age = args.crawl_max_age * 3600 if args.crawl_max_age else None
+    stages = build_stages(args.storage, shlex.split(args.crawl_args), crawl_max_age)
+    if args.targets:
+        stages = select(stages, args.targets)
+
+    start = time.perf_counter()
+    cache = StageCache(cache_path, THIS_PATH)
+    report = run_stages(stages, cache, THIS_PATH, log_dir, jobs=args.jobs, force=set(args.force),
+                        dry_run=args.dry_run)
+    total = time.perf_counter() - start
+    print_report(report, total)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"seconds": total, "stages": report}, f, ensure_ascii=False, indent=2)
+    if any(r["status"] in (FAILED, SKIPPED) for r in report):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
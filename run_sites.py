@@ -0,0 +1,200 @@
+"""
+Die Pipeline für mehrere Standorte aus `sites.json` gleichzeitig, ein
+Prozess je Standort (Shard), danach gemeinsame Ergebnisse:
+
+    python run_sites.py                                  # alle Standorte
+    python run_sites.py adlershof buch --jobs 2 --crawl --crawl-args "--async"
+
+Jeder Shard setzt PIPELINE_SITE und läuft mit `pipeline.run_all` in einem
+frischen Prozess, mit eigenem Ergebnisordner `results/sites/<Präfix>/`,
+eigenen Caches und dem Ratenbudget seines Profils (request_delay,
+concurrency, Nominatim-Endpunkte). Die Standorte teilen sich nichts, der
+Durchsatz wächst daher mit der Zahl der Prozesse (`--jobs`).
+
+Zusammengeführt wird in `results/sites/`:
+  - `combined_companies_processed.csv`: alle Firmen mit Spalte `Standort`
+  - `combined_companies_per_cluster.csv`: Firmen je Standort und Cluster
+  - `combined_area_and_units_per_cluster.csv`: Nutzfläche und Nutzeinheiten
+    je Standort und Cluster, dazu `Standort = "alle"` über alle Standorte
+    (Gebäude, die in mehreren Standorten vorkommen, zählen einmal)
+
+Achtung: Der öffentliche Nominatim-Server erlaubt eine Anfrage pro Sekunde
+insgesamt, nicht je Prozess. Standorte ohne `nominatim_endpoints` sollten
+nicht gleichzeitig neue Adressen geocodieren (GEOCODER_OFFLINE=1 oder eigene
+Instanzen je Standort).
+"""
+import argparse
+import multiprocessing
+import os
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+THIS_PATH = os.path.dirname(os.path.abspath(__file__))
+COMBINED_PATH = os.path.join(THIS_PATH, "results", "sites")
+COMBINED_COLUMN = "Standort"
+
+
+# --------------------------------------------------
+# 1. Ein Standort (im eigenen Prozess)
+# --------------------------------------------------
+def run_site(name, crawl_args=None):
+    """
+    Pipeline für Standort `name`; muss in einem frischen Prozess laufen, da
+    die Skripte den Standort beim Import lesen. Gibt eine Zusammenfassung
+    mit den Pfaden der Ergebnisse zurück.
+    """
+    os.environ["PIPELINE_SITE"] = name
+    if os.environ.get("PIPELINE_METRICS"):
+        # Messwerte je Standort, sonst überschreiben sich die Shards
+        os.environ["PIPELINE_METRICS"] = os.path.join(os.environ["PIPELINE_METRICS"], name)
+
+    import get_area_per_type_of_use as area_stage
+    import pipeline
+    from site_profiles import PROFILE, RESULTS_PATH
+    from table_storage import table_exists
+
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    has_buildings = bool(PROFILE.buildings) and os.path.exists(PROFILE.buildings)
+    outputs = ["processed"]
+    if has_buildings:
+        outputs.append("joined")
+    if has_buildings or pipeline.has_area_input():
+        outputs.append("area")
+
+    start = time.perf_counter()
+    tables = pipeline.run_all(outputs, crawl_args, buildings_path=PROFILE.buildings or "")
+    if has_buildings or table_exists(area_stage.joined_path):
+        area_source = (area_stage.joined_path, None)
+    else:
+        area_source = (area_stage.input_path, "csv") if "area" in outputs else None
+    return {
+        "site": name,
+        "seconds": time.perf_counter() - start,
+        "companies": len(tables["companies"]),
+        "rows": len(tables["processed"]),
+        "processed": pipeline.OUTPUTS["processed"],
+        "area_source": area_source,
+    }
+
+
+# --------------------------------------------------
+# 2. Zusammenführen
+# --------------------------------------------------
+def merge_sites(summaries, output_path=COMBINED_PATH):
+    """Gemeinsame Firmen-, Cluster- und Flächentabellen aller Standorte."""
+    import pandas as pd
+
+    from area_aggregation import aggregate_area
+    from get_area_per_type_of_use import cols as area_columns
+    from table_storage import read_table
+
+    os.makedirs(output_path, exist_ok=True)
+    processed = pd.concat(
+        [read_table(s["processed"]).assign(**{COMBINED_COLUMN: s["site"]}) for s in summaries],
+        ignore_index=True,
+    )
+    processed_path = os.path.join(output_path, "combined_companies_processed.csv")
+    processed.to_csv(processed_path, index=False)
+    print(f"✅ {len(processed)} Zeilen aus {len(summaries)} Standorten gespeichert unter: {processed_path}")
+
+    per_cluster = (
+        processed.groupby([COMBINED_COLUMN, "Cluster"], observed=True)["Nr."]
+                 .nunique()
+                 .rename("Firmen")
+                 .reset_index()
+    )
+    per_cluster_path = os.path.join(output_path, "combined_companies_per_cluster.csv")
+    per_cluster.to_csv(per_cluster_path, index=False)
+    print(f"✅ Firmen je Standort und Cluster gespeichert unter: {per_cluster_path}")
+
+    areas = []
+    for s in summaries:
+        if s["area_source"] is None:
+            print(f"⚠️ {s['site']}: keine Gebäudedaten, keine Flächen")
+            continue
+        path, storage = s["area_source"]
+        df = read_table(path, columns=area_columns, dtype={"Cluster": "category"}, storage=storage)
+        areas.append(df.assign(**{COMBINED_COLUMN: s["site"]}))
+    if not areas:
+        return
+    joined = pd.concat(areas, ignore_index=True)
+    # Kategorien der Standorte vereinigen sich beim concat nicht
+    joined["Cluster"] = joined["Cluster"].astype("category")
+    per_site = [aggregate_area(df).assign(**{COMBINED_COLUMN: df[COMBINED_COLUMN].iat[0]}) for df in areas]
+    # über alle Standorte gemeinsam: geteilte Gebäude (place_id) zählen einmal
+    total = aggregate_area(joined).assign(**{COMBINED_COLUMN: "alle"})
+    area = pd.concat(per_site + [total], ignore_index=True)
+    area = area[[COMBINED_COLUMN] + [c for c in area.columns if c != COMBINED_COLUMN]]
+    area_path = os.path.join(output_path, "combined_area_and_units_per_cluster.csv")
+    area.to_csv(area_path, index=False)
+    print(f"✅ Flächen je Standort und Cluster gespeichert unter: {area_path}")
+
+
+# --------------------------------------------------
+# 3. Shards im Prozesspool
+# --------------------------------------------------
+def uses_public_nominatim(profile):
+    return not (profile.nominatim_endpoints or os.environ.get("NOMINATIM_ENDPOINTS")) \
+        and os.environ.get("GEOCODER_OFFLINE") != "1"
+
+
+def run_sites(names, jobs=None, crawl_args=None):
+    """Alle Standorte in bis zu `jobs` Prozessen; gibt die Zusammenfassungen in Reihenfolge von `names` zurück."""
+    jobs = min(jobs or os.cpu_count() or 1, len(names))
+    # spawn und ein Standort je Prozess: kein Modul trägt den Standort eines anderen mit
+    context = multiprocessing.get_context("spawn")
+    summaries, failed = {}, []
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_site, name, crawl_args): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failed.append(name)
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+                continue
+            summaries[name] = summary
+            print(f"✅ {name}: {summary['companies']} Firmen, {summary['rows']} Zeilen in {summary['seconds']:.1f} s")
+    if failed:
+        print(f"⚠️ Fehlgeschlagen: {failed}")
+    return [summaries[name] for name in names if name in summaries]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline für mehrere Standorte parallel ausführen.")
+    parser.add_argument("sites", nargs="*", help="Standorte aus sites.json (Standard: alle)")
+    parser.add_argument("--jobs", type=int, default=None, help="gleichzeitige Standorte (Standard: Zahl der CPUs)")
+    parser.add_argument("--crawl", action="store_true", help="vorher crawlen")
+    parser.add_argument("--crawl-args", default="", help="Argumente für den Crawler, z.B. \"--async\"")
+    parser.add_argument("--no-merge", action="store_true", help="keine gemeinsamen Ergebnisse schreiben")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from site_profiles import SITES_PATH, load_site_profiles
+
+    args = parse_args(argv)
+    profiles = load_site_profiles()
+    names = args.sites or list(profiles)
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise SystemExit(f"Unbekannte Standorte {unknown} in {SITES_PATH}, vorhanden: {list(profiles)}")
+
+    public = [name for name in names if uses_public_nominatim(profiles[name])]
+    if len(public) > 1 and (args.jobs or os.cpu_count() or 1) > 1:
+        print(f"⚠️ {public} geocodieren über den öffentlichen Nominatim-Server (1 Anfrage/s insgesamt). "
+              "Eigene nominatim_endpoints je Standort oder GEOCODER_OFFLINE=1 verwenden.")
+
+    start = time.perf_counter()
+    summaries = run_sites(names, args.jobs, shlex.split(args.crawl_args) if args.crawl else None)
+    if summaries and not args.no_merge:
+        merge_sites(summaries)
+    print(f"Fertig: {len(summaries)}/{len(names)} Standorte in {time.perf_counter() - start:.2f} s")
+    if len(summaries) < len(names):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Standorte (Technologieparks, Bezirke), für die die Pipeline laufen kann.
+
+`sites.json` (oder SITE_PROFILES=<Datei>) beschreibt je Standort das
+Firmenverzeichnis (Basis-URL, Pfad der Listenseiten mit "{}" für die
+Seitenzahl, Selektoren, siehe html_parsing.py), PLZ und Ort für Adressen ohne
+Postleitzahl, das Präfix der Ergebnisdateien, das Ratenbudget des Crawlers
+(`request_delay` als Startwert, `max_request_rate` als harte Obergrenze der
+adaptiven Rate, siehe rate_control.py) und die Eingabedaten (Gebäude, Adress-Referenz, manueller GIS-Export):
+
+    {"buch": {"base_url": "https://...", "page_path_template": "/firmen?page={}",
+              "selectors": {"item": "li.company"}, "postcode": "13125", "city": "Berlin",
+              "request_delay": 0.5}}
+
+PIPELINE_SITE=<Name> wählt den Standort für alle Skripte. Ohne die Variable
+gilt "adlershof" mit den Ergebnissen wie bisher in `results/`, sonst liegen
+sie in `results/sites/<Präfix>/` (siehe run_sites.py).
+"""
+import json
+import os
+
+from html_parsing import Selectors
+
+THIS_PATH = os.path.dirname(os.path.abspath(__file__))
+SITES_PATH = os.environ.get("SITE_PROFILES", os.path.join(THIS_PATH, "sites.json"))
+DEFAULT_SITE = "adlershof"
+# Seitenzahlen in den Links des Paginators von www.adlershof.de (kodiert oder unkodiert)
+DEFAULT_PAGINATOR_PATTERN = r"companyPaginator(?:%5D|\])(?:%5B|\[)currentPage(?:%5D|\])=(\d+)"
+
+
+class SiteProfile:
+    """Ein Standort aus `sites.json`; relative Pfade gelten ab dem Projektordner."""
+
+    def __init__(self, name, base_url, page_path_template, postcode, city, selectors=None,
+                 paginator_pattern=DEFAULT_PAGINATOR_PATTERN, output_prefix=None, request_delay=1,
+                 max_request_rate=5, concurrency=8, buildings="raw_data/Gebäudegrunddatensatz.geojson", area_export=None,
+                 address_reference="raw_data/berlin_adressen.csv", nominatim_endpoints=(), nominatim_profile=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.page_path_template = page_path_template
+        self.postcode = postcode
+        self.city = city
+        self.selectors = Selectors(**(selectors or {}))
+        self.paginator_pattern = paginator_pattern
+        self.output_prefix = output_prefix or name
+        self.request_delay = request_delay
+        self.max_request_rate = max_request_rate
+        self.concurrency = concurrency
+        self.buildings = self._path(buildings)
+        self.area_export = self._path(area_export)
+        self.address_reference = self._path(address_reference)
+        self.nominatim_endpoints = list(nominatim_endpoints)
+        self.nominatim_profile = nominatim_profile
+
+    @staticmethod
+    def _path(path):
+        return os.path.join(THIS_PATH, path) if path else None
+
+    @property
+    def address_prefix(self):
+        """Wird Adressen ohne Postleitzahl vorangestellt (z.B. "12489 Berlin")."""
+        return f"{self.postcode} {self.city}"
+
+    def results_path(self, default=False):
+        """`results/` für den Standardlauf, sonst `results/sites/<Präfix>/`."""
+        if default:
+            return os.path.join(THIS_PATH, "results")
+        return os.path.join(THIS_PATH, "results", "sites", self.output_prefix)
+
+
+def load_site_profiles(path=SITES_PATH):
+    """{Name: SiteProfile} in der Reihenfolge der Datei."""
+    with open(path, "r", encoding="utf-8") as f:
+        sites = json.load(f)
+    return {name: SiteProfile(name, **settings) for name, settings in sites.items()}
+
+
+_profiles = load_site_profiles()
+# ohne PIPELINE_SITE: "adlershof", in einer eigenen SITE_PROFILES-Datei sonst der erste Standort
+SITE = os.environ.get("PIPELINE_SITE") or (DEFAULT_SITE if DEFAULT_SITE in _profiles else next(iter(_profiles)))
+if SITE not in _profiles:
+    raise ValueError(f"Standort {SITE!r} nicht in {SITES_PATH} (vorhanden: {list(_profiles)})")
+PROFILE = _profiles[SITE]
+OUTPUT_PREFIX = PROFILE.output_prefix
+RESULTS_PATH = PROFILE.results_path(default=not os.environ.get("PIPELINE_SITE"))
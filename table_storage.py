@@ -0,0 +1,163 @@
+"""
+Zwischenergebnisse der Pipeline als CSV (Standard) oder Parquet.
+
+Mit `PIPELINE_STORAGE=parquet` schreiben die Stufen ihre Zwischenstände in
+`results/` als Parquet: Spaltentypen und Categoricals bleiben erhalten,
+Text wird nicht neu geparst, gelesen wird memory-mapped und nur mit den
+benötigten Spalten. Im Code stehen die Pfade weiter als ".csv";
+`storage_path` tauscht nur die Endung. Endergebnisse werden mit
+`export_csv=True` zusätzlich als CSV geschrieben.
+
+pyarrow wird nur im Parquet-Modus gebraucht (und erst dann importiert).
+"""
+import os
+
+import pandas as pd
+
+STORAGE_FORMATS = ("csv", "parquet")
+STORAGE = os.environ.get("PIPELINE_STORAGE", "csv")
+if STORAGE not in STORAGE_FORMATS:
+    raise ValueError(f"PIPELINE_STORAGE muss einer von {STORAGE_FORMATS} sein, nicht {STORAGE!r}")
+
+
+def storage_path(csv_path, storage=None):
+    """Pfad der Datei im gewählten Format (".csv" -> ".parquet")."""
+    if (storage or STORAGE) == "parquet":
+        return os.path.splitext(csv_path)[0] + ".parquet"
+    return csv_path
+
+
+def table_exists(csv_path, storage=None):
+    return os.path.exists(storage_path(csv_path, storage))
+
+
+def read_table(csv_path, columns=None, dtype=None, storage=None):
+    """
+    Liest eine Tabelle. `columns` sind die gewünschten Spalten (fehlende werden
+    übersprungen, wie `usecols=lambda c: c in columns`), `dtype` wird in beiden
+    Formaten angewandt (z.B. {"Cluster": "category"}). CSV wird als UTF-8
+    gelesen, ersatzweise als cp1252 (Windows-Exporte).
+    """
+    if (storage or STORAGE) == "parquet":
+        import pyarrow.parquet as pq
+
+        path = storage_path(csv_path, "parquet")
+        if columns is not None:
+            wanted = set(columns)
+            columns = [c for c in pq.read_schema(path).names if c in wanted]
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+        if dtype:
+            df = df.astype({c: t for c, t in dtype.items() if c in df.columns})
+            for c, t in dtype.items():
+                if c in df.columns and t == "category":
+                    # Kategorien wie beim CSV-Lesen: nur vorkommende Werte, sortiert
+                    # (sonst ändert sich z.B. die Reihenfolge von groupby)
+                    values = df[c].cat.remove_unused_categories()
+                    df[c] = values.cat.reorder_categories(sorted(values.cat.categories))
+        return df
+
+    usecols = None if columns is None else (lambda c: c in set(columns))
+    try:
+        return pd.read_csv(csv_path, sep=",", usecols=usecols, dtype=dtype, encoding="utf-8")
+    except UnicodeDecodeError:
+        # Manche Windows-Exporte sind cp1252 (latin-1) kodiert
+        return pd.read_csv(csv_path, sep=",", usecols=usecols, dtype=dtype, encoding="cp1252")
+
+
+def write_table(df, csv_path, storage=None, export_csv=False):
+    """Schreibt eine Tabelle atomar; mit `export_csv` im Parquet-Modus zusätzlich als CSV."""
+    storage = storage or STORAGE
+    if storage == "parquet":
+        path = storage_path(csv_path, "parquet")
+        tmp_path = path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    if storage == "csv" or export_csv:
+        tmp_path = csv_path + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_path)
+
+
+def iter_table_chunks(csv_path, chunk_size, storage=None):
+    """
+    Liest eine Tabelle in Stücken von `chunk_size` Zeilen (Generator). Eine
+    Tabelle ohne Zeilen ergibt in beiden Formaten ein leeres Stück mit den Spalten.
+    """
+    if (storage or STORAGE) == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(storage_path(csv_path, "parquet"), memory_map=True)
+        schema = parquet_file.schema_arrow
+        empty = True
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            # über die Tabelle, damit die pandas-Metadaten (Categoricals) greifen
+            yield pa.Table.from_batches([batch], schema).to_pandas()
+            empty = False
+        if empty:
+            # wie read_csv(chunksize=...) bei einer Datei nur mit Kopfzeile: ein leeres Stück mit den Spalten
+            yield schema.empty_table().to_pandas()
+    else:
+        yield from pd.read_csv(csv_path, sep=",", chunksize=chunk_size)
+
+
+class TableWriter:
+    """
+    Schreibt eine Tabelle stückweise (`append`) in eine temporäre Datei, die
+    beim Schließen atomar an ihren Platz kommt. Im Parquet-Modus legt das
+    erste Stück das Schema fest; folgende Stücke werden darauf umgewandelt.
+    Wurde nichts angehängt, schreibt `close` eine leere Tabelle mit `columns`
+    (CSV: nur die Kopfzeile), damit keine alte Ausgabe stehen bleibt.
+    """
+
+    def __init__(self, csv_path, storage=None, columns=()):
+        self.storage = storage or STORAGE
+        self.path = storage_path(csv_path, self.storage)
+        self.tmp_path = self.path + ".tmp"
+        self.columns = list(columns)
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+        self._header = True
+        if self.storage == "csv":
+            self._file = open(self.tmp_path, "w", encoding="utf-8", newline="")
+
+    def append(self, df):
+        if self.storage == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self._file, index=False, header=self._header)
+            self._header = False
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is None and self._header:
+            self.append(pd.DataFrame(columns=self.columns))
+        if self.storage == "parquet":
+            self._writer.close()
+        else:
+            self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+            return
+        # bei einem Fehler bleibt die alte Ausgabe stehen, die halbe temporäre Datei wird gelöscht
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
@@ -0,0 +1,12 @@
+"""
+Gemeinsame Einstellungen der Tests: Projektordner und `benchmarks/` (Ersatz-
+Server und Daten-Generatoren) liegen auf dem Importpfad.
+"""
+import os
+import sys
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT_PATH, os.path.join(ROOT_PATH, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
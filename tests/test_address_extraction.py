@@ -0,0 +1,46 @@
+"""
+Spaltenweise Adress-Extraktion und Mojibake-Reparatur gegen die zeilenweisen
+Referenzen `extract_address` und `fix_mojibake`.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from address_extraction import AddressMemo, extract_address, extract_addresses, fix_mojibake, fix_mojibake_column
+from generators import make_links
+
+
+@pytest.fixture(scope="module")
+def links():
+    # alle Link-Arten (sauber, prozentkodiert, doppelt kodiert, Entities, ohne '?q=', fehlend)
+    return make_links(20_000, 2_000)
+
+
+@pytest.fixture(scope="module")
+def reference(links):
+    return links.apply(extract_address)
+
+
+def test_extract_addresses(links, reference):
+    assert extract_addresses(links).equals(reference)
+
+
+def test_extract_addresses_keeps_index(links, reference):
+    shifted = links.set_axis(links.index * 2 + 1)
+    assert extract_addresses(shifted).equals(reference.set_axis(shifted.index))
+
+
+def test_extract_addresses_from_memo(links, reference, tmp_path):
+    memo_path = os.path.join(tmp_path, "address_memo.json")
+    memo = AddressMemo(memo_path)
+    assert extract_addresses(links, memo).equals(reference)
+    memo.save()
+    assert extract_addresses(links, AddressMemo(memo_path)).equals(reference)
+
+
+def test_fix_mojibake_column(reference):
+    # jede zweite Adresse als UTF-8-Bytes in cp1252 gelesen
+    addresses = reference.where(reference.index % 2 == 0, reference.str.encode("utf-8").str.decode("cp1252", "replace"))
+    expected = addresses.apply(lambda x: fix_mojibake(x) if pd.notna(x) else x)
+    assert fix_mojibake_column(addresses).equals(expected)
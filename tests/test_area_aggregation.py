@@ -0,0 +1,131 @@
+"""
+Inkrementelle Flächen-Aggregation (`AreaStore`): nach jeder Änderung über
+`diff`/`apply` dasselbe Ergebnis wie die vollständige Neuberechnung `aggregate_area`.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from area_aggregation import STORE_VERSION, AreaStore, aggregate_area
+from generators import make_store_frame
+
+
+@pytest.fixture
+def df():
+    # mit Lücken in place_id, Geschossfl, Cluster und Nr.; Cluster als Text, damit neue Cluster gehen
+    return make_store_frame(3_000).astype({"Cluster": object})
+
+
+def assert_consistent(store, df):
+    assert store.check(df) == []
+    assert store.result().to_csv(index=False) == aggregate_area(df).to_csv(index=False)
+
+
+def update(store, df):
+    """Weg von get_area_per_type_of_use.py: diff gegen die neue Tabelle, dann apply."""
+    added, removed = store.diff(df)
+    store.apply(added, removed)
+    assert_consistent(store, df)
+    return added, removed
+
+
+def numbers(df, count, seed=0):
+    nrs = df["Nr."].dropna().unique()
+    return np.random.default_rng(seed).choice(nrs, count, replace=False)
+
+
+def test_from_frame(df):
+    assert_consistent(AreaStore.from_frame(df), df)
+
+
+def test_unchanged_table_has_no_diff(df):
+    store = AreaStore.from_frame(df)
+    assert store.diff(df) == ({}, [])
+
+
+def test_companies_move(df):
+    store = AreaStore.from_frame(df)
+    moved = df["Nr."].isin(numbers(df, 40))
+    places = df["place_id"].dropna().unique()
+    df.loc[moved, "place_id"] = np.random.default_rng(1).choice(places, moved.sum())
+    added, removed = update(store, df)
+    assert set(added) <= set(df.loc[moved, "Nr."]) and removed == []
+
+
+def test_companies_added(df):
+    store = AreaStore.from_frame(df)
+    new = pd.DataFrame({
+        "Nr.": [100_001.0, 100_001.0, 100_002.0, 100_003.0],
+        # in ein bestehendes Gebäude (ändert die Anteile der Mieter), ein neues und ohne Gebäude
+        "place_id": [df["place_id"].dropna().iloc[0], "DEBE99999999", "DEBE99999999", np.nan],
+        "Geschossfl": [df["Geschossfl"].dropna().iloc[0], 1200.0, 1200.0, 500.0],
+        "Cluster": ["Labor", "Büro", "Sporthalle", "Büro"],
+    })
+    df = pd.concat([df, new], ignore_index=True)
+    added, removed = update(store, df)
+    assert sorted(added) == [100_001.0, 100_002.0, 100_003.0]
+
+
+def test_companies_removed(df):
+    store = AreaStore.from_frame(df)
+    gone = numbers(df, 40)
+    df = df[~df["Nr."].isin(gone)]
+    added, removed = update(store, df)
+    assert sorted(removed) == sorted(gone)
+    assert added == {}
+
+
+def test_building_changes_cluster(df):
+    store = AreaStore.from_frame(df)
+    place = df["place_id"].value_counts().index[0]
+    df.loc[df["place_id"] == place, "Cluster"] = "Sporthalle"
+    update(store, df)
+
+
+def test_last_company_of_cluster_removed(df):
+    store = AreaStore.from_frame(df)
+    df = df[df["Cluster"] != "Gastronomie"]
+    update(store, df)
+    assert "Gastronomie" not in store.result()["Cluster"].tolist()
+
+
+def test_reclassify(df):
+    store = AreaStore.from_frame(df)
+    nrs = numbers(df, 30)
+    store.reclassify({nr: "Labor" for nr in nrs})
+    df.loc[df["Nr."].isin(nrs), "Cluster"] = "Labor"
+    assert_consistent(store, df)
+
+
+def test_save_load_round_trip(df, tmp_path):
+    path = os.path.join(tmp_path, "area_store.json")
+    store = AreaStore.from_frame(df)
+    store.save(path)
+    loaded = AreaStore.load(path)
+    assert loaded.companies == store.companies
+    assert loaded.places == store.places
+    assert loaded.clusters == store.clusters
+    assert_consistent(loaded, df)
+    # nach dem Laden weiter inkrementell
+    df = df[~df["Nr."].isin(numbers(df, 10))]
+    df.loc[df["Nr."].isin(numbers(df, 10, seed=1)), "Cluster"] = "Labor"
+    update(loaded, df)
+    loaded.save(path)
+    assert_consistent(AreaStore.load(path), df)
+
+
+def test_load_missing_or_old_store(df, tmp_path):
+    path = os.path.join(tmp_path, "area_store.json")
+    assert AreaStore.load(path).companies == {}
+    store = AreaStore.from_frame(df)
+    store.save(path)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace(f'"version": {STORE_VERSION}', f'"version": {STORE_VERSION + 1}'))
+    # andere Version: leerer Store, der erste diff baut alles neu auf
+    loaded = AreaStore.load(path)
+    assert loaded.companies == {}
+    update(loaded, df)
@@ -0,0 +1,95 @@
+"""
+Flächen-Würfel (area_cube.py, build_area_cube.py): Verdichtungen und Schnitte
+gegen ein pandas-`groupby` über alle Zeilen.
+"""
+import itertools
+import os
+import random
+
+import pandas as pd
+import pytest
+
+import build_area_cube
+from area_aggregation import AREA_COLUMN, UNITS_COLUMN, aggregate_area
+from area_cube import DIMENSIONS, ROWS_COLUMN, AreaCube
+from generators import make_area_frame
+
+
+def reference(df, by, where):
+    """Dieselbe Abfrage mit groupby über alle Zeilen."""
+    entries_per_place = df.groupby("place_id")["place_id"].transform("count")
+    df = df.assign(share=(df["Geschossfl"] / entries_per_place).round())
+    for dim, wanted in where.items():
+        df = df[df[dim].isin(wanted)]
+    if not by:
+        return pd.DataFrame({AREA_COLUMN: [df["share"].sum()], UNITS_COLUMN: [df["Nr."].count()],
+                             ROWS_COLUMN: [len(df)]})
+    return df.groupby(by, observed=True).agg(
+        **{AREA_COLUMN: ("share", "sum"), UNITS_COLUMN: ("Nr.", "count"), ROWS_COLUMN: ("Nr.", "size")}
+    ).reset_index()
+
+
+def assert_same(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.fixture(scope="module")
+def df():
+    # mit Lücken in place_id, Geschossfl, Cluster und mapular_le
+    return make_area_frame(5_000)
+
+
+@pytest.fixture(scope="module")
+def cube(df):
+    return AreaCube.build(df)
+
+
+def test_per_cluster_same_as_aggregate_area(df, cube):
+    assert cube.export_per_cluster().to_csv(index=False) == aggregate_area(df).to_csv(index=False)
+
+
+@pytest.mark.parametrize("by", [list(by) for n in range(len(DIMENSIONS) + 1)
+                                for by in itertools.combinations(DIMENSIONS, n)])
+def test_rollups(df, cube, by):
+    assert_same(cube.query(by), reference(df, by, {}))
+
+
+def test_random_slices(df, cube):
+    rng = random.Random(1)
+    for _ in range(40):
+        by = rng.sample(cube.dimensions, rng.randint(0, 3))
+        where = {}
+        for dim in rng.sample(cube.dimensions, rng.randint(0, 2)):
+            where[dim] = rng.sample(cube.values[dim], min(len(cube.values[dim]), rng.choice([1, 3, 50])))
+        assert_same(cube.query(by, where), reference(df, by, where))
+
+
+def test_single_value_and_unknown_value(df, cube):
+    assert_same(cube.query(["Cluster"], {"mapular_le": "Lager"}),
+                reference(df, ["Cluster"], {"mapular_le": ["Lager"]}))
+    empty = cube.query(["Cluster"], {"mapular_le": ["gibt es nicht"]})
+    assert empty.empty
+
+
+def test_save_load_round_trip(cube, tmp_path):
+    path = os.path.join(tmp_path, "area_cube.npz")
+    cube.save(path)
+    loaded = AreaCube.load(path)
+    assert loaded.values == cube.values
+    for by in (["Cluster"], ["mapular_le", "Gebaeudegr"], []):
+        assert_same(loaded.query(by), cube.query(by))
+
+
+def test_build_area_cube_main(df, tmp_path):
+    input_path = os.path.join(tmp_path, "joined.csv")
+    df.to_csv(input_path, index=False)
+    paths = {name: os.path.join(tmp_path, name) for name in ("area_cube.npz", "per_cluster.csv", "view.csv")}
+    build_area_cube.main(["--input", input_path, "--output", paths["area_cube.npz"],
+                          "--per-cluster-output", paths["per_cluster.csv"],
+                          "--by", "mapular_le", "Cluster", "--view-output", paths["view.csv"]])
+    csv = pd.read_csv(input_path)
+    with open(paths["per_cluster.csv"], encoding="utf-8") as f:
+        assert f.read() == aggregate_area(csv).to_csv(index=False)
+    assert_same(pd.read_csv(paths["view.csv"]), reference(csv, ["mapular_le", "Cluster"], {}))
+    assert len(AreaCube.load(paths["area_cube.npz"])) == len(AreaCube.build(csv))
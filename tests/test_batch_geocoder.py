@@ -0,0 +1,56 @@
+"""
+Batch-Geocoder gegen lokale Nominatim-Ersatzserver (benchmarks/nominatim_server.py)
+mit Latenz und zufälligen 503-Fehlern: jede Adresse muss ihre erwarteten
+Koordinaten bekommen, egal über welche Instanz und nach wie vielen Versuchen.
+"""
+from contextlib import ExitStack
+
+import pytest
+
+from batch_geocoder import BatchGeocoder
+from nominatim_server import NominatimServer, expected_coordinates
+
+ADDRESSES = [f"Teststraße {i}, 12489 Berlin" for i in range(120)] + ["Nowhere 1, 12489 Berlin"]
+# genug Wiederholungen, dass bei 5 % Fehlern keine Adresse endgültig scheitert
+SETTINGS = {"error_wait_seconds": 0.01, "max_retries": 8}
+
+
+@pytest.fixture(scope="module")
+def urls():
+    with ExitStack() as stack:
+        servers = [stack.enter_context(NominatimServer(0.002, error_rate=0.05, seed=i)) for i in range(2)]
+        yield [server.url for server in servers]
+
+
+def coordinates(results):
+    return {
+        address: None if location is None else (location.latitude, location.longitude)
+        for address, location in results.items()
+    }
+
+
+def test_sequential(urls):
+    addresses = ADDRESSES[-30:]
+    geocoder = BatchGeocoder(urls[:1], "self-hosted", concurrency=1, **SETTINGS)
+    results = geocoder.geocode_many(addresses)
+    assert coordinates(results) == {address: expected_coordinates(address) for address in addresses}
+    assert geocoder.failed == 0
+
+
+def test_batch_over_all_endpoints(urls):
+    geocoder = BatchGeocoder(urls, "self-hosted", concurrency=8, **SETTINGS)
+    seen = []
+    results = geocoder.geocode_many(ADDRESSES + ADDRESSES[:10], on_result=lambda a, _: seen.append(a))
+    assert coordinates(results) == {address: expected_coordinates(address) for address in ADDRESSES}
+    # Dubletten werden einmal angefragt, jede Antwort einmal gemeldet
+    assert sorted(seen) == sorted(ADDRESSES)
+    assert all(endpoint.requests for endpoint in geocoder.endpoints)
+    assert geocoder.failed == 0
+
+
+def test_failures_are_reported(urls):
+    with NominatimServer(error_rate=1.0) as server:
+        geocoder = BatchGeocoder([server.url], "self-hosted", concurrency=2, error_wait_seconds=0, max_retries=1)
+        results = geocoder.geocode_many(ADDRESSES[:3])
+    assert results == {}
+    assert geocoder.failed == 3
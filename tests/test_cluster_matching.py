@@ -0,0 +1,75 @@
+"""
+`ClusterMatcher` und `classify_column` müssen für jeden Text dasselbe Ergebnis
+liefern wie die zeilenweise Referenz `assign_cluster`.
+"""
+import pandas as pd
+import pytest
+
+from cluster_matching import ClusterMatcher, assign_cluster, classify_column, cluster_keywords
+from generators import fuzz_cases, make_column
+
+
+def overlap_cases(keywords):
+    """Alle Texte, in denen ein Schlüsselwort innerhalb eines anderen beginnt."""
+    cases = []
+    for a in keywords:
+        for b in keywords:
+            for start in range(1, len(a)):
+                if b.startswith(a[start:]) or a[start:].startswith(b):
+                    merged = a[:start] + b if len(b) > len(a) - start else a
+                    cases += [merged, f"x {merged} y", f"{a[:start]}{merged}"]
+    return cases
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return ClusterMatcher()
+
+
+def assert_same_as_reference(matcher, texts):
+    texts = pd.Series(texts, dtype=object)
+    expected = texts.apply(assign_cluster)
+    assert matcher.classify(texts).tolist() == expected.tolist()
+
+
+def test_overlapping_keywords(matcher):
+    # z.B. "tiefgarage" + "energiesysteme": das zweite beginnt im ersten
+    assert_same_as_reference(matcher, overlap_cases(list(matcher.priority)))
+
+
+def test_random_texts(matcher):
+    assert_same_as_reference(matcher, fuzz_cases(list(matcher.priority), 20_000))
+
+
+def test_column_keeps_index_and_dtype(matcher):
+    column = make_column(5_000, 500)
+    column.index = column.index + 10
+    expected = column.apply(assign_cluster)
+    assert matcher.classify(column).equals(expected)
+    per_unique = classify_column(column.astype("category"), matcher)
+    assert per_unique.astype(object).tolist() == expected.tolist()
+
+
+def test_missing_values_count_as_empty_text(matcher):
+    column = pd.Series(["Software", None, float("nan"), ""], dtype=object)
+    expected = [assign_cluster("software"), "Sonstiges", "Sonstiges", "Sonstiges"]
+    assert classify_column(column, matcher).astype(object).tolist() == expected
+
+
+def test_fallback_with_separator_in_text():
+    # Trennzeichen im Text: Zeile für Zeile, aber mit dem konfigurierten Fallback
+    matcher = ClusterMatcher(cluster_keywords, fallback="Other")
+    assert matcher.classify(["xyz\x00", "abc"]).tolist() == ["Other", "Other"]
+    assert matcher.classify(["xyz", "abc"]).tolist() == ["Other", "Other"]
+
+
+def test_priority_of_clusters():
+    rules = {"A": ["garage"], "B": ["tiefgarage", "sport"]}
+    matcher = ClusterMatcher(rules, "X")
+    texts = ["tiefgarage", "sport", "sporttiefgarage", "nichts"]
+    assert matcher.classify(texts).tolist() == [assign_cluster(t, rules, "X") for t in texts] == ["A", "B", "A", "X"]
+
+
+def test_invalid_keyword():
+    with pytest.raises(ValueError):
+        ClusterMatcher({"A": [""]})
@@ -0,0 +1,131 @@
+"""
+Regeländerungen und `ClusterMemo` (cluster_matching.py): nach einer Änderung
+werden nur die Werte neu klassifiziert, die ein geändertes Schlüsselwort
+enthalten, und das Ergebnis ist dasselbe wie mit einem frischen Matcher.
+"""
+import copy
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from cluster_matching import ClusterMatcher, ClusterMemo, changed_keywords, classify_column, cluster_keywords
+from generators import fuzz_cases, make_column
+
+KEYWORDS = [kw for kws in cluster_keywords.values() for kw in kws]
+
+
+@pytest.fixture(scope="module")
+def column():
+    texts = list(make_column(2_000, 2_000).unique()) + fuzz_cases(KEYWORDS, 2_000)
+    return pd.Series(texts, dtype=object)
+
+
+@pytest.fixture
+def memo(tmp_path, column):
+    """Memo mit allen Werten von `column` unter den aktuellen Regeln."""
+    memo = ClusterMemo(os.path.join(tmp_path, "cluster_memo.json"))
+    memo.update_rules(cluster_keywords)
+    classify_column(column, ClusterMatcher(cluster_keywords), memo)
+    memo.save()
+    return memo
+
+
+def move_keyword(clusters, keyword, target):
+    clusters = copy.deepcopy(clusters)
+    for keywords in clusters.values():
+        if keyword in keywords:
+            keywords.remove(keyword)
+    clusters[target].append(keyword)
+    return clusters
+
+
+def edit_rules(clusters, fallback, rng):
+    """Eine zufällige Änderung an einer Kopie der Regeln."""
+    clusters = copy.deepcopy(clusters)
+    names = list(clusters)
+    kind = rng.choice(["add", "remove", "move", "new_cluster", "swap", "fallback"])
+    if kind == "add":
+        kw = rng.choice(rng.choice(list(clusters.values())))
+        clusters[rng.choice(names)].insert(0, kw[: rng.randint(3, max(len(kw), 3))])
+    elif kind == "remove":
+        keywords = clusters[rng.choice([n for n in names if clusters[n]])]
+        keywords.remove(rng.choice(keywords))
+    elif kind == "move":
+        source = rng.choice([n for n in names if clusters[n]])
+        kw = rng.choice(clusters[source])
+        clusters[source].remove(kw)
+        clusters[rng.choice(names)].append(kw)
+    elif kind == "new_cluster":
+        position = rng.randrange(len(names) + 1)
+        items = list(clusters.items())
+        items.insert(position, (f"Neu {rng.randrange(1000)}", [rng.choice(["labor", "büro", "xyz", "handel"])]))
+        clusters = dict(items)
+    elif kind == "swap":
+        items = list(clusters.items())
+        i, j = rng.sample(range(len(items)), 2)
+        items[i], items[j] = items[j], items[i]
+        clusters = dict(items)
+    else:
+        fallback = fallback + "?"
+    return clusters, fallback, kind
+
+
+def test_changed_keywords():
+    rules = {"A": ["garage", "sport"], "B": ["labor"]}
+    assert changed_keywords(rules, rules) == set()
+    assert changed_keywords(rules, {"A": ["garage"], "B": ["labor", "sport"]}) == {"sport"}
+    assert changed_keywords(rules, {"A": ["garage", "sport", "neu"], "B": []}) == {"neu", "labor"}
+    # Fallback oder Reihenfolge gemeinsamer Cluster geändert: alles
+    assert changed_keywords(rules, rules, "X", "Y") is None
+    assert changed_keywords(rules, {"B": ["labor"], "A": ["garage", "sport"]}) is None
+
+
+def test_one_keyword_reclassifies_only_its_rows(memo, column):
+    before = classify_column(column, ClusterMatcher(cluster_keywords), memo)
+    known = dict(memo.values)
+    misses = memo.misses
+    rules = move_keyword(cluster_keywords, "sport", "Büro")
+    dropped = memo.update_rules(rules)
+    # verworfen sind genau die Werte mit "sport" (auch "sporthalle"), alle anderen bleiben im Memo
+    assert dropped == sum("sport" in text for text in known) > 0
+    assert memo.values == {text: c for text, c in known.items() if "sport" not in text}
+
+    matcher = ClusterMatcher(rules)
+    after = classify_column(column, matcher, memo)
+    assert memo.misses - misses == dropped
+    assert (after == classify_column(column, matcher)).all()
+    changed = column[pd.Series(after != before).to_numpy()]
+    assert len(changed) > 0
+    assert changed.str.lower().str.contains("sport").all()
+
+
+def test_unchanged_rules_keep_memo(memo, column):
+    reloaded = ClusterMemo(memo.path)
+    assert reloaded.update_rules(cluster_keywords) == 0
+    classify_column(column, ClusterMatcher(cluster_keywords), reloaded)
+    assert reloaded.misses == 0
+
+
+@pytest.mark.parametrize("fallback, clusters", [
+    ("Andere", cluster_keywords),
+    ("Sonstiges", dict(reversed(list(cluster_keywords.items())))),
+])
+def test_fallback_or_order_reclassifies_all(memo, fallback, clusters):
+    total = len(memo.values)
+    assert memo.update_rules(clusters, fallback) == total
+    assert memo.values == {}
+
+
+def test_random_edits_same_as_fresh_matcher(memo, column):
+    rng = random.Random(2)
+    clusters, fallback = dict(cluster_keywords), "Sonstiges"
+    for _ in range(30):
+        clusters, fallback, kind = edit_rules(clusters, fallback, rng)
+        matcher = ClusterMatcher(clusters, fallback)
+        memo.update_rules(clusters, fallback)
+        memo.save()
+        memo = ClusterMemo(memo.path)
+        actual = classify_column(column, matcher, memo)
+        assert (actual == classify_column(column, matcher)).all(), kind
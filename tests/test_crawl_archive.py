@@ -0,0 +1,114 @@
+"""
+Offline-Extraktion aus dem HTML-Archiv (`--from-archive`): dieselben Zeilen wie
+der Crawl, eingearbeitet in die bestehende CSV über die Detail-URL.
+"""
+import os
+
+import pytest
+
+import crawl_enterprizes_Adlershof as crawler
+from fixture_server import FixtureServer, FixtureSite
+from html_archive import HtmlArchive
+
+
+@pytest.fixture(scope="module")
+def crawled(tmp_path_factory):
+    """Crawl des Ersatz-Servers mit Archiv: (Basis-URL, Zeilen, Archivpfad)."""
+    archive_path = os.path.join(tmp_path_factory.mktemp("archive"), "html_archive")
+    rows = []
+    with FixtureServer(FixtureSite(pages=3, per_page=5)) as server:
+        crawler.html_archive = HtmlArchive(archive_path)
+        try:
+            crawler.crawl_sequential(set(), 1, rows.append, base_url=server.base_url, delay=0)
+        finally:
+            crawler.html_archive = None
+        return server.base_url, rows, archive_path
+
+
+def as_csv(rows):
+    """Zeilen so, wie sie aus der CSV zurückgelesen werden."""
+    return [{key: str(value) for key, value in row.items()} for row in rows]
+
+
+def partial_archive(archive_path, tmp_path, drop_url):
+    """Kopie des Archivs ohne die Seite `drop_url`."""
+    archive = HtmlArchive(archive_path)
+    partial = HtmlArchive(os.path.join(tmp_path, "partial"))
+    for url, entry in archive.latest().items():
+        if url != drop_url:
+            partial.add(url, archive.read(entry))
+    return partial
+
+
+def test_archive_reproduces_crawl(crawled):
+    base_url, rows, archive_path = crawled
+    extracted, missing = crawler.extract_from_archive(HtmlArchive(archive_path), base_url, workers=2)
+    assert extracted == rows
+    assert missing == []
+
+
+def test_merge_keeps_numbers_and_unknown_rows(crawled):
+    base_url, rows, archive_path = crawled
+    existing = as_csv(rows)
+    for row in existing:
+        row["Nr."] = str(int(row["Nr."]) + 100)
+        row["Branchenzweig"] = "veraltet"
+    removed = existing.pop(3)
+    foreign = {"Nr.": "999", "Name": "Alt GmbH", "URL": base_url + "/alt", "Branchenzweig": "", "Google Maps Link": ""}
+    existing.append(foreign)
+
+    merged, missing = crawler.extract_from_archive(HtmlArchive(archive_path), base_url, 2, existing)
+    by_url = {row["URL"]: row for row in merged}
+    assert missing == [foreign["URL"]]
+    # vorhandene Zeilen: Nr. bleibt, Inhalt neu aus dem Archiv
+    for row in rows:
+        if row["URL"] != removed["URL"]:
+            assert by_url[row["URL"]] == {**row, "Nr.": str(int(row["Nr."]) + 100)}
+    # nicht im Archiv: unverändert; neu: hinten mit der nächsten freien Nr.
+    assert by_url[foreign["URL"]] == foreign
+    assert merged[-1] == {**rows[3], "Nr.": 1000}
+    assert len(merged) == len(rows) + 1
+
+
+def test_missing_detail_page_keeps_existing_row(crawled, tmp_path):
+    base_url, rows, archive_path = crawled
+    dropped = rows[5]
+    archive = partial_archive(archive_path, tmp_path, dropped["URL"])
+    existing = as_csv(rows)
+    merged, missing = crawler.extract_from_archive(archive, base_url, 2, existing)
+    assert missing == [dropped["URL"]]
+    assert merged[5] == existing[5]
+    assert len(merged) == len(rows)
+
+
+@pytest.fixture
+def results(crawled, tmp_path, monkeypatch):
+    """`main` schreibt nach `tmp_path`; die CSV enthält den Crawl mit Nr. ab 11."""
+    base_url, rows, archive_path = crawled
+    monkeypatch.setattr(crawler, "RESULTS_PATH", str(tmp_path))
+    monkeypatch.setattr(crawler, "CSV_FILENAME", os.path.join(tmp_path, "companies.csv"))
+    monkeypatch.setattr(crawler, "ARCHIVE_CSV_FILENAME", os.path.join(tmp_path, "companies.from_archive.csv"))
+    monkeypatch.setattr(crawler, "HTML_ARCHIVE_PATH", archive_path)
+    monkeypatch.setattr(crawler, "PARSER_BACKEND", crawler.PARSER_BACKEND)
+    crawler.write_csv([{**row, "Nr.": row["Nr."] + 10} for row in rows])
+    return base_url, rows
+
+
+def test_main_from_archive_updates_csv(results):
+    base_url, rows = results
+    before = crawler.read_rows()
+    crawler.main(["--from-archive", "--base-url", base_url, "--workers", "2"])
+    assert crawler.read_rows() == before
+    assert not os.path.exists(crawler.ARCHIVE_CSV_FILENAME)
+
+
+def test_main_from_incomplete_archive_keeps_csv(results, tmp_path, monkeypatch):
+    base_url, rows = results
+    partial_archive(crawler.HTML_ARCHIVE_PATH, tmp_path, rows[0]["URL"])
+    monkeypatch.setattr(crawler, "HTML_ARCHIVE_PATH", os.path.join(tmp_path, "partial"))
+    with open(crawler.CSV_FILENAME, "rb") as f:
+        before = f.read()
+    crawler.main(["--from-archive", "--base-url", base_url, "--workers", "2"])
+    with open(crawler.CSV_FILENAME, "rb") as f:
+        assert f.read() == before
+    assert crawler.read_rows(crawler.ARCHIVE_CSV_FILENAME) == crawler.read_rows()
@@ -0,0 +1,63 @@
+"""
+Sequentieller und asyncio-Crawler gegen den lokalen Ersatz-Server
+(benchmarks/fixture_server.py): beide Modi müssen dieselben CSV-Zeilen liefern.
+"""
+import asyncio
+
+import pytest
+
+import crawl_enterprizes_Adlershof as crawler
+from fixture_server import DETAIL_PREFIX, FixtureServer, FixtureSite
+
+
+@pytest.fixture(scope="module")
+def site():
+    return FixtureSite(pages=3, per_page=7)
+
+
+@pytest.fixture(scope="module")
+def server(site):
+    with FixtureServer(site, latency=0.005) as server:
+        yield server
+
+
+def crawl_sequential(server, existing_urls=(), next_id=1):
+    rows = []
+    crawler.crawl_sequential(set(existing_urls), next_id, rows.append, base_url=server.base_url, delay=0)
+    return rows
+
+
+def crawl_async(server, existing_urls=(), next_id=1, concurrency=4):
+    rows = []
+    asyncio.run(crawler.crawl_async(set(existing_urls), next_id, rows.append, base_url=server.base_url,
+                                    concurrency=concurrency))
+    return rows
+
+
+def test_sequential_rows_match_site(site, server):
+    rows = crawl_sequential(server)
+    assert [row["Nr."] for row in rows] == list(range(1, len(site.companies) + 1))
+    assert [row["Name"] for row in rows] == [c["name"] for c in site.companies]
+    assert [row["Branchenzweig"] for row in rows] == [", ".join(c["branches"]) for c in site.companies]
+    assert all(row["URL"].startswith(server.base_url) for row in rows)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4, 16])
+def test_async_same_rows_as_sequential(server, concurrency):
+    assert crawl_async(server, concurrency=concurrency) == crawl_sequential(server)
+
+
+def test_existing_urls_are_skipped(server):
+    reference = crawl_sequential(server)
+    existing = {row["URL"] for row in reference[::3]}
+    sequential = crawl_sequential(server, existing, next_id=100)
+    assert crawl_async(server, existing, next_id=100) == sequential
+    assert [row["URL"] for row in sequential] == [row["URL"] for row in reference if row["URL"] not in existing]
+    assert [row["Nr."] for row in sequential] == list(range(100, 100 + len(sequential)))
+
+
+def test_links_from_page(server, site):
+    links = crawler.get_company_links_from_page(2, base_url=server.base_url)
+    companies, page_count = crawler.get_company_links_and_page_count(2, base_url=server.base_url)
+    assert links == companies == [(c["name"], server.base_url + DETAIL_PREFIX + c["slug"]) for c in site.companies[7:14]]
+    assert page_count == site.pages
@@ -0,0 +1,64 @@
+"""
+Parser-Backends (html_parsing.py): alle Backends in `BACKENDS` liefern auf den
+Fixture-Seiten und den Randfällen feldgenau dasselbe wie die Referenz "bs4".
+"""
+import pytest
+
+import html_parsing
+from fixture_server import DETAIL_PREFIX
+from generators import EDGE_CASE_DETAILS, crawler_pages
+from html_parsing import BACKENDS, Selectors, parse_company_details, parse_company_links
+
+BASE_URL = "https://www.adlershof.de"
+LISTINGS, DETAILS = crawler_pages(3, per_page=7)
+DETAILS += EDGE_CASE_DETAILS
+
+# anderer Standort: Kacheln als li, Titel mit zwei Klassen
+OTHER_SELECTORS = Selectors(item="li.company", maps_link="a.map.external")
+OTHER_LISTING = (
+    "<ul><li class='company'><a class='headline company__title' href='/a'> Firma <b>A</b> </a></li>"
+    "<li class='company'><a class='headline' href='/b'>nur eine Klasse</a></li>"
+    "<li class='company x'><div><a class='company__title headline' href='/c'>C</a></div></li></ul>"
+)
+OTHER_DETAIL = (
+    "<h2>Branchen</h2><ul class='bullets'><li>Laser</li></ul>"
+    "<a class='map' href='falsch'>x</a><a class='external map' href='richtig'>y</a>"
+)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_listing_pages(backend):
+    parse_links = BACKENDS[backend][0]
+    for html in LISTINGS:
+        assert parse_links(html, BASE_URL) == html_parsing.links_bs4(html, BASE_URL)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_detail_pages(backend):
+    parse_details = BACKENDS[backend][1]
+    for html in DETAILS:
+        assert parse_details(html) == html_parsing.details_bs4(html), html
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_other_selectors(backend):
+    parse_links, parse_details = BACKENDS[backend]
+    assert parse_links(OTHER_LISTING, BASE_URL, OTHER_SELECTORS) == [
+        ("FirmaA", BASE_URL + "/a"), ("C", BASE_URL + "/c"),
+    ]
+    assert parse_details(OTHER_DETAIL, OTHER_SELECTORS) == (["Laser"], "richtig")
+
+
+def test_reference_fields():
+    links = parse_company_links(LISTINGS[0], BASE_URL)
+    assert len(links) == 7
+    assert links[0] == ("Firma 00000 GmbH", BASE_URL + DETAIL_PREFIX + "firma-00000")
+    # h2 mit genau einem (verschachtelten) Textknoten zählt, sonst nicht (wie `Tag.string`)
+    nested, split, two_children = (parse_company_details(html)[0] for html in EDGE_CASE_DETAILS[4:7])
+    assert nested == ["tief"]
+    assert split == [] and two_children == []
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        parse_company_links(LISTINGS[0], BASE_URL, backend="gibt es nicht")
@@ -0,0 +1,80 @@
+"""
+Cache der Pipeline-Stufen (pipeline_runner.py): Treffer bei gleichem
+Fingerabdruck und unveränderten Ausgaben, abgelaufene Einträge mit `max_age`,
+und die Umgebungsvariablen der Geocode-Stufe (run_pipeline.py).
+"""
+import os
+
+from pipeline_runner import ADOPTED, HIT, Stage, StageCache, print_report
+
+
+def make_stage(tmp_path, **settings):
+    source = os.path.join(tmp_path, "input.txt")
+    output = os.path.join(tmp_path, "output.txt")
+    for path in (source, output):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(path)
+    # das Skript selbst wird nur gehasht, nicht ausgeführt
+    with open(os.path.join(tmp_path, "stage.py"), "w", encoding="utf-8") as f:
+        f.write("print('stage')\n")
+    return Stage("stage", "stage.py", inputs=[source], outputs=[output], **settings)
+
+
+def test_hit_until_input_or_output_changes(tmp_path):
+    stage = make_stage(tmp_path)
+    cache = StageCache(os.path.join(tmp_path, "cache.json"), str(tmp_path))
+    fingerprint = cache.fingerprint(stage)
+    assert cache.lookup(stage, fingerprint) is None
+    cache.record(stage, fingerprint)
+    assert StageCache(cache.path, str(tmp_path)).lookup(stage, fingerprint) == HIT
+
+    with open(stage.outputs[0], "a", encoding="utf-8") as f:
+        f.write("geändert")
+    assert cache.lookup(stage, fingerprint) is None
+    with open(stage.inputs[0], "a", encoding="utf-8") as f:
+        f.write("geändert")
+    assert cache.fingerprint(stage) != fingerprint
+
+
+def test_env_is_part_of_fingerprint(tmp_path):
+    cache = StageCache(os.path.join(tmp_path, "cache.json"), str(tmp_path))
+    plain = cache.fingerprint(make_stage(tmp_path))
+    assert cache.fingerprint(make_stage(tmp_path, env={"AREA_CHECK": "1"})) != plain
+
+
+def test_adopt_existing_outputs(tmp_path):
+    stage = make_stage(tmp_path, adopt_existing=True)
+    cache = StageCache(os.path.join(tmp_path, "cache.json"), str(tmp_path))
+    assert cache.lookup(stage, cache.fingerprint(stage)) == ADOPTED
+
+
+def test_max_age_expires_records(tmp_path):
+    stage = make_stage(tmp_path, adopt_existing=True, max_age=3600)
+    cache = StageCache(os.path.join(tmp_path, "cache.json"), str(tmp_path))
+    fingerprint = cache.fingerprint(stage)
+    cache.record(stage, fingerprint)
+    assert cache.lookup(stage, fingerprint) == HIT
+    # Eintrag von vor zwei Stunden: abgelaufen, auch wenn die Ausgaben noch da sind
+    cache.stages["stage"][-1]["recorded_at"] -= 7200
+    assert cache.lookup(stage, fingerprint) is None
+    stage.max_age = None
+    assert cache.lookup(stage, fingerprint) == HIT
+
+
+def test_geocode_fingerprint_follows_geocoder_settings(monkeypatch):
+    import run_pipeline
+
+    for name in ("PIPELINE_SITE", "NOMINATIM_ENDPOINTS", "NOMINATIM_PROFILE"):
+        monkeypatch.delenv(name, raising=False)
+    geocode = {stage.name: stage for stage in run_pipeline.build_stages()}["geocode"]
+    monkeypatch.setenv("NOMINATIM_ENDPOINTS", "http://localhost:8080")
+    monkeypatch.setenv("NOMINATIM_PROFILE", "self-hosted")
+    monkeypatch.setenv("PIPELINE_SITE", "adlershof")
+    changed = {stage.name: stage for stage in run_pipeline.build_stages()}["geocode"]
+    assert changed.env == {**geocode.env, "NOMINATIM_ENDPOINTS": "http://localhost:8080",
+                           "NOMINATIM_PROFILE": "self-hosted", "PIPELINE_SITE": "adlershof"}
+
+
+def test_print_report_without_stages(capsys):
+    print_report([], 0.0)
+    assert "0 Treffer, 0 Fehlschläge" in capsys.readouterr().out
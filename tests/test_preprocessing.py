@@ -0,0 +1,141 @@
+"""
+Spaltenweise Adress-Aufbereitung (address_expansion.py) gegen die zeilenweise
+Referenz `expand_rows` / `clean_and_expand_adresse`, und die chunkweise
+Verarbeitung einer Datei gegen die der ganzen Tabelle.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from address_expansion import (
+    ExpansionPlan,
+    clean_addresses,
+    expand_addresses,
+    expand_rows,
+    expand_table_in_chunks,
+    iter_expanded_chunks,
+)
+from generators import make_companies
+from table_storage import iter_table_chunks, read_table, write_table
+
+CASES = [
+    "Rudower Chausee 17",
+    "Max-Born-Straße 2 - 4",
+    "Max-Born-Straße 2-4, 12489 Berlin",
+    "Volmerstraße 16 und 18",
+    "Volmerstraße 14/16",
+    "Kekuléstraße 73 A-D",
+    "Kekuléstraße 7a",
+    "Rudower Chaussee 17 u. 19",
+    "Volmerstraße 2 + 4",
+    "Albert-Einstein-Straße 5; Wegedornstraße 3",
+    "Albert-Einstein-Straße 5 und 7; 12489 Berlin Wegedornstraße 3",
+    "12489 Berlin ZPV, Johann-Hittorf-Straße 8",
+    "12489 Berlin Haus 3, Johann-Hittorf-Straße 8",
+    "Ernst-Augustin-Straße 12 (Aufgang B)",
+    "Ernst-Augustin-Straße 12 / Ecke Wegedornstraße",
+    "  Carl-Scheele-Straße 4 OG 2, 12489 Berlin ",
+    "",
+    None,
+]
+
+
+def table(addresses):
+    return pd.DataFrame({
+        "Nr.": range(1, len(addresses) + 1),
+        "Name": [f"Firma {i}" for i in range(len(addresses))],
+        "Adresse": addresses,
+    })
+
+
+def assert_same_as_reference(df, **kwargs):
+    assert expand_addresses(df, **kwargs).to_csv(index=False) == expand_rows(df, **kwargs).to_csv(index=False)
+
+
+@pytest.mark.parametrize("adresse", CASES)
+def test_single_address(adresse):
+    assert_same_as_reference(table([adresse]))
+
+
+def test_all_forms_in_one_table():
+    assert_same_as_reference(table(CASES * 3))
+
+
+def test_generated_table():
+    assert_same_as_reference(make_companies(3_000, 300))
+
+
+def test_other_prefix():
+    df = table(["Hauptstraße 1 - 3", "Ort GmbH, Hauptstraße 5", "10115 Berlin Hauptstraße 7"])
+    assert_same_as_reference(df, prefix="01067 Dresden")
+
+
+def test_clean_addresses():
+    cleaned = clean_addresses(pd.Series(["Rudower Chausee 17 (Aufgang B)", "12489 Berlin ZPV, Volmerstraße 8"]))
+    assert cleaned.tolist() == ["12489 Berlin Rudower Chaussee 17", "12489 Berlin Volmerstraße 8"]
+
+
+def test_plan_counts_and_cap():
+    df = table(["Volmerstraße 2 - 4", "Wegedornstraße 1 - 500", "Volmerstraße 2 - 4", "Kekuléstraße 73 A-D"])
+    plan = ExpansionPlan(df, max_expansion=10)
+    assert plan.counts.tolist() == [3, 1, 3, 4]
+    assert plan.output_rows == 11
+    assert plan.capped == [("12489 Berlin Wegedornstraße 1 - 500", 500)]
+
+
+def test_max_expansion_keeps_range_unsplit():
+    df = table(["Volmerstraße 2 - 4", "Wegedornstraße 1 - 500", "Kekuléstraße 73 A-D"])
+    capped = expand_addresses(df, max_expansion=10)
+    reference = expand_rows(df)
+    assert len(reference) == 3 + 500 + 4
+    expected = pd.concat([
+        reference[reference["Nr."] != 2],
+        pd.DataFrame({"Nr.": [2], "Name": ["Firma 1"], "Adresse": ["12489 Berlin Wegedornstraße 1 - 500"]}),
+    ]).sort_values("Nr.", kind="stable").reset_index(drop=True)
+    assert capped.equals(expected)
+    # ohne Grenze wie die Schleife
+    assert expand_addresses(df).equals(reference)
+
+
+# --------------------------------------------------
+# Chunkweise über eine Datei
+# --------------------------------------------------
+def write_input(df, tmp_path, storage):
+    input_path = os.path.join(tmp_path, "geodata.csv")
+    write_table(df, input_path, storage)
+    return input_path
+
+
+@pytest.mark.parametrize("storage", ["csv", "parquet"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 500])
+def test_chunks_same_as_whole_table(tmp_path, storage, chunk_size):
+    df = make_companies(120, 40)
+    # eine Firma mit mehreren Zeilen, die über die Chunk-Grenzen reichen
+    df.loc[5:20, "Nr."] = 6
+    df.loc[5:20, "Adresse"] = "Volmerstraße 2 - 12"
+    input_path = write_input(df, tmp_path, storage)
+    output_path = os.path.join(tmp_path, "preprocessed.csv")
+    written = expand_table_in_chunks(input_path, output_path, chunk_size, max_expansion=100, storage=storage)
+    expected = expand_addresses(read_table(input_path, storage=storage), max_expansion=100)
+    assert written == len(expected)
+    assert read_table(output_path, storage=storage).equals(expected)
+
+
+def test_output_pieces_split_large_chunks():
+    df = table(["Volmerstraße 1 - 10", "Volmerstraße 1 - 10", "Kekuléstraße 73 A-D", "Wegedornstraße 1 - 500"])
+    pieces = list(iter_expanded_chunks([df], max_expansion=100, max_rows=8))
+    # höchstens `max_rows` Zeilen je Stück, außer eine einzelne Eingabezeile ergibt mehr
+    assert [len(piece) for piece in pieces] == [10, 10, 5]
+    assert pd.concat(pieces, ignore_index=True).equals(expand_addresses(df, max_expansion=100))
+
+
+@pytest.mark.parametrize("storage", ["csv", "parquet"])
+def test_empty_input_writes_header(tmp_path, storage):
+    input_path = write_input(table([]), tmp_path, storage)
+    output_path = os.path.join(tmp_path, "preprocessed.csv")
+    # alte Ausgabe eines früheren Laufs wird ersetzt
+    write_table(table(CASES), output_path, storage)
+    assert expand_table_in_chunks(input_path, output_path, 5, storage=storage) == 0
+    assert read_table(output_path, storage=storage).columns.tolist() == ["Nr.", "Name", "Adresse"]
+    assert len(next(iter_table_chunks(output_path, 5, storage))) == 0
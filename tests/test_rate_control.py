@@ -0,0 +1,160 @@
+"""
+Adaptive Ratenbegrenzung (rate_control.py): Einheiten-Tests und Crawler bzw.
+Geocoder gegen drosselnde Ersatz-Server (benchmarks/throttle.py). Gedrosselte
+Läufe müssen dieselben Ergebnisse liefern wie ungedrosselte.
+"""
+import asyncio
+import email.utils
+import os
+import time
+
+import pytest
+
+import crawl_enterprizes_Adlershof as crawler
+from batch_geocoder import Endpoint
+from fixture_server import FixtureServer, FixtureSite
+from nominatim_server import NominatimServer, expected_coordinates
+from rate_control import AdaptiveRateLimiter, RateStore, parse_retry_after
+from throttle import ServerThrottle
+
+# Anfragen/s, ab denen der Fixture-Server drosselt
+SERVER_RATE = 20
+# Serverlatenz: bei 0 ms wäre schon das Rauschen ein Latenzanstieg um das Dreifache
+LATENCY = 0.02
+
+
+# --------------------------------------------------
+# Einheiten
+# --------------------------------------------------
+def test_parse_retry_after():
+    now = time.time()
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(" 0.5 ") == 0.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(email.utils.formatdate(now + 30, usegmt=True), now) == pytest.approx(30, abs=1)
+    assert parse_retry_after("bald") is None
+    assert parse_retry_after(None) is None
+
+
+def test_additive_increase_up_to_max_rate():
+    limiter = AdaptiveRateLimiter("host", rate=1, max_rate=2, increase=1)
+    for _ in range(20):
+        limiter.success(time.monotonic())
+    assert limiter.rate == 2
+
+
+def test_decrease_once_per_window():
+    limiter = AdaptiveRateLimiter("host", rate=8, max_rate=8)
+    sent_before = time.monotonic()
+    limiter.throttled(sent_before, 429)
+    # weitere Antworten auf Anfragen von vor der Senkung senken nicht noch einmal
+    limiter.throttled(sent_before, 429)
+    assert limiter.rate == 4
+    limiter.throttled(time.monotonic(), 503)
+    assert limiter.rate == 2
+    assert limiter.decreases == 2
+
+
+def test_only_throttle_statuses_decrease():
+    limiter = AdaptiveRateLimiter("host", rate=8, max_rate=8, throttle_statuses=(429,))
+    limiter.throttled(time.monotonic(), 503)
+    assert limiter.rate == 8
+    assert limiter.throttles == 1
+
+
+def test_retry_after_blocks_host():
+    limiter = AdaptiveRateLimiter("host", rate=100, max_rate=100)
+    limiter.acquire()
+    limiter.throttled(time.monotonic(), 429, retry_after=0.3)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.25
+
+
+def test_rate_store(tmp_path):
+    store = RateStore(os.path.join(tmp_path, "rates.json"))
+    limiter = AdaptiveRateLimiter.for_url("http://example.org/a", rate=1, max_rate=10)
+    limiter.set_rate(6)
+    store.save(limiter)
+    # gelernte Rate innerhalb der neuen Grenzen
+    assert AdaptiveRateLimiter.for_url("http://example.org/b", rate=1, max_rate=10, store=store).rate == 6
+    assert AdaptiveRateLimiter.for_url("http://example.org/b", rate=1, max_rate=4, store=store).rate == 4
+    assert AdaptiveRateLimiter.for_url("http://other.org/", rate=1, max_rate=10, store=store).rate == 1
+    expired = RateStore(store.path, ttl=0)
+    assert AdaptiveRateLimiter.for_url("http://example.org/", rate=1, max_rate=10, store=expired).rate == 1
+
+
+# --------------------------------------------------
+# Crawler gegen drosselnden Ersatz-Server
+# --------------------------------------------------
+@pytest.fixture(scope="module")
+def throttled_server():
+    throttle = ServerThrottle(SERVER_RATE, burst=2, status=429, retry_after=0.5)
+    with FixtureServer(FixtureSite(pages=2, per_page=8), latency=LATENCY, throttle=throttle) as server:
+        yield server
+
+
+def crawl(server, limiter=None):
+    server.throttle.reset()
+    crawler.rate_limiter = limiter
+    rows = []
+    try:
+        asyncio.run(crawler.crawl_async(set(), 1, rows.append, base_url=server.base_url, concurrency=4))
+    finally:
+        crawler.rate_limiter = None
+    return rows
+
+
+@pytest.fixture(scope="module")
+def reference(throttled_server):
+    throttled_server.throttle.enabled = False
+    try:
+        return crawl(throttled_server)
+    finally:
+        throttled_server.throttle.enabled = True
+
+
+def test_crawler_adapts_to_throttling(throttled_server, reference, tmp_path, monkeypatch):
+    # Start bei der doppelten Serverrate statt 1 / REQUEST_DELAY
+    monkeypatch.setattr(crawler, "REQUEST_DELAY", 1 / (SERVER_RATE * 2))
+    store = RateStore(os.path.join(tmp_path, "rate_limits.json"))
+    limiter = crawler.create_rate_limiter(throttled_server.base_url, SERVER_RATE * 2, store)
+    assert crawl(throttled_server, limiter) == reference
+    assert throttled_server.throttle.rejected > 0
+    assert limiter.decreases > 0
+    store.save(limiter)
+    # zweiter Lauf startet bei der gelernten Rate
+    learned = crawler.create_rate_limiter(throttled_server.base_url, SERVER_RATE * 2, store)
+    assert learned.initial_rate == pytest.approx(limiter.rate)
+    assert crawl(throttled_server, learned) == reference
+
+
+def test_crawler_below_server_rate_is_never_throttled(throttled_server, reference):
+    ceiling = SERVER_RATE / 2
+    limiter = AdaptiveRateLimiter.for_url(throttled_server.base_url, rate=ceiling, max_rate=ceiling)
+    start = time.perf_counter()
+    assert crawl(throttled_server, limiter) == reference
+    seconds = time.perf_counter() - start
+    assert throttled_server.throttle.rejected == 0
+    # harte Obergrenze (die erste Anfrage startet sofort)
+    assert (len(reference) + 2 - 1) / seconds <= ceiling * 1.05
+
+
+# --------------------------------------------------
+# Geocoder gegen drosselnden Nominatim-Ersatz
+# --------------------------------------------------
+# geopy liest Retry-After nur als ganze Sekunden
+@pytest.mark.parametrize("status, retry_after", [(429, 1), (503, None)])
+def test_geocoder_adapts_to_throttling(status, retry_after):
+    addresses = [f"Teststraße {i}, 12489 Berlin" for i in range(8)] + ["Nowhere 1, 12489 Berlin"]
+    # nacheinander geocodiert: niedrigere Serverrate als beim Crawler
+    throttle = ServerThrottle(5, burst=1, status=status, retry_after=retry_after)
+    with NominatimServer(LATENCY, throttle=throttle) as server:
+        # Profil "public", aber mit Start und Obergrenze über der Serverrate, damit gedrosselt wird
+        endpoint = Endpoint(server.url, "public", rate=10, max_rate=20, error_wait_seconds=0.1)
+        for address in addresses:
+            location = endpoint.geocode(address)
+            actual = None if location is None else (location.latitude, location.longitude)
+            assert actual == expected_coordinates(address)
+    assert throttle.rejected > 0
+    assert endpoint.limiter.decreases > 0
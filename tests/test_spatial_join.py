@@ -0,0 +1,185 @@
+"""
+Spatial Join (building_index.py, join_companies_to_buildings.py): Punkt in
+Polygon nach der Even-Odd-Regel und die Rangfolge enthaltend vor nahe, dann
+kleinste Fläche, dann kleinster Abstand, für Gebäude in WGS84 und UTM.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from building_index import load_buildings, utm_forward
+from generators import make_city, to_lonlat, write_city_geojson
+from join_companies_to_buildings import join_companies_to_buildings
+
+MAX_DISTANCE = 30.0
+
+# Gebäude als Ringe in Metern um generators.ORIGIN (x nach Osten, y nach Norden); Außenringe
+# gegen, Innenringe im Uhrzeigersinn wie in GeoJSON und OGC-WKT
+BUILDINGS = [
+    # großes Gebäude mit Innenhof, dazu ein zweiter, entfernter Teil (MultiPolygon)
+    ("gross", [[[(-50, -50), (50, -50), (50, 50), (-50, 50)], [(-10, -10), (-10, 10), (10, 10), (10, -10)]],
+               [[(200, 200), (220, 200), (220, 220), (200, 220)]]]),
+    # kleines Gebäude, das im großen liegt
+    ("klein", [[[(20, 20), (40, 20), (40, 40), (20, 40)]]]),
+    ("einzeln", [[[(100, -10), (120, -10), (120, 10), (100, 10)]]]),
+]
+
+# Firma: (x, y) in Metern, erwartetes Gebäude, erwarteter Abstand
+COMPANIES = {
+    "im großen": ((-30, -30), "gross", 0.0),
+    "in beiden": ((30, 30), "klein", 0.0),
+    "im Innenhof": ((0, 1), "gross", 9.0),
+    "im zweiten Teil": ((210, 210), "gross", 0.0),
+    "knapp außerhalb": ((125, 0), "einzeln", 5.0),
+    "zu weit weg": ((160, 0), None, None),
+}
+
+
+def to_utm(x, y):
+    lon, lat = to_lonlat(x, y)
+    return utm_forward(lat, lon, 33)
+
+
+def closed(ring, to_native):
+    return [list(map(float, to_native(x, y))) for x, y in ring + ring[:1]]
+
+
+def write_geojson(path, to_native):
+    features = [{
+        "type": "Feature",
+        "properties": {"place_id": place_id, "Geschossfl": 1000.0},
+        "geometry": {"type": "MultiPolygon", "coordinates": [[closed(r, to_native) for r in p] for p in polygons]},
+    } for place_id, polygons in BUILDINGS]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def wkt(polygons, to_native):
+    def ring(r):
+        return "(" + ", ".join(f"{x!r} {y!r}" for x, y in closed(r, to_native)) + ")"
+    return "MULTIPOLYGON (" + ", ".join("(" + ", ".join(ring(r) for r in p) + ")" for p in polygons) + ")"
+
+
+def write_wkt_csv(path, to_native):
+    pd.DataFrame({
+        "place_id": [place_id for place_id, _ in BUILDINGS],
+        "Geschossfl": 1000.0,
+        "geometry": [wkt(polygons, to_native) for _, polygons in BUILDINGS],
+    }).to_csv(path, index=False)
+
+
+def companies():
+    names = list(COMPANIES) + ["ohne Koordinaten"]
+    lon, lat = to_lonlat(*np.array([xy for xy, _, _ in COMPANIES.values()], dtype=float).T)
+    return pd.DataFrame({
+        "Name": names,
+        "Latitude": np.append(lat, np.nan),
+        "Longitude": np.append(lon, np.nan),
+        "Geschossfl": 1.0,
+    })
+
+
+def check_join(joined):
+    joined = joined.set_index("Name")
+    for name, (_, place_id, distance) in COMPANIES.items():
+        row = joined.loc[name]
+        if place_id is None:
+            assert pd.isna(row["place_id"]), name
+        else:
+            assert row["place_id"] == place_id, name
+            assert row["Abstand Gebäude (m)"] == pytest.approx(distance, abs=0.2), name
+            assert row["Geschossfl_gebaeude"] == 1000.0
+    assert pd.isna(joined.loc["ohne Koordinaten", "place_id"])
+    # Firmen-Spalten bleiben unverändert
+    assert (joined["Geschossfl"] == 1.0).all()
+
+
+@pytest.mark.parametrize("file_format", ["geojson", "csv"])
+@pytest.mark.parametrize("crs", ["EPSG:4326", "EPSG:25833"])
+def test_join(tmp_path, file_format, crs):
+    to_native = to_lonlat if crs == "EPSG:4326" else to_utm
+    path = os.path.join(tmp_path, f"gebaeude.{file_format}")
+    (write_geojson if file_format == "geojson" else write_wkt_csv)(path, to_native)
+    buildings, index = load_buildings(path, crs=crs, max_distance=MAX_DISTANCE, cell_size=50)
+    assert len(index) == len(BUILDINGS)
+    check_join(join_companies_to_buildings(companies(), buildings, index))
+
+
+def test_query_ranking(tmp_path):
+    path = os.path.join(tmp_path, "gebaeude.geojson")
+    write_geojson(path, to_utm)
+    _, index = load_buildings(path, crs="EPSG:25833", max_distance=MAX_DISTANCE)
+    x, y = to_utm(np.array([30.0, 0.0, 0.0, 125.0, 160.0, np.nan]), np.array([30.0, 1.0, -55.0, 0.0, 0.0, 0.0]))
+    building, distance = index.query(x, y)
+    # in beiden: das kleinere; im Innenhof und knapp außerhalb: das nächste; NaN: keins
+    assert building.tolist() == [1, 0, 0, 2, -1, -1]
+    assert distance[[0, 1, 2, 3]] == pytest.approx([0.0, 9.0, 5.0, 5.0], abs=0.2)
+    assert np.isnan(distance[[4, 5]]).all()
+    # Fläche: äußerer Ring minus Innenhof plus zweiter Teil (100 * 100 - 20 * 20 + 20 * 20)
+    assert index.area[0] == pytest.approx(10_000.0, rel=1e-2)
+
+
+def test_nearest_without_containing_building(tmp_path):
+    path = os.path.join(tmp_path, "gebaeude.csv")
+    write_wkt_csv(path, to_utm)
+    _, index = load_buildings(path, crs="EPSG:25833", max_distance=10)
+    # nur Gebäude innerhalb von `max_distance`, auch der zweite Teil eines MultiPolygons
+    x, y = to_utm(np.array([125.0, 192.0, 135.0]), np.array([0.0, 210.0, 0.0]))
+    building, distance = index.query(x, y)
+    assert building.tolist() == [2, 0, -1]
+    assert distance[:2] == pytest.approx([5.0, 8.0], abs=0.2)
+
+
+def test_centroid_csv(tmp_path):
+    path = os.path.join(tmp_path, "schwerpunkte.csv")
+    centroids = [(0, 0), (40, 0), (np.nan, np.nan)]
+    x, y = to_utm(*np.array(centroids, dtype=float).T)
+    pd.DataFrame({"gml_id": ["a", "b", "ohne"], "x": x, "y": y, "Geschossfl": [1.0, 2.0, 3.0]}).to_csv(path, index=False)
+    buildings, index = load_buildings(path, crs="EPSG:25833", max_distance=MAX_DISTANCE)
+    assert len(index) == 3
+    lon, lat = to_lonlat(np.array([5.0, 30.0, 100.0, np.nan]), np.array([0.0, 3.0, 0.0, np.nan]))
+    companies = pd.DataFrame({"Latitude": lat, "Longitude": lon})
+    joined = join_companies_to_buildings(companies, buildings, index)
+    assert joined["place_id"].tolist()[:2] == ["a", "b"]
+    assert joined["place_id"].isna().tolist() == [False, False, True, True]
+    assert joined["Abstand Gebäude (m)"].tolist()[:2] == pytest.approx([5.0, np.hypot(10, 3)], abs=0.2)
+
+
+# --------------------------------------------------
+# Gitterindex gegen Brute Force
+# --------------------------------------------------
+def brute_force(index, px, py):
+    """Referenz ohne Gitter: alle Kanten aller Gebäude je Punkt."""
+    starts = index.edge_start[:-1]
+    x0, y0, x1, y1 = index.x0, index.y0, index.x1, index.y1
+    dx, dy = x1 - x0, y1 - y0
+    result = []
+    for x, y in zip(px, py):
+        crossing = ((y0 > y) != (y1 > y)) & (x < x0 + (y - y0) * dx / np.where(dy == 0, 1, dy))
+        inside = np.add.reduceat(crossing.astype(int), starts) % 2 == 1
+        t = np.clip(((x - x0) * dx + (y - y0) * dy) / (dx * dx + dy * dy), 0, 1)
+        distance = np.minimum.reduceat(np.hypot(x - x0 - t * dx, y - y0 - t * dy), starts)
+        if inside.any():
+            candidates = np.flatnonzero(inside)
+            result.append(candidates[np.argmin(index.area[candidates])])
+        elif distance.min() <= index.max_distance:
+            result.append(int(np.argmin(distance)))
+        else:
+            result.append(-1)
+    return np.array(result)
+
+
+def test_grid_index_same_as_brute_force(tmp_path):
+    path = os.path.join(tmp_path, "gebaeude.geojson")
+    write_city_geojson(path, make_city(400))
+    _, index = load_buildings(path)
+    # zufällig über die Stadt, auch zwischen den Gebäuden und am Rand
+    rng = np.random.default_rng(2)
+    lon, lat = to_lonlat(rng.uniform(-60, 660, 500), rng.uniform(-60, 660, 500))
+    px, py = index.projection.from_lonlat(lon, lat)
+    building, distance = index.query(px, py)
+    assert (building == brute_force(index, px, py)).all()
+    assert ((building >= 0) == np.isfinite(distance)).all()
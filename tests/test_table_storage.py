@@ -0,0 +1,120 @@
+"""
+Zwischenstände als CSV oder Parquet (table_storage.py): `write_table`,
+`read_table`, `iter_table_chunks` und `TableWriter` erhalten Werte und
+Spaltentypen in beiden Formaten.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from generators import make_table
+from table_storage import TableWriter, iter_table_chunks, read_table, storage_path, write_table
+
+STORAGES = ["csv", "parquet"]
+DTYPES = {"Branchenzweig": "category", "Cluster": "category"}
+
+
+@pytest.fixture(scope="module")
+def df():
+    # Categoricals, Ganzzahlen, Text und Gleitkomma mit Lücken (Latitude)
+    return make_table(600)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, "adlershof_companies_processed.csv")
+
+
+def test_storage_path():
+    assert storage_path(os.path.join("results", "a.csv"), "csv") == os.path.join("results", "a.csv")
+    assert storage_path(os.path.join("results", "a.csv"), "parquet") == os.path.join("results", "a.parquet")
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_round_trip(df, path, storage):
+    write_table(df, path, storage)
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(storage_path(path, storage))]
+    loaded = read_table(path, dtype=DTYPES, storage=storage)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded["Latitude"].isna().sum() == df["Latitude"].isna().sum() > 0
+
+
+def test_parquet_keeps_dtypes_without_dtype(df, path):
+    write_table(df, path, "parquet")
+    loaded = read_table(path, storage="parquet")
+    assert loaded.dtypes.equals(df.dtypes)
+    assert loaded["Cluster"].dtype == "category"
+
+
+def test_formats_give_same_csv(df, path):
+    write_table(df, path, "parquet", export_csv=True)
+    from_csv = read_table(path, dtype=DTYPES, storage="csv")
+    from_parquet = read_table(path, dtype=DTYPES, storage="parquet")
+    assert from_csv.to_csv(index=False) == from_parquet.to_csv(index=False) == df.to_csv(index=False)
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_columns_and_category_order(df, path, storage):
+    write_table(df.iloc[::-1], path, storage)
+    loaded = read_table(path, columns=["Cluster", "Nr.", "gibt es nicht"], dtype=DTYPES, storage=storage)
+    assert loaded.columns.tolist() == ["Nr.", "Cluster"]
+    # Kategorien wie beim CSV-Lesen: nur vorkommende, sortiert
+    assert loaded["Cluster"].cat.categories.tolist() == sorted(df["Cluster"].unique())
+
+
+def test_csv_cp1252_fallback(path):
+    with open(path, "w", encoding="cp1252") as f:
+        f.write("Name,Adresse\nMüller GmbH,Volmerstraße 2\n")
+    assert read_table(path, storage="csv").values.tolist() == [["Müller GmbH", "Volmerstraße 2"]]
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+@pytest.mark.parametrize("chunk_size", [1, 64, 10_000])
+def test_iter_table_chunks(df, path, storage, chunk_size):
+    small = df.head(130)
+    write_table(small, path, storage)
+    chunks = list(iter_table_chunks(path, chunk_size, storage))
+    assert [len(c) for c in chunks[:-1]] == [chunk_size] * (len(chunks) - 1)
+    whole = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(whole, read_table(path, storage=storage))
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_table_writer(df, path, storage):
+    with TableWriter(path, storage) as writer:
+        for start in range(0, len(df), 250):
+            writer.append(df.iloc[start:start + 250])
+    assert writer.rows == len(df)
+    pd.testing.assert_frame_equal(read_table(path, dtype=DTYPES, storage=storage), df)
+
+
+def test_table_writer_casts_to_first_schema(path):
+    with TableWriter(path, "parquet") as writer:
+        writer.append(pd.DataFrame({"Nr.": [1.0, 2.0], "Name": ["a", "b"]}))
+        # ganze Zahlen und eine Lücke im Text: wie das erste Stück gespeichert
+        writer.append(pd.DataFrame({"Nr.": [3, 4], "Name": ["c", None]}))
+    loaded = read_table(path, storage="parquet")
+    assert loaded["Nr."].dtype == np.float64
+    assert loaded["Nr."].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert loaded["Name"].tolist()[:3] == ["a", "b", "c"] and pd.isna(loaded["Name"].iloc[3])
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_table_writer_error_keeps_old_output(df, path, storage):
+    write_table(df.head(3), path, storage)
+    with pytest.raises(RuntimeError):
+        with TableWriter(path, storage) as writer:
+            writer.append(df.iloc[3:10])
+            raise RuntimeError("Abbruch")
+    assert not os.path.exists(writer.tmp_path)
+    assert read_table(path, storage=storage).to_csv(index=False) == df.head(3).to_csv(index=False)
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_table_writer_error_before_first_chunk(path, storage):
+    with pytest.raises(RuntimeError):
+        with TableWriter(path, storage) as writer:
+            raise RuntimeError("Abbruch")
+    assert os.listdir(os.path.dirname(path)) == []